@@ -5,10 +5,11 @@ from .plugins import (
     PluginResult,
     PluginResultIterator,
 )
-from .api import generate_data, SnowfakeryApplication
+from .api import generate_data, prepare_recipe, SnowfakeryApplication
 
 __all__ = (
     "generate_data",
+    "prepare_recipe",
     "SnowfakeryApplication",
     "SnowfakeryPlugin",
     "lazy",
@@ -1,3 +1,3 @@
 from snowfakery import cli
 
-cli.generate_cli.main(prog_name="snowfakery")
+cli.main()
@@ -5,24 +5,21 @@ import sys
 
 import yaml
 
-from snowfakery.data_generator import generate
+from snowfakery import data_generator
 
 from snowfakery.output_streams import (
+    OutputStream,
     DebugOutputStream,
     MultiplexOutputStream,
     SqlDbOutputStream,
 )
-from snowfakery.generate_mapping_from_recipe import mapping_from_recipe_templates
-from snowfakery.salesforce import create_cci_record_type_tables
-from snowfakery.cci_mapping_files.declaration_parser import (
-    SObjectRuleDeclarationFile,
-    unify,
-)
 import snowfakery.data_gen_exceptions as exc
 from snowfakery.data_generator_runtime import (
     StoppingCriteria,
 )
 from snowfakery.utils.files import FileLike, open_file_like
+from snowfakery.instrumentation import Instrumentation
+from snowfakery.metrics import MetricsFileWriter, ProgressEvent
 
 OUTPUT_FORMATS = {
     "png": "snowfakery.output_streams.ImageOutputStream",
@@ -50,6 +47,7 @@ class SnowfakeryApplication:
     stopping_criteria = None
     starting_id = 0
     rep_count = 0
+    progress_interval = 1.0  # minimum seconds between calls to `progress`
 
     def __init__(self, stopping_criteria: StoppingCriteria = None):
         self.stopping_criteria = stopping_criteria or StoppingCriteria(COUNT_REPS, 1)
@@ -62,6 +60,14 @@ class SnowfakeryApplication:
 
         click.echo(message, file, nl, err, color)
 
+    def progress(self, event: ProgressEvent):
+        """Called with rows per table, iterations, throughput and memory use
+        every `progress_interval` seconds during generation, and once more
+        with `event.finished` set when generation is complete.
+
+        Override this to monitor long-running jobs."""
+        pass
+
     @property
     def stopping_tablename(self):
         """Return the name of "stopping table/object":
@@ -153,63 +159,167 @@ def generate_data(
     ] = (),  # pass through these fields from input to output
     strict_mode: bool = False,  # same as --strict-mode
     validate_only: bool = False,  # same as --validate-only
+    recipe_cache_dir: FileLike = None,  # same as --recipe-cache-dir
+    instrumentation: Instrumentation = None,  # collects timings, like --profile
+    metrics_file: FileLike = None,  # same as --metrics-file
+    metrics_format: str = None,  # same as --metrics-format
 ):
-    stopping_criteria = stopping_criteria_from_target_number(target_number)
-    dburls = dburls or ([dburl] if dburl else [])
-    output_files = output_files or []
-    if output_file:
-        output_files = output_files + [output_file]
-
     with ExitStack() as exit_stack:
-
-        def open_with_cleanup(file, mode, **kwargs):
-            return exit_stack.enter_context(open_file_like(file, mode, **kwargs))
-
-        parent_application = parent_application or SnowfakeryApplication(
-            stopping_criteria
-        )
-
-        output_stream = exit_stack.enter_context(
-            configure_output_stream(
-                dburls, output_format, output_files, output_folder, parent_application
-            )
-        )
-
-        yaml_path, open_yaml_file = open_with_cleanup(yaml_file, "r")
-        _, open_new_continue_file = open_with_cleanup(generate_continuation_file, "w")
-        _, open_continuation_file = open_with_cleanup(continuation_file, "r")
-        _, open_cci_mapping_file = open_with_cleanup(generate_cci_mapping_file, "w")
+        _, open_yaml_file = exit_stack.enter_context(open_file_like(yaml_file, "r"))
         # utf-8-sig and newline="" are for Windows
-        _, open_update_input_file = open_with_cleanup(
-            update_input_file, "r", newline="", encoding="utf-8-sig"
+        _, open_update_input_file = exit_stack.enter_context(
+            open_file_like(update_input_file, "r", newline="", encoding="utf-8-sig")
         )
-
-        summary = generate(
-            open_yaml_file=open_yaml_file,
-            user_options=user_options,
-            output_stream=output_stream,
-            parent_application=parent_application,
-            generate_continuation_file=open_new_continue_file,
-            continuation_file=open_continuation_file,
-            stopping_criteria=stopping_criteria,
+        prepared = PreparedRecipe.from_file(
+            open_yaml_file,
             plugin_options=plugin_options,
             update_input_file=open_update_input_file,
             update_passthrough_fields=update_passthrough_fields,
+            recipe_cache_dir=recipe_cache_dir,
+        )
+        return prepared.run(
+            parent_application=parent_application,
+            user_options=user_options,
+            dburl=dburl,
+            dburls=dburls,
+            target_number=target_number,
+            generate_cci_mapping_file=generate_cci_mapping_file,
+            output_format=output_format,
+            output_file=output_file,
+            output_files=output_files,
+            output_folder=output_folder,
+            continuation_file=continuation_file,
+            generate_continuation_file=generate_continuation_file,
+            should_create_cci_record_type_tables=should_create_cci_record_type_tables,
+            load_declarations=load_declarations,
             strict_mode=strict_mode,
             validate_only=validate_only,
+            instrumentation=instrumentation,
+            metrics_file=metrics_file,
+            metrics_format=metrics_format,
         )
 
-        if open_cci_mapping_file:
-            declarations = gather_declarations(yaml_path or "", load_declarations)
-            yaml.safe_dump(
-                mapping_from_recipe_templates(summary, declarations),
-                open_cci_mapping_file,
-                sort_keys=False,
+
+class PreparedRecipe(data_generator.PreparedRecipe):
+    """A recipe which has been parsed once so that it can generate data
+    many times. See prepare_recipe."""
+
+    def run(
+        self,
+        *,
+        parent_application: SnowfakeryApplication = None,
+        user_options: T.Dict[str, T.Any] = None,
+        dburl: str = None,
+        dburls: T.Sequence[str] = (),
+        target_number: T.Tuple = None,
+        generate_cci_mapping_file: FileLike = None,
+        output_stream: OutputStream = None,
+        output_format: str = None,
+        output_file: FileLike = None,
+        output_files: T.List[FileLike] = None,
+        output_folder: FileLike = None,
+        continuation_file: FileLike = None,
+        generate_continuation_file: FileLike = None,
+        should_create_cci_record_type_tables: bool = False,
+        load_declarations: T.Sequence[FileLike] = None,
+        strict_mode: bool = False,
+        validate_only: bool = False,
+        instrumentation: Instrumentation = None,
+        metrics_file: FileLike = None,
+        metrics_format: str = None,
+    ):
+        """Generate data, accepting the same output arguments as generate_data.
+
+        An output_stream, if supplied, is used as-is and is not closed,
+        so that an application can pass the same stream to many runs.
+        """
+        stopping_criteria = stopping_criteria_from_target_number(target_number)
+        dburls = list(dburls) or ([dburl] if dburl else [])
+        output_files = output_files or []
+        if output_file:
+            output_files = output_files + [output_file]
+
+        with ExitStack() as exit_stack:
+
+            def open_with_cleanup(file, mode, **kwargs):
+                return exit_stack.enter_context(open_file_like(file, mode, **kwargs))
+
+            parent_application = parent_application or SnowfakeryApplication(
+                stopping_criteria
             )
-    if should_create_cci_record_type_tables:
-        create_cci_record_type_tables(dburls[0])
 
-    return summary
+            if not output_stream:
+                output_stream = exit_stack.enter_context(
+                    configure_output_stream(
+                        dburls,
+                        output_format,
+                        output_files,
+                        output_folder,
+                        parent_application,
+                    )
+                )
+
+            _, open_new_continue_file = open_with_cleanup(
+                generate_continuation_file, "w"
+            )
+            _, open_continuation_file = open_with_cleanup(continuation_file, "r")
+            _, open_cci_mapping_file = open_with_cleanup(generate_cci_mapping_file, "w")
+
+            summary = self.generate(
+                user_options=user_options,
+                output_stream=output_stream,
+                parent_application=parent_application,
+                stopping_criteria=stopping_criteria,
+                generate_continuation_file=open_new_continue_file,
+                continuation_file=open_continuation_file,
+                strict_mode=strict_mode,
+                validate_only=validate_only,
+                instrumentation=instrumentation,
+                progress_listeners=(
+                    [MetricsFileWriter(metrics_file, metrics_format)]
+                    if metrics_file
+                    else []
+                ),
+            )
+
+            if open_cci_mapping_file:
+                from snowfakery.generate_mapping_from_recipe import (
+                    mapping_from_recipe_templates,
+                )
+
+                declarations = gather_declarations(
+                    self.filename or "", load_declarations
+                )
+                yaml.safe_dump(
+                    mapping_from_recipe_templates(summary, declarations),
+                    open_cci_mapping_file,
+                    sort_keys=False,
+                )
+        if should_create_cci_record_type_tables:
+            from snowfakery.salesforce import create_cci_record_type_tables
+
+            create_cci_record_type_tables(dburls[0])
+
+        return summary
+
+
+def prepare_recipe(
+    yaml_file: FileLike,
+    *,
+    plugin_options: T.Mapping = None,  # same as --plugin-option
+    recipe_cache_dir: FileLike = None,  # same as --recipe-cache-dir
+) -> PreparedRecipe:
+    """Parse a recipe once so that it can generate data many times.
+
+    Applications which generate data from the same recipe repeatedly can
+    call `run` on the result instead of calling generate_data each time.
+    `run` accepts the same output arguments as generate_data."""
+    with open_file_like(yaml_file, "r") as (_, open_yaml_file):
+        return PreparedRecipe.from_file(
+            open_yaml_file,
+            plugin_options=plugin_options,
+            recipe_cache_dir=recipe_cache_dir,
+        )
 
 
 @contextmanager
@@ -299,6 +409,11 @@ def get_output_stream_class(output_format):
 
 def gather_declarations(yaml_file, load_declarations):
     """Gather declarations from load declaration files."""
+    from snowfakery.cci_mapping_files.declaration_parser import (
+        SObjectRuleDeclarationFile,
+        unify,
+    )
+
     if not load_declarations:
         inferred_load_file_path = infer_load_file_path(yaml_file)
         if inferred_load_file_path.is_file():
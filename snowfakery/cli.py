@@ -1,13 +1,15 @@
 #!/usr/bin/env python3
+import json
 import sys
 from pathlib import Path
 
 from snowfakery.data_gen_exceptions import DataGenError
-from snowfakery.utils.versions import check_latest_version
 
 import click
 from snowfakery.__about__ import __version__ as version
 from snowfakery.api import file_extensions, generate_data, COUNT_REPS
+from snowfakery.instrumentation import Instrumentation
+from snowfakery.metrics import METRICS_FORMATS
 
 if __name__ == "__main__":  # pragma: no cover
     sys.path.append(str(Path(__file__).parent.parent))
@@ -67,6 +69,8 @@ class VersionMessage:
         return "Properly installed" if out.getvalue() else "Unknown installation error"
 
     def __mod__(self, vals) -> str:
+        from snowfakery.utils.versions import check_latest_version
+
         return "\n".join(
             (
                 f"snowfakery version {version}",
@@ -177,6 +181,33 @@ class VersionMessage:
     is_flag=True,
     help="Validate the recipe without generating any data.",
 )
+@click.option(
+    "--recipe-cache-dir",
+    type=click.Path(file_okay=False),
+    help="Cache parsed recipes in this directory to skip parsing on later runs.",
+)
+@click.option(
+    "--profile",
+    is_flag=True,
+    help="Print a report of where the time went, by template, field, function, etc.",
+)
+@click.option(
+    "--profile-file",
+    type=click.File("w"),
+    help="Write the timings that --profile reports to this file as JSON.",
+)
+@click.option(
+    "--metrics-file",
+    type=click.Path(dir_okay=False),
+    help="Report progress (rows per table, rows/sec, memory) to this file "
+    "every second.",
+)
+@click.option(
+    "--metrics-format",
+    type=click.Choice(METRICS_FORMATS),
+    help="jsonl (the default) appends a JSON object per report. prometheus "
+    "(the default for .prom files) rewrites the file in the Prometheus text format.",
+)
 @click.version_option(version=version, prog_name="snowfakery", message=VersionMessage())
 def generate_cli(
     yaml_file,
@@ -198,6 +229,11 @@ def generate_cli(
     update_passthrough_fields=(),  # undocumented feature used mostly for testing
     strict_mode=False,
     validate_only=False,
+    recipe_cache_dir=None,
+    profile=False,
+    profile_file=None,
+    metrics_file=None,
+    metrics_format=None,
 ):
     """
         Generates records from a YAML file
@@ -239,6 +275,7 @@ def generate_cli(
         plugin_options = dict(plugin_option)
         if reps:
             target_number = (COUNT_REPS, reps)
+        instrumentation = Instrumentation() if profile or profile_file else None
 
         generate_data(
             yaml_file=yaml_file,
@@ -259,7 +296,15 @@ def generate_cli(
             update_passthrough_fields=update_passthrough_fields,
             strict_mode=strict_mode,
             validate_only=validate_only,
+            recipe_cache_dir=recipe_cache_dir,
+            instrumentation=instrumentation,
+            metrics_file=metrics_file,
+            metrics_format=metrics_format,
         )
+        if profile:
+            click.echo(instrumentation.report(), err=True)
+        if profile_file:
+            json.dump(instrumentation.as_dict(), profile_file, indent=2)
     except DataGenError as e:
         if debug_internals:
             raise e
@@ -314,8 +359,61 @@ def validate_options(
         )
 
 
+@click.command()
+@click.option("--host", default="127.0.0.1", help="Interface to listen on.")
+@click.option("--port", default=8642, type=int, help="TCP port to listen on.")
+@click.option(
+    "--socket",
+    "socket_path",
+    type=click.Path(dir_okay=False),
+    help="Listen on this Unix domain socket instead of a TCP port.",
+)
+@click.option(
+    "--workers",
+    default=4,
+    type=click.IntRange(min=1),
+    help="Maximum number of jobs that generate data at the same time. "
+    "Use 1 if jobs must be reproducible.",
+)
+@click.option(
+    "--recipe-cache-dir",
+    type=click.Path(file_okay=False),
+    help="Also cache parsed recipes in this directory, across restarts.",
+)
+def serve_cli(host, port, socket_path, workers, recipe_cache_dir):
+    """
+        Runs a local server which generates data on request
+
+    \b
+        Recipes stay parsed between jobs. POST jobs as JSON to /generate, e.g.
+
+            {"recipe": "examples/company.yml", "reps": 5, "output_format": "json"}
+
+        Only listen on interfaces that you trust: jobs can read and write
+        any file that the server can.
+    """
+    from snowfakery.server import make_server
+
+    try:
+        server = make_server(host, port, socket_path, workers, recipe_cache_dir)
+    except (DataGenError, OSError) as e:
+        raise click.ClickException(str(e)) from e
+
+    click.echo(f"Snowfakery is serving on {socket_path or f'http://{host}:{port}'}")
+    with server:
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+
+
 def main():
-    generate_cli.main(prog_name="snowfakery")
+    # `snowfakery serve` is dispatched by hand because the main command
+    # takes a recipe filename as its first argument.
+    if sys.argv[1:2] == ["serve"]:
+        serve_cli.main(args=sys.argv[2:], prog_name="snowfakery serve")
+    else:
+        generate_cli.main(prog_name="snowfakery")
 
 
 if __name__ == "__main__":  # pragma: no cover
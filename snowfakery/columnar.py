@@ -0,0 +1,259 @@
+"""Generate blocks of rows a column at a time with NumPy.
+
+The row engine (ObjectTemplate._generate_row) evaluates every field of
+every row separately. When none of a template's fields depend on
+anything which changes from row to row, except the row's own position,
+a whole block of rows can be generated at once: constants are repeated,
+`random_number` and `random_choice` columns are sampled by NumPy, and the
+rows are handed to the output stream as a batch.
+
+Only simple templates qualify: counted (not `for_each` or `just_once`),
+without friends, and with fields which are all
+
+    constants, e.g. `name: Acme` or `size: 10`
+    ${{id}}, ${{count}} or ${{child_index}}
+    random_number with constant min, max and step
+    random_choice of constants, with constant probabilities if any
+    plugin functions with a batch variant and constant arguments
+
+Every other template is generated by the row engine as usual. Numbers are
+drawn from a NumPy generator seeded from Python's `random`, so runs are
+still repeatable with `random.seed()`, but they produce different values
+than the row engine would.
+
+Enable with the `columnar` Tuning option. NumPy must be installed.
+"""
+
+import random
+import typing as T
+
+from snowfakery.data_gen_exceptions import DataGenError
+from snowfakery.data_generator_runtime_object_model import (
+    ObjectTemplate,
+    SimpleValue,
+    StructuredValue,
+)
+from snowfakery.plugins import batch_variant
+from snowfakery.utils.template_utils import look_for_number
+
+if T.TYPE_CHECKING:  # pragma: no cover
+    from snowfakery.data_generator_runtime import Interpreter
+
+# rows generated and written at a time
+BLOCK_SIZE = 1000
+
+# A function which generates a column from the ids and child indexes of
+# a block of rows
+Column = T.Callable[[T.Sequence[int], range], list]
+
+
+class ColumnarEngine:
+    """Plans and generates the columns of the templates that qualify"""
+
+    def __init__(self, interpreter: "Interpreter"):
+        try:
+            import numpy
+        except ImportError as e:
+            raise DataGenError(
+                "The `columnar` option needs NumPy. Install it with `pip install numpy`"
+            ) from e
+        self.numpy = numpy
+        self.rng = numpy.random.default_rng(random.getrandbits(64))
+        self.native_types = interpreter.native_types
+        self.compiler_for_string = (
+            interpreter.template_evaluator_factory.compiler_for_string
+        )
+        analysis = interpreter.recipe_analysis
+        # names which mean something else if the recipe defines them
+        self.index_names = {
+            "id": "id",
+            "count": "id",
+            "child_index": "child_index",
+        }
+        for name in (analysis.variable_names | analysis.object_names) - {
+            "child_index"  # a variable holding the row's index
+        }:
+            self.index_names.pop(name, None)
+        self.formula_names = analysis.formula_names
+        self.plugin_function_libraries = {
+            name: functions
+            for name, functions in interpreter.plugin_function_libraries.items()
+            if name not in analysis.variable_names | analysis.object_names
+        }
+        self.plans: T.Dict[int, T.Optional[T.List[Column]]] = {}
+
+    def columns_for(self, template: ObjectTemplate) -> T.Optional[T.List[Column]]:
+        """A Column for each of the template's fields, or None if it
+        does not qualify"""
+        key = id(template)
+        if key not in self.plans:
+            self.plans[key] = self._plan(template)
+        return self.plans[key]
+
+    def _plan(self, template: ObjectTemplate) -> T.Optional[T.List[Column]]:
+        if template.friends or template.for_each_expr or template.just_once:
+            return None
+        columns = [self._column(field.definition) for field in template.fields]
+        if not all(columns):
+            return None
+        return columns
+
+    def _column(self, definition) -> T.Optional[Column]:
+        if type(definition) is SimpleValue:  # not subclasses
+            index_name = self._index_formula(definition.definition)
+            if index_name == "id":
+                return lambda ids, child_indexes: self._numbers(ids)
+            elif index_name == "child_index":
+                return lambda ids, child_indexes: self._numbers(child_indexes)
+            constant = self._constant(definition)
+            if constant is not None:
+                (value,) = constant
+                return lambda ids, child_indexes: [value] * len(ids)
+        elif isinstance(definition, StructuredValue):
+            if definition.function_name == "random_number":
+                return self._random_number(definition)
+            elif definition.function_name == "random_choice":
+                return self._random_choice(definition)
+            elif "." in definition.function_name:
+                return self._plugin_batch(definition)
+        return None
+
+    def _index_formula(self, formula) -> T.Optional[str]:
+        """`id` for ${{id}} and ${{count}}, `child_index` for ${{child_index}}"""
+        if not isinstance(formula, str) or formula not in self.formula_names:
+            return None
+        inner = formula.strip()
+        if not (inner.startswith("${{") and inner.endswith("}}")):
+            return None
+        return self.index_names.get(inner[3:-2].strip())
+
+    def _numbers(self, numbers: T.Iterable[int]) -> list:
+        """Numbers as a formula would render them"""
+        if self.native_types:
+            return list(numbers)
+        # e.g. "0" stays a string, like look_for_number("0")
+        return [look_for_number(str(number)) for number in numbers]
+
+    def _constant(self, definition) -> T.Optional[T.Tuple[T.Any]]:
+        """(value,) for a SimpleValue without a formula, like SimpleValue.render"""
+        if type(definition) is not SimpleValue:
+            return None
+        value = definition.definition
+        if isinstance(value, str):
+            if self.compiler_for_string(value):
+                return None
+            if not self.native_types:
+                value = look_for_number(value)
+        return (value,)
+
+    def _random_number(self, definition: StructuredValue) -> T.Optional[Column]:
+        names = ("min", "max", "step")
+        arguments = dict(zip(names, definition.args))
+        arguments.update(definition.kwargs)
+        if set(arguments) - set(names) or not {"min", "max"} <= set(arguments):
+            return None
+        numbers = {}
+        for name, argument in arguments.items():
+            constant = self._constant(argument)
+            if constant is None:
+                return None
+            (number,) = constant
+            if type(number) is not int:
+                return None
+            numbers[name] = number
+        low, high, step = numbers["min"], numbers["max"], numbers.get("step", 1)
+        if step <= 0 or high < low:
+            return None  # let the row engine report the error
+        choices = (high - low) // step + 1
+        rng = self.rng
+
+        def column(ids, child_indexes):
+            return (rng.integers(0, choices, len(ids)) * step + low).tolist()
+
+        return column
+
+    def _random_choice(self, definition: StructuredValue) -> T.Optional[Column]:
+        if definition.args and definition.kwargs:
+            return None
+        if definition.kwargs:
+            # random_choice: {A: 60%, B: 40%}
+            values = list(definition.kwargs)
+            weights = [self._weight(weight) for weight in definition.kwargs.values()]
+        elif all(
+            getattr(arg, "function_name", None) == "choice" for arg in definition.args
+        ):
+            # random_choice: [{choice: {pick: A, probability: 60%}}, ...]
+            values, weights = [], []
+            for choice in definition.args:
+                if set(choice.kwargs) != {"pick", "probability"} or choice.args:
+                    return None
+                pick = self._constant(choice.kwargs["pick"])
+                if pick is None:
+                    return None
+                values.append(pick[0])
+                weight = self._weight(choice.kwargs["probability"])
+                # the row engine treats 0% as no probability at all
+                weights.append(weight or None)
+        else:
+            # random_choice: [A, B, C]
+            constants = [self._constant(arg) for arg in definition.args]
+            if not all(constants):
+                return None
+            values = [constant[0] for constant in constants]
+            weights = [1.0] * len(values)
+
+        if not values or None in weights or sum(weights) <= 0:
+            return None
+        probabilities = self.numpy.array(weights) / sum(weights)
+        rng = self.rng
+
+        def column(ids, child_indexes):
+            picks = rng.choice(len(values), size=len(ids), p=probabilities)
+            return [values[pick] for pick in picks]
+
+        return column
+
+    def _plugin_batch(self, definition: StructuredValue) -> T.Optional[Column]:
+        """A plugin function with a batch variant and constant arguments"""
+        objname, method, *rest = definition.function_name.split(".")
+        functions = self.plugin_function_libraries.get(objname)
+        batch_func = None if rest or not functions else batch_variant(functions, method)
+        if not batch_func:
+            return None
+        args = [self._constant(arg) for arg in definition.args]
+        kwargs = {name: self._constant(arg) for name, arg in definition.kwargs.items()}
+        if not all(args) or not all(kwargs.values()):
+            return None
+        args = [arg for (arg,) in args]
+        kwargs = {name: arg for name, (arg,) in kwargs.items()}
+
+        def column(ids, child_indexes):
+            values = []
+            while len(values) < len(ids):
+                batch = batch_func(len(ids) - len(values), *args, **kwargs)
+                if not batch:
+                    raise DataGenError(f"{batch_func.__name__} returned no values")
+                values.extend(batch)
+            return values[: len(ids)]
+
+        return column
+
+    def _weight(self, definition) -> T.Optional[float]:
+        """60% -> 60.0, like template_funcs.parse_weight_str"""
+        constant = self._constant(definition)
+        if constant is None:
+            return None
+        (weight,) = constant
+        if isinstance(weight, str):
+            weight = weight.rstrip("%")
+        try:
+            weight = float(weight)
+        except (TypeError, ValueError):
+            return None
+        return weight if weight >= 0 else None
+
+    def generate(
+        self, columns: T.Sequence[Column], ids: T.Sequence[int], child_indexes: range
+    ) -> T.List[list]:
+        """The values of each column for a block of rows"""
+        return [column(ids, child_indexes) for column in columns]
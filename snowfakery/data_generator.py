@@ -9,21 +9,28 @@ from faker.providers import BaseProvider as FakerProvider
 from click.utils import LazyFile
 
 from snowfakery.standard_plugins.SnowfakeryVersion import SnowfakeryVersion
+from snowfakery.standard_plugins.Tuning import Tuning, plugin_option_memory_report
 
 from .data_gen_exceptions import DataGenNameError
 from .output_streams import OutputStream, SimpleFileOutputStream
-from .parse_recipe_yaml import parse_recipe
+from .parse_recipe_yaml import parse_recipe, ParseResult
+from .recipe_cache import parse_recipe_with_cache
 from .data_generator_runtime import (
     Globals,
     Interpreter,
 )
 from .data_gen_exceptions import DataGenError, DataGenValidationError
+from .metrics import memory_report
 from .plugins import SnowfakeryPlugin, PluginOption
 
 from .utils.yaml_utils import SnowfakeryDumper, hydrate
+from .utils.files import FileLike
 from snowfakery.standard_plugins.UniqueId import UniqueId
 
-from .recipe_validator import ValidationResult, validate_recipe
+if T.TYPE_CHECKING:  # pragma: no cover
+    # the validator is imported only when validation is requested
+    from .recipe_validator import ValidationResult
+    from .instrumentation import Instrumentation
 
 # This tool is essentially a three stage interpreter.
 #
@@ -121,6 +128,198 @@ def process_plugins(plugins: List) -> Tuple[List[object], Mapping[str, object]]:
     return (faker_providers, snowfakery_plugins)
 
 
+class PreparedRecipe:
+    """A recipe which has been parsed and had its plugins resolved.
+
+    Parsing and plugin resolution are done once. Each call to `generate`
+    builds a fresh Interpreter, so a PreparedRecipe can be run many times,
+    with different options and outputs, without repeating that setup.
+
+    Plugin options are fixed when the recipe is prepared.
+    """
+
+    def __init__(
+        self,
+        parse_result: ParseResult,
+        plugin_options: T.Optional[Mapping] = None,
+        filename: T.Optional[str] = None,
+    ):
+        self.parse_result = parse_result
+        self.filename = filename
+        faker_providers, snowfakery_plugins = process_plugins(parse_result.plugins)
+
+        snowfakery_plugins.setdefault("UniqueId", UniqueId)
+        snowfakery_plugins.setdefault("SnowfakeryVersion", SnowfakeryVersion)
+        snowfakery_plugins.setdefault("Tuning", Tuning)
+        plugin_options = dict(plugin_options or {})
+        if parse_result.version:
+            plugin_options["snowfakery_version"] = parse_result.version
+
+        self.faker_providers = faker_providers
+        self.snowfakery_plugins = snowfakery_plugins
+        self.plugin_options = process_plugins_options(
+            snowfakery_plugins, plugin_options
+        )
+
+    @classmethod
+    def from_file(
+        cls,
+        open_yaml_file: IO[str],
+        *,
+        plugin_options: dict = None,
+        update_input_file: OpenFileLike = None,
+        update_passthrough_fields: T.Sequence[str] = (),
+        recipe_cache_dir: FileLike = None,
+    ):
+        "Parse a recipe and resolve its plugins"
+        # parse the YAML and any it refers to
+        if recipe_cache_dir and not update_input_file:
+            parse_result = parse_recipe_with_cache(open_yaml_file, recipe_cache_dir)
+        else:
+            parse_result = parse_recipe(
+                open_yaml_file, update_input_file, update_passthrough_fields
+            )
+        return cls(parse_result, plugin_options, getattr(open_yaml_file, "name", None))
+
+    def generate(
+        self,
+        user_options: Optional[dict] = None,
+        output_stream: Optional[OutputStream] = None,
+        parent_application=None,
+        *,
+        stopping_criteria=None,
+        generate_continuation_file: OpenFileLike = None,
+        continuation_file: TextIO = None,
+        strict_mode: bool = False,
+        validate_only: bool = False,
+        instrumentation: "Instrumentation" = None,
+        progress_listeners: T.Sequence[T.Callable] = (),
+    ) -> Union[ExecutionSummary, "ValidationResult"]:
+        """Generate data from the prepared recipe into output_stream"""
+        from .api import SnowfakeryApplication
+
+        parse_result = self.parse_result
+        user_options = user_options or {}
+
+        # Where are we going to put the rows?
+        output_stream = output_stream or SimpleFileOutputStream()
+
+        # figure out how it relates to CLI-supplied generation variables
+        options, extra_options = merge_options(
+            parse_result.options, user_options, self.plugin_options
+        )
+
+        if extra_options:
+            warnings.warn(f"Warning: unknown options: {extra_options}")
+
+        # Initialize parent_application early for validation messages
+        parent_application = parent_application or SnowfakeryApplication(
+            stopping_criteria
+        )
+
+        continuation_data = (
+            load_continuation_yaml(continuation_file) if continuation_file else None
+        )
+        globls = initialize_globals(continuation_data, parse_result.templates)
+        validation_result = None  # Initialize to satisfy linter
+
+        try:
+            with Interpreter(
+                output_stream=output_stream,
+                options=options,
+                snowfakery_plugins=self.snowfakery_plugins,
+                parent_application=parent_application,
+                faker_providers=self.faker_providers,
+                parse_result=parse_result,
+                globals=globls,
+                continuing=bool(continuation_data),
+                progress_listeners=progress_listeners,
+            ) as interpreter:
+
+                # Validation phase (if requested)
+                if strict_mode or validate_only:
+                    from .recipe_validator import validate_recipe
+
+                    # Show validation start message
+                    parent_application.echo("Validating recipe...")
+
+                    validation_result = validate_recipe(
+                        parse_result, interpreter, options
+                    )
+
+                    # Stop execution if errors found
+                    if validation_result.has_errors():
+                        raise DataGenValidationError(validation_result)
+
+                    # Display warnings with color (only if no errors)
+                    if validation_result.has_warnings():
+                        parent_application.echo("\nWarnings:")
+                        for i, warning in enumerate(validation_result.warnings, 1):
+                            warning_msg = click.style(f"  {i}. {warning}", fg="yellow")
+                            parent_application.echo(warning_msg)
+
+                        # Success message with warnings
+                        success_msg = click.style(
+                            "✓ Validation passed with warnings", fg="green"
+                        )
+                        parent_application.echo(f"\n{success_msg}")
+                    else:
+                        # Success message without warnings
+                        success_msg = click.style("✓ Validation passed", fg="green")
+                        parent_application.echo(f"\n{success_msg}")
+
+                # Early exit for validate-only mode (return ValidationResult directly)
+                if validate_only:
+                    assert (
+                        validation_result is not None
+                    )  # Should be set in validation block above
+                    return validation_result
+
+                # Create/validate tables before execution (for both strict_mode and normal mode)
+                output_stream.create_or_validate_tables(parse_result.tables)
+
+                # Execute generation
+                if instrumentation:
+                    with instrumentation.installed(output_stream):
+                        runtime_context = interpreter.execute()
+                else:
+                    runtime_context = interpreter.execute()
+
+                if options.get(plugin_option_memory_report):
+                    report = memory_report(interpreter.memory_usage())
+                    parent_application.echo(report, err=True)
+
+        except DataGenError as e:
+            if e.filename:
+                raise
+            else:
+                e.filename = self.filename
+                raise
+
+        if generate_continuation_file:
+            save_continuation_yaml(runtime_context, generate_continuation_file)
+
+        return ExecutionSummary(parse_result, runtime_context)
+
+
+def prepare_recipe(
+    open_yaml_file: IO[str],
+    *,
+    plugin_options: dict = None,
+    update_input_file: OpenFileLike = None,
+    update_passthrough_fields: T.Sequence[str] = (),
+    recipe_cache_dir: FileLike = None,
+) -> PreparedRecipe:
+    """Parse a recipe and resolve its plugins, ready to generate data."""
+    return PreparedRecipe.from_file(
+        open_yaml_file,
+        plugin_options=plugin_options,
+        update_input_file=update_input_file,
+        update_passthrough_fields=update_passthrough_fields,
+        recipe_cache_dir=recipe_cache_dir,
+    )
+
+
 def generate(
     open_yaml_file: IO[str],
     user_options: Optional[dict] = None,
@@ -136,112 +335,31 @@ def generate(
     update_passthrough_fields: T.Sequence[str] = (),
     strict_mode: bool = False,
     validate_only: bool = False,
-) -> Union[ExecutionSummary, ValidationResult]:
+    recipe_cache_dir: FileLike = None,
+    instrumentation: "Instrumentation" = None,
+    progress_listeners: T.Sequence[T.Callable] = (),
+) -> Union[ExecutionSummary, "ValidationResult"]:
     """The main entry point to the package for Python applications."""
-    from .api import SnowfakeryApplication
-
-    user_options = user_options or {}
-
-    # Where are we going to put the rows?
-    output_stream = output_stream or SimpleFileOutputStream()
-
-    # parse the YAML and any it refers to
-    parse_result = parse_recipe(
-        open_yaml_file, update_input_file, update_passthrough_fields
+    prepared = prepare_recipe(
+        open_yaml_file,
+        plugin_options=plugin_options,
+        update_input_file=update_input_file,
+        update_passthrough_fields=update_passthrough_fields,
+        recipe_cache_dir=recipe_cache_dir,
     )
-
-    faker_providers, snowfakery_plugins = process_plugins(parse_result.plugins)
-
-    snowfakery_plugins.setdefault("UniqueId", UniqueId)
-    snowfakery_plugins.setdefault("SnowfakeryVersion", SnowfakeryVersion)
-    plugin_options = plugin_options or {}
-    if parse_result.version:
-        plugin_options["snowfakery_version"] = parse_result.version
-
-    plugin_options = process_plugins_options(snowfakery_plugins, plugin_options)
-
-    # figure out how it relates to CLI-supplied generation variables
-    options, extra_options = merge_options(
-        parse_result.options, user_options, plugin_options
+    return prepared.generate(
+        user_options,
+        output_stream,
+        parent_application,
+        stopping_criteria=stopping_criteria,
+        generate_continuation_file=generate_continuation_file,
+        continuation_file=continuation_file,
+        strict_mode=strict_mode,
+        validate_only=validate_only,
+        instrumentation=instrumentation,
+        progress_listeners=progress_listeners,
     )
 
-    if extra_options:
-        warnings.warn(f"Warning: unknown options: {extra_options}")
-
-    # Initialize parent_application early for validation messages
-    parent_application = parent_application or SnowfakeryApplication(stopping_criteria)
-
-    continuation_data = (
-        load_continuation_yaml(continuation_file) if continuation_file else None
-    )
-    globls = initialize_globals(continuation_data, parse_result.templates)
-    validation_result = None  # Initialize to satisfy linter
-
-    try:
-        with Interpreter(
-            output_stream=output_stream,
-            options=options,
-            snowfakery_plugins=snowfakery_plugins,
-            parent_application=parent_application,
-            faker_providers=faker_providers,
-            parse_result=parse_result,
-            globals=globls,
-            continuing=bool(continuation_data),
-        ) as interpreter:
-
-            # Validation phase (if requested)
-            if strict_mode or validate_only:
-                # Show validation start message
-                parent_application.echo("Validating recipe...")
-
-                validation_result = validate_recipe(parse_result, interpreter, options)
-
-                # Stop execution if errors found
-                if validation_result.has_errors():
-                    raise DataGenValidationError(validation_result)
-
-                # Display warnings with color (only if no errors)
-                if validation_result.has_warnings():
-                    parent_application.echo("\nWarnings:")
-                    for i, warning in enumerate(validation_result.warnings, 1):
-                        warning_msg = click.style(f"  {i}. {warning}", fg="yellow")
-                        parent_application.echo(warning_msg)
-
-                    # Success message with warnings
-                    success_msg = click.style(
-                        "✓ Validation passed with warnings", fg="green"
-                    )
-                    parent_application.echo(f"\n{success_msg}")
-                else:
-                    # Success message without warnings
-                    success_msg = click.style("✓ Validation passed", fg="green")
-                    parent_application.echo(f"\n{success_msg}")
-
-            # Early exit for validate-only mode (return ValidationResult directly)
-            if validate_only:
-                assert (
-                    validation_result is not None
-                )  # Should be set in validation block above
-                return validation_result
-
-            # Create/validate tables before execution (for both strict_mode and normal mode)
-            output_stream.create_or_validate_tables(parse_result.tables)
-
-            # Execute generation
-            runtime_context = interpreter.execute()
-
-    except DataGenError as e:
-        if e.filename:
-            raise
-        else:
-            e.filename = getattr(open_yaml_file, "name", None)
-            raise
-
-    if generate_continuation_file:
-        save_continuation_yaml(runtime_context, generate_continuation_file)
-
-    return ExecutionSummary(parse_result, runtime_context)
-
 
 def process_plugins_options(
     plugins: Mapping[str, SnowfakeryPlugin], raw_plugin_options: Mapping[str, object]
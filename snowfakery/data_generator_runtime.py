@@ -1,31 +1,47 @@
 """Runtime objects and algorithms used during the generation of rows."""
 import os
-from collections import defaultdict, ChainMap
+from collections import defaultdict, deque, ChainMap
 from datetime import date, datetime, timezone
 from contextlib import contextmanager
+from functools import lru_cache, partial
+from types import MappingProxyType
 
 from typing import Optional, Dict, Sequence, Mapping, NamedTuple, Set
 import typing as T
 from warnings import warn
 
 import jinja2
-from jinja2 import nativetypes
+from jinja2 import meta, nativetypes
 import yaml
 
 from .utils.template_utils import FakerTemplateLibrary
 from .utils.yaml_utils import SnowfakeryDumper, hydrate
 from .row_history import RowHistory
+from .metrics import ProgressEvent, ProgressTracker, current_rss
 from .template_funcs import StandardFuncs
-from .data_gen_exceptions import DataGenSyntaxError, DataGenNameError
+from .data_gen_exceptions import DataGenError, DataGenSyntaxError, DataGenNameError
 import snowfakery  # noQA
 from snowfakery.object_rows import (
+    LazyLoadedObjectReference,
     NicknameSlot,
     SlotState,
     ObjectRow,
     ObjectReference,
     RowHistoryCV,
 )
-from snowfakery.plugins import PluginContext, SnowfakeryPlugin, ScalarTypes
+from snowfakery.plugins import (
+    BATCH_SIZE,
+    PluginContext,
+    SnowfakeryPlugin,
+    ScalarTypes,
+)
+from snowfakery.standard_plugins.Tuning import (
+    plugin_option_faker_pool_size,
+    plugin_option_columnar,
+    plugin_option_freeze_now,
+    plugin_option_iterations_per_check,
+    plugin_option_memory_bounded,
+)
 from snowfakery.utils.collections import OrderedSet
 
 OutputStream = "snowfakery.output_streams.OutputStream"
@@ -38,6 +54,15 @@ ParseResult = "snowfakery.parse_recipe_yaml.ParseResult"
 # save every single object to history. Useful for testing saving of datatypes
 SAVE_EVERYTHING = os.environ.get("SF_SAVE_EVERYTHING")
 
+# context vars of a scope where nothing has set them
+EMPTY_MAPPING: Mapping = MappingProxyType({})
+
+# variable values which formulas can only read from, not call or change
+INERT_TYPES = (*ScalarTypes, ObjectRow)
+
+# a variable which is not defined in a scope
+MISSING = object()
+
 
 class StoppingCriteria(NamedTuple):
     """When have we iterated over the Snowfakery script enough times?"""
@@ -83,15 +108,43 @@ yaml.SafeDumper.add_representer(
 
 
 class Transients:
+    """Objects and forward references which last for one iteration"""
+
     def __init__(self, nicknames_and_tables: Mapping[str, str], id_manager: IdManager):
-        self.nicknamed_objects = {}
-        self.last_seen_obj_by_table = {}
+        self.nicknames_and_tables = nicknames_and_tables
+        self.id_manager = id_manager
+        # names of the slots which have allocated an id this iteration
+        self.used_slot_names = []
         self.named_slots = {
-            name: NicknameSlot(table, id_manager)
-            for name, table in nicknames_and_tables.items()
+            name: self._make_slot(name) for name in nicknames_and_tables
         }
+        self.reset()
 
-        self.orig_used_ids = id_manager.last_used_ids.copy()
+    def _make_slot(self, name: str) -> NicknameSlot:
+        return NicknameSlot(
+            self.nicknames_and_tables[name],
+            self.id_manager,
+            partial(self.used_slot_names.append, name),
+        )
+
+    def reset(self):
+        """Start a new iteration.
+
+        Slots which were never referred to are reused. Used ones are
+        replaced, because rows may still refer to them."""
+        self.nicknamed_objects = {}
+        self.last_seen_obj_by_table = {}
+        for name in self.used_slot_names:
+            self.named_slots[name] = self._make_slot(name)
+        self.used_slot_names.clear()
+
+    def unfilled_slot_names(self) -> T.List[str]:
+        """Names referred to this iteration which no object has filled"""
+        return [
+            name
+            for name in self.used_slot_names
+            if self.named_slots[name].status == SlotState.ALLOCATED
+        ]
 
 
 class Globals:
@@ -141,18 +194,44 @@ class Globals:
             self.persistent_objects_by_table[obj._tablename] = obj
         self.transients.last_seen_obj_by_table[obj._tablename] = obj
 
+    def snapshot_persistent_object(
+        self, obj: ObjectRow, nickname: Optional[str], history_tables: Set[str]
+    ):
+        """Replace a finished just_once object with a snapshot of it.
+
+        The snapshot refers to other rows by id so that long-lived objects
+        do not keep the rows they refer to (and the rows that those refer
+        to...) alive."""
+        values = {}
+        for name, value in obj._values.items():
+            if isinstance(value, ObjectRow):
+                value = reference_by_id(value, history_tables)
+            values[name] = value
+        snapshot = ObjectRow(obj._tablename, values, obj._child_index)
+        if nickname and self.persistent_nicknames.get(nickname) is obj:
+            self.persistent_nicknames[nickname] = snapshot
+        if self.persistent_objects_by_table.get(obj._tablename) is obj:
+            self.persistent_objects_by_table[obj._tablename] = snapshot
+
     @property
     def object_names(self):
         """The globally named objects"""
-        # the order is important: later overrides earlier
+        names = {}
+        for layer in reversed(self.object_name_layers()):
+            names.update(layer)
+        return names
+
+    def object_name_layers(self) -> T.Tuple[Mapping[str, ObjectRow], ...]:
+        """The mappings of names to objects, highest priority first"""
+        # the order is important: earlier overrides later
         # i.e. fulfilled names override "slots"
-        return {
-            **self.transients.named_slots,  # potential forward or backwards references
-            **self.persistent_nicknames,  # long-lived nicknames
-            **self.persistent_objects_by_table,  # long-lived objects
-            **self.transients.nicknamed_objects,  # local nicknames that have been fulfilled
-            **self.transients.last_seen_obj_by_table,  # local tablenames that have been fulfilled
-        }
+        return (
+            self.transients.last_seen_obj_by_table,  # local tablenames that have been fulfilled
+            self.transients.nicknamed_objects,  # local nicknames that have been fulfilled
+            self.persistent_objects_by_table,  # long-lived objects
+            self.persistent_nicknames,  # long-lived nicknames
+            self.transients.named_slots,  # potential forward or backwards references
+        )
 
     def generate_id_for_nickname(self, nickname: str):
         slot = self.transients.named_slots.get(nickname)
@@ -168,14 +247,18 @@ class Globals:
 
     def reset_slots(self):
         "At the beginning of every iteration, reset the forward reference slots"
-        self.transients = Transients(self.nicknames_and_tables, self.id_manager)
+        transients = getattr(self, "transients", None)
+        if (
+            transients
+            and transients.id_manager is self.id_manager
+            and transients.nicknames_and_tables is self.nicknames_and_tables
+        ):
+            transients.reset()
+        else:
+            self.transients = Transients(self.nicknames_and_tables, self.id_manager)
 
     def check_slots_filled(self):
-        not_filled = [
-            name
-            for name, slot in self.transients.named_slots.items()
-            if slot.status == SlotState.ALLOCATED
-        ]
+        not_filled = self.transients.unfilled_slot_names()
         if not_filled:
             plural = "s" if len(not_filled) > 1 else ""
             raise DataGenNameError(
@@ -231,36 +314,70 @@ class Globals:
         self.reset_slots()
 
 
+def reference_by_id(row: ObjectRow, history_tables: Set[str]) -> ObjectReference:
+    """A reference to row which loads its fields from the row history if it can"""
+    if row._tablename in history_tables:
+        return LazyLoadedObjectReference(row._tablename, row.id, row._tablename)
+    return ObjectReference(row._tablename, row.id)
+
+
+def count_reachable_rows(objs: T.Iterable[ObjectRow]) -> int:
+    """Count the distinct rows that objs refer to, directly or indirectly"""
+    seen = set()
+    todo = list(objs)
+    while todo:
+        obj = todo.pop()
+        if id(obj) not in seen:
+            seen.add(id(obj))
+            todo.extend(v for v in obj._values.values() if isinstance(v, ObjectRow))
+    return len(seen)
+
+
+# Shared by every JinjaTemplateEvaluatorFactory, so that compiled formulas
+# can be shared too.
+NATIVE_COMPILERS = (
+    nativetypes.NativeEnvironment(
+        block_start_string="${%",
+        block_end_string="%}",
+        variable_start_string="${{",
+        variable_end_string="}}",
+    ),
+)
+
+# TODO: Delete these old compilers when the
+#       transition to native_types is complete.
+COMPILERS = (
+    jinja2.Environment(
+        block_start_string="${%",
+        block_end_string="%}",
+        variable_start_string="${{",
+        variable_end_string="}}",
+    ),
+    jinja2.Environment(
+        block_start_string="<%",
+        block_end_string="%>",
+        variable_start_string="<<",
+        variable_end_string=">>",
+    ),
+)
+
+
+@lru_cache(maxsize=4096)
+def compile_formula(
+    compiler: jinja2.Environment, definition: str
+) -> T.Tuple[jinja2.Template, T.FrozenSet[str]]:
+    """The compiled template for a formula and the names it uses.
+
+    Cached for the whole process: the same formula is often used by many
+    templates, included files and runs."""
+    template = compiler.from_string(definition)
+    names = frozenset(meta.find_undeclared_variables(compiler.parse(definition)))
+    return template, names
+
+
 class JinjaTemplateEvaluatorFactory:
     def __init__(self, native_types: bool):
-        if native_types:
-            self.compilers = [
-                nativetypes.NativeEnvironment(
-                    block_start_string="${%",
-                    block_end_string="%}",
-                    variable_start_string="${{",
-                    variable_end_string="}}",
-                )
-            ]
-
-            return
-
-        # TODO: Delete this old code_path when the
-        #       transition to native_types is complete.
-        self.compilers = [
-            jinja2.Environment(
-                block_start_string="${%",
-                block_end_string="%}",
-                variable_start_string="${{",
-                variable_end_string="}}",
-            ),
-            jinja2.Environment(
-                block_start_string="<%",
-                block_end_string="%>",
-                variable_start_string="<<",
-                variable_end_string=">>",
-            ),
-        ]
+        self.compilers = NATIVE_COMPILERS if native_types else COMPILERS
 
     def compiler_for_string(self, definition: str):
         for compiler in self.compilers:
@@ -275,8 +392,8 @@ class JinjaTemplateEvaluatorFactory:
 
         if compiler:
             try:
-                template = compiler.from_string(definition)
-                return lambda context: template.render(context.field_vars())
+                template, names = compile_formula(compiler, definition)
+                return lambda context: template.render(context.field_vars_for(names))
             except jinja2.exceptions.TemplateSyntaxError as e:
                 raise DataGenSyntaxError(str(e)) from e
         else:
@@ -300,6 +417,7 @@ class Interpreter:
         snowfakery_plugins: Optional[Mapping[str, callable]] = None,
         faker_providers: Sequence[object] = (),
         continuing=False,
+        progress_listeners: Sequence[T.Callable[[ProgressEvent], None]] = (),
     ):
         self.output_stream = output_stream
         self.options = options or {}
@@ -335,6 +453,20 @@ class Interpreter:
 
         self.statements = parse_result.statements
         self.parent_application = parent_application
+        self.memory_bounded = self.options.get(plugin_option_memory_bounded, False)
+        self.freeze_now = self.options.get(plugin_option_freeze_now, False)
+        # Without a target number of rows, every iteration is counted.
+        self.iterations_per_check = (
+            max(self.options.get(plugin_option_iterations_per_check, 1), 1)
+            if parent_application.stopping_tablename
+            else 1
+        )
+        self._now = None
+        self.progress = ProgressTracker(
+            [parent_application.progress, *progress_listeners],
+            parent_application.progress_interval,
+            globals.id_manager,
+        )
         self.instance_states = {}
         self.filter_row_values = self.filter_row_values_normal
         snowfakery_version = self.options.get(
@@ -348,8 +480,55 @@ class Interpreter:
         self.tables_to_keep_history_for = find_tables_to_keep_history_for(
             parse_result, globals.nicknames_and_tables
         )
+        from .recipe_analysis import RecipeAnalysis
+
+        self.recipe_analysis = RecipeAnalysis(
+            parse_result.statements, self.template_evaluator_factory
+        )
+        self.compact_tables = self.recipe_analysis.tables_with_unread_fields()
+        # other plugins might look nicknames up by names we cannot see,
+        # e.g. context.lookup("nick" + str(n))
+        custom_plugins = any(
+            not type(plugin).__module__.startswith("snowfakery.standard_plugins.")
+            for plugin in self.plugin_instances.values()
+        )
+        self.unreferenced_nicknames = {
+            nickname
+            for nickname, tablename in globals.nicknames_and_tables.items()
+            if nickname != tablename
+            and not custom_plugins
+            and not self.recipe_analysis.might_refer_to(nickname)
+        }
+        self.namespace_layer_cache = {}
+        # a slot for each call site's memorable function state
+        for slot_number, call_site in enumerate(self.recipe_analysis.call_sites):
+            call_site.state_slot = slot_number
+        self.state_slots = [None] * len(self.recipe_analysis.call_sites)
+        # for each call site whose formula depends only on variables and
+        # constants, e.g. ${{date(today) - relativedelta(years=1)}}, the
+        # variables it reads, and its (variable values, value) in pure_values
+        constant_names = (set(self.options) | {"today"}) - set(
+            self.plugin_function_libraries
+        )
+        self.pure_formula_variables = [
+            self.recipe_analysis.pure_formula_variables(formula, constant_names)
+            if isinstance(formula, str)
+            else None
+            for formula in (
+                getattr(call_site, "definition", None)  # not StructuredValues
+                for call_site in self.recipe_analysis.call_sites
+            )
+        ]
+        self.pure_values = [None] * len(self.recipe_analysis.call_sites)
+        self.constant_call_sites = {}
+        self.batched_values = {}
+        self.columnar_engine = None
+        if self.options.get(plugin_option_columnar, False):
+            from .columnar import ColumnarEngine
+
+            self.columnar_engine = ColumnarEngine(self)
         self.row_history = RowHistory(
-            globals.transients.orig_used_ids,
+            globals.id_manager.last_used_ids,
             self.tables_to_keep_history_for,
             self.globals.nicknames_and_tables,
         )
@@ -387,6 +566,26 @@ class Interpreter:
         self.loop_over_templates_until_finished(self.continuing)
         return self.globals
 
+    def memory_usage(self) -> T.Dict[str, T.Any]:
+        """What is this run holding on to? Used by the memory report."""
+        persistent = {
+            id(obj): obj
+            for obj in (
+                *self.globals.persistent_nicknames.values(),
+                *self.globals.persistent_objects_by_table.values(),
+            )
+        }
+        return {
+            "rss": current_rss(),
+            "persistent_objects": len(persistent),
+            "rows_reachable_from_persistent_objects": count_reachable_rows(
+                persistent.values()
+            ),
+            "history_rows": self.row_history.table_sizes(),
+            "history_bytes": self.row_history.database_size(),
+            "template_states": len(self.instance_states),
+        }
+
     def faker_template_library(self, locale):
         """Create a faker template library for locale, or retrieve it from a cache"""
         rc = self.faker_template_libraries.get(locale)
@@ -395,6 +594,7 @@ class Interpreter:
                 self.faker_providers,
                 locale,
                 self.faker_plugin_context,
+                pool_size=self.options.get(plugin_option_faker_pool_size, 0),
             )
             self.faker_template_libraries[locale] = rc
         return rc
@@ -404,11 +604,77 @@ class Interpreter:
         self.current_context = RuntimeContext(interpreter=self)
         while not finished:
             self.loop_over_templates_once(self.statements, continuing)
-            finished = self.current_context.check_if_finished()
             self.iteration_count += 1
+            if self.iteration_count % self.iterations_per_check:
+                # forward references must still be filled in every iteration
+                self.globals.check_slots_filled()
+            else:
+                finished = self.current_context.check_if_finished()
+            self.progress.iteration_finished(self.iteration_count, finished)
             continuing = True
             self.globals.reset_slots()
             self.row_history.reset_locals()
+            self._now = None
+
+    def namespace_layers(self, names: T.FrozenSet[str]) -> "NamespaceLayers":
+        """Which layers of the namespace could supply any of these names?"""
+        layers = self.namespace_layer_cache.get(names)
+        if layers is None:
+            analysis = self.recipe_analysis
+            layers = self.namespace_layer_cache[names] = NamespaceLayers(
+                variables=not names.isdisjoint(analysis.variable_names),
+                plugins=not names.isdisjoint(self.plugin_function_libraries),
+                objects=not names.isdisjoint(analysis.object_names),
+            )
+        return layers
+
+    def next_batched_value(
+        self,
+        call_site: str,
+        batch_func: T.Callable,
+        args: Sequence,
+        kwargs: Mapping,
+        context: "RuntimeContext",
+    ):
+        """The next value from a plugin function's batch variant,
+        calling it for more values when this call site has none left"""
+        values = self.batched_values.get(call_site)
+        if not values:
+            values = self.batched_values[call_site] = deque(
+                evaluate_function(
+                    partial(batch_func, BATCH_SIZE), args, kwargs, context
+                )
+            )
+            if not values:
+                raise DataGenError(f"{batch_func.__name__} returned no values")
+        return values.popleft()
+
+    def pure_value(
+        self, formula, pure_variables: T.FrozenSet[str], context: "RuntimeContext"
+    ):
+        """The value of a formula which depends only on `pure_variables` and
+        constants, rendered again only when one of the variables changes"""
+        variables = context.variable_definitions_view()
+        values = tuple(variables.get(name, MISSING) for name in pure_variables)
+        cached = self.pure_values[formula.state_slot]
+        if cached and all(old is new for old, new in zip(cached[0], values)):
+            return cached[1]
+        value = formula.render_uncached(context)
+        # e.g. not a dataset row or a Faker, which could change between
+        # reads, or MISSING, which falls back to other namespaces
+        if all(isinstance(value, INERT_TYPES) for value in values):
+            self.pure_values[formula.state_slot] = (values, value)
+        return value
+
+    def now(self) -> datetime:
+        """The current time.
+
+        With the freeze_now option, the time when this iteration first asked."""
+        if not self.freeze_now:
+            return datetime.now(timezone.utc)
+        if self._now is None:
+            self._now = datetime.now(timezone.utc)
+        return self._now
 
     def loop_over_templates_once(self, statement_list, continuing: bool):
         for statement in statement_list:
@@ -431,6 +697,9 @@ class Interpreter:
         self.plugin_instances = None
         self.plugin_function_libraries = None
         self.instance_states = None
+        self.state_slots = None
+        self.pure_values = None
+        self.batched_values = None
 
     def get_contextual_state(
         self,
@@ -461,19 +730,42 @@ class Interpreter:
         not generally be used.
         """
         assert not reset_every_iteration
-        current_context = self.current_context
-        uniq_name = name or current_context.unique_context_identifier
+        uniq_name = name or self.current_context.unique_context_identifier
+        return self.refresh_contextual_state(
+            self.contextual_state_entry(uniq_name),
+            parent=parent,
+            make_state_func=make_state_func,
+        )
+
+    def contextual_state_entry(self, name: T.Union[str, tuple]) -> list:
+        """The [parent, state] entry for this name, which callers may keep"""
+        entry = self.instance_states.get(name)
+        if entry is None:
+            entry = self.instance_states[name] = [None, None]
+        return entry
+
+    def refresh_contextual_state(
+        self,
+        entry: list,
+        *,
+        parent: T.Optional[str],
+        make_state_func: T.Callable,
+    ):
+        """The state in an entry from contextual_state_entry, made anew if
+        there is none yet or its parent has changed"""
         if parent:
-            parent_obj = current_context.field_vars().get(parent)
+            parent_obj = self.current_context.lookup(parent)
+            if isinstance(parent_obj, ObjectRow):
+                # identify the row without keeping it alive
+                parent_obj = (parent_obj._tablename, parent_obj.id)
         # elif reset_every_iteration:           # in case we bring back this feature
         #     parent_obj = self.iteration_count
         else:
             parent_obj = None
-        current_parent, value = self.instance_states.get(uniq_name, (None, None))
-        if current_parent != parent_obj or value is None:
-            value = make_state_func()
-            self.instance_states[uniq_name] = [parent_obj, value]
-        return value
+        if entry[0] != parent_obj or entry[1] is None:
+            # in place, because call sites keep the entry in their slots
+            entry[:] = [parent_obj, make_state_func()]
+        return entry[1]
 
     def filter_row_values_normal(self, row: dict):
         return {k: v for k, v in row.items() if not k.startswith("__")}
@@ -496,6 +788,7 @@ class RuntimeContext:
     current_template = None
     local_vars = None
     unique_context_identifier = None
+    state_slot = None  # of the call site being evaluated
     recalculate_every_time = False  # by default, data is recalculated constantly
 
     def __init__(
@@ -516,7 +809,7 @@ class RuntimeContext:
             self.recalculate_every_time = parent_context.recalculate_every_time
         else:
             self._plugin_context_vars = ChainMap()
-        locale = self.variable_definitions().get("snowfakery_locale")
+        locale = self.variable_definitions_view().get("snowfakery_locale")
         self.faker_template_library = self.interpreter.faker_template_library(locale)
         self.local_vars = {}
 
@@ -555,12 +848,14 @@ class RuntimeContext:
         return rc
 
     def remember_row(self, tablename: str, nickname: T.Optional[str], row: dict):
-        for fieldname, fieldvalue in row.items():
-            if isinstance(fieldvalue, (ObjectRow, ObjectReference)):
-                self.interpreter.globals.register_intertable_reference(
-                    tablename, fieldvalue._tablename, fieldname
-                )
-        history_tables = self.interpreter.tables_to_keep_history_for
+        interpreter = self.interpreter
+        if tablename not in interpreter.recipe_analysis.tables_without_references:
+            for fieldname, fieldvalue in row.items():
+                if isinstance(fieldvalue, (ObjectRow, ObjectReference)):
+                    interpreter.globals.register_intertable_reference(
+                        tablename, fieldvalue._tablename, fieldname
+                    )
+        history_tables = interpreter.tables_to_keep_history_for
         should_save: bool = (
             (tablename in history_tables)
             or (nickname in history_tables)
@@ -572,8 +867,18 @@ class RuntimeContext:
     def register_object(self, obj, name: Optional[str], persistent: bool):
         "Keep track of this object in case other objects refer to it."
         self.obj = obj
+        if name in self.interpreter.unreferenced_nicknames:
+            name = None  # nothing will look it up
         self.interpreter.globals.register_object(obj, name, persistent)
 
+    def persistent_object_finished(self, obj: ObjectRow, name: Optional[str]):
+        "In memory-bounded mode, keep only a snapshot of a just_once object"
+        interpreter = self.interpreter
+        if interpreter.memory_bounded:
+            interpreter.globals.snapshot_persistent_object(
+                obj, name, interpreter.tables_to_keep_history_for
+            )
+
     @contextmanager
     def child_context(self, template):
         "Create a nested RuntimeContext (analogous to a 'stack frame')."
@@ -607,17 +912,43 @@ class RuntimeContext:
     def field_vars(self):
         return self.evaluation_namespace.field_vars()
 
+    def field_vars_for(self, names: T.FrozenSet[str]):
+        return self.evaluation_namespace.field_vars_for(names)
+
+    def lookup(self, name: str, default=None):
+        return self.evaluation_namespace.lookup(name, default)
+
     def context_vars(self, plugin_namespace):
-        """Variables which are inherited by child scopes"""
-        # This looks like a candidate for optimization.
-        # An unconditional object copy seems expensive.
-        local_plugin_vars = self._plugin_context_vars.get(plugin_namespace, {}).copy()
-        self._plugin_context_vars[plugin_namespace] = local_plugin_vars
+        """Variables which are inherited by child scopes
+
+        Copied from the parent scope the first time they are asked for
+        in this one, so that changes are not seen by the parent."""
+        local_plugin_vars = self._plugin_context_vars.maps[0].get(plugin_namespace)
+        if local_plugin_vars is None:
+            local_plugin_vars = self._plugin_context_vars.get(
+                plugin_namespace, {}
+            ).copy()
+            self._plugin_context_vars[plugin_namespace] = local_plugin_vars
         return local_plugin_vars
 
+    def context_vars_view(self, plugin_namespace) -> Mapping:
+        """context_vars() for reading, without copying them into this scope"""
+        return self._plugin_context_vars.get(plugin_namespace, EMPTY_MAPPING)
+
     def variable_definitions(self):
         return self.context_vars("variable definitions")
 
+    def variable_definitions_view(self) -> Mapping:
+        return self.context_vars_view("variable definitions")
+
+
+class NamespaceLayers(NamedTuple):
+    """Which optional layers of the namespace a formula needs"""
+
+    variables: bool
+    plugins: bool
+    objects: bool
+
 
 # NamedTuple because it is immutable, efficient and auto-generates init
 class EvaluationNamespace(NamedTuple):
@@ -631,19 +962,15 @@ class EvaluationNamespace(NamedTuple):
         obj = self.runtime_context.obj
         interpreter = self.runtime_context.interpreter
         return {
-            "id": obj.id if obj else None,
-            "count": obj.id if obj else None,
-            "child_index": obj._child_index if obj else None,
-            "this": obj,
-            "today": interpreter.globals.today,
-            "now": datetime.now(timezone.utc),
-            "fake": self.runtime_context.faker_template_library,
-            "template": self.runtime_context.current_template,
+            **{
+                name: implicit_variable(self.runtime_context)
+                for name, implicit_variable in IMPLICIT_VARIABLES.items()
+            },
             **interpreter.options,
             **interpreter.globals.object_names,
             **(obj._values if obj else {}),
             **interpreter.plugin_function_libraries,
-            **self.runtime_context.variable_definitions(),
+            **self.runtime_context.variable_definitions_view(),
         }
 
     def field_funcs(self):
@@ -665,6 +992,55 @@ class EvaluationNamespace(NamedTuple):
     def field_vars(self):
         return {**self.simple_field_vars(), **self.field_funcs()}
 
+    def field_vars_for(self, names: T.FrozenSet[str]) -> dict:
+        """The subset of field_vars() with these names.
+
+        Much cheaper than field_vars() because only the implicit variables
+        which are named (e.g. `now`) are computed."""
+        runtime_context = self.runtime_context
+        interpreter = runtime_context.interpreter
+        obj = runtime_context.obj
+        needed = interpreter.namespace_layers(names)
+        # highest priority first, as in field_vars()
+        layers = [interpreter.standard_funcs]
+        if needed.variables:
+            layers.append(runtime_context.variable_definitions_view())
+        if needed.plugins:
+            layers.append(interpreter.plugin_function_libraries)
+        if obj:
+            layers.append(obj._values)
+        if needed.objects:
+            layers.extend(interpreter.globals.object_name_layers())
+        layers.append(interpreter.options)
+        found = {}
+        for name in names:
+            for layer in layers:
+                if name in layer:
+                    found[name] = layer[name]
+                    break
+            else:
+                implicit_variable = IMPLICIT_VARIABLES.get(name)
+                if implicit_variable:
+                    found[name] = implicit_variable(runtime_context)
+        return found
+
+    def lookup(self, name: str, default=None):
+        """The value of one name in field_vars(), without building it"""
+        return self.field_vars_for(frozenset((name,))).get(name, default)
+
+
+# Variables available to every formula, computed from the RuntimeContext
+IMPLICIT_VARIABLES: T.Dict[str, T.Callable[[RuntimeContext], T.Any]] = {
+    "id": lambda context: context.obj.id if context.obj else None,
+    "count": lambda context: context.obj.id if context.obj else None,
+    "child_index": lambda context: context.obj._child_index if context.obj else None,
+    "this": lambda context: context.obj,
+    "today": lambda context: context.interpreter.globals.today,
+    "now": lambda context: context.interpreter.now(),
+    "fake": lambda context: context.faker_template_library,
+    "template": lambda context: context.current_template,
+}
+
 
 def evaluate_function(func, args: Sequence, kwargs: Mapping, context):
     if not hasattr(func, "lazy"):
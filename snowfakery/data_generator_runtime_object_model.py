@@ -1,6 +1,6 @@
 from abc import abstractmethod, ABC
 from .data_generator_runtime import evaluate_function, RuntimeContext, Interpreter
-from .object_rows import ObjectRow, ObjectReference
+from .object_rows import CompactObjectRow, ObjectRow, ObjectReference
 from contextlib import contextmanager
 from typing import NamedTuple, Union, Dict, Sequence, Optional, cast
 from .utils.template_utils import look_for_number
@@ -14,7 +14,7 @@ from .data_gen_exceptions import (
     DataGenValueError,
     fix_exception,
 )
-from .plugins import Scalar, PluginResult, PluginResultIterator
+from .plugins import Scalar, PluginResult, PluginResultIterator, batch_variant
 
 # objects that represent the hierarchy of a data generator.
 # roughly similar to the YAML structure but with domain-specific objects
@@ -32,6 +32,9 @@ class FieldDefinition(ABC):
          fieldname: X
     """
 
+    # index of this call site's slot in Interpreter.state_slots
+    state_slot: Optional[int] = None
+
     @abstractmethod
     def render(self, context: RuntimeContext) -> FieldValue:
         pass
@@ -95,9 +98,16 @@ class ForEachVariableDefinition:
         self.line_num = line_num
 
     def evaluate(self, context: RuntimeContext) -> FieldValue:
-        """Disable value caching for this context and evaluate the expression"""
+        """Evaluate the expression with value caching disabled
+
+        Only the expression itself is recalculated: memorable functions
+        in the fields and children of the template keep their state."""
+        recalculate_every_time = context.recalculate_every_time
         context.recalculate_every_time = True
-        ret = self.expression.render(context)
+        try:
+            ret = self.expression.render(context)
+        finally:
+            context.recalculate_every_time = recalculate_every_time
         if not isinstance(ret, PluginResultIterator):
             raise DataGenValueError(
                 f"`for_each` value must be a DatasetIterator for `{self.varname}`",
@@ -148,6 +158,7 @@ class ObjectTemplate:
         self.friends = friends
         self.for_each_expr = for_each_expr
         self.update_key = update_key
+        self._field_index = None  # shared by this template's CompactObjectRows
 
         if count_expr and for_each_expr:
             raise DataGenSyntaxError(
@@ -174,11 +185,15 @@ class ObjectTemplate:
                 iterators = [self._evaluate_for_each(context)]
                 iterators.append(LoopIterator("child_index", itertools.count()))
             else:  # use a count, or a default count of 1
-                iterators = [
-                    LoopIterator(
-                        "child_index", iter(range(self._evaluate_count(context)))
-                    )
-                ]
+                count = self._evaluate_count(context)
+                engine = context.interpreter.columnar_engine
+                columns = engine.columns_for(self) if engine else None
+                if columns:
+                    with self.exception_handling(f"Cannot generate {self.name}"):
+                        return self._generate_blocks(
+                            output_stream, context, count, columns
+                        )
+                iterators = [LoopIterator("child_index", iter(range(count)))]
             with self.exception_handling(f"Cannot generate {self.name}"):
                 master_iterator = zip(*(it.iterator for it in iterators))
                 iterator_names = [it.name for it in iterators]
@@ -269,9 +284,62 @@ class ObjectTemplate:
             if not self.tablename.startswith("__"):
                 output_stream.write_row(self.tablename, context.filter_row_values(row))
 
+        if self.tablename in context.interpreter.compact_tables:
+            sobj = self._compact(sobj, context)
+
+        if self.just_once:
+            context.persistent_object_finished(sobj, self.nickname)
+
         context.interpreter.loop_over_templates_once(self.friends, True)
         return sobj
 
+    def _generate_blocks(
+        self, output_stream, context: RuntimeContext, count: int, columns: Sequence
+    ) -> Optional[ObjectRow]:
+        """Generate rows a block at a time with the columnar engine"""
+        from .columnar import BLOCK_SIZE
+
+        engine = context.interpreter.columnar_engine
+        names = ["id"]
+        if self.update_key:
+            names.append("_sf_update_key")
+        names.extend(field.name for field in self.fields)
+        row = None
+        for start in range(0, count, BLOCK_SIZE):
+            child_indexes = range(start, min(start + BLOCK_SIZE, count))
+            ids = [context.generate_id(self.nickname) for _ in child_indexes]
+            values = engine.generate(columns, ids, child_indexes)
+            if self.update_key:
+                values.insert(0, [self.update_key] * len(ids))
+            rows = [dict(zip(names, row)) for row in zip(ids, *values)]
+            for row in rows:
+                context.remember_row(self.tablename, self.nickname, row)
+            with self.exception_handling("Cannot write row"):
+                if not self.tablename.startswith("__"):
+                    output_stream.write_rows(
+                        self.tablename, [context.filter_row_values(r) for r in rows]
+                    )
+
+        if row is None:
+            return None
+        # later templates can refer to the last row, as usual
+        sobj = ObjectRow(self.tablename, row, count - 1)
+        context.register_object(sobj, self.nickname, False)
+        context.interpreter.register_variable("child_index", count - 1)
+        return sobj
+
+    def _compact(self, sobj: ObjectRow, context: RuntimeContext) -> ObjectRow:
+        """Replace a finished row with a CompactObjectRow"""
+        row = sobj._values
+        if self._field_index is None:
+            # every row from this template has the same fields in the same order
+            self._field_index = {name: i for i, name in enumerate(row)}
+        compact = CompactObjectRow(
+            self.tablename, self._field_index, list(row.values()), sobj._child_index
+        )
+        context.register_object(compact, self.nickname, self.just_once)
+        return compact
+
     def _generate_fields(self, context: RuntimeContext, row: Dict) -> None:
         """Generate all of the fields of a row"""
         for field in self.fields:
@@ -337,8 +405,19 @@ class SimpleValue(FieldDefinition):
 
     def render(self, context: RuntimeContext) -> FieldValue:
         """Render the value: rendering a template if necessary."""
+        if self.state_slot is not None:
+            interpreter = context.interpreter
+            pure_variables = interpreter.pure_formula_variables[self.state_slot]
+            if pure_variables is not None:
+                return interpreter.pure_value(self, pure_variables, context)
+        return self.render_uncached(context)
+
+    def render_uncached(self, context: RuntimeContext) -> FieldValue:
+        """Render the value, even if it is known to be unchanged"""
         old_context_identifier = context.unique_context_identifier
+        old_state_slot = context.state_slot
         context.unique_context_identifier = str(id(self))
+        context.state_slot = self.state_slot
         evaluator = self.evaluator(context)
         if evaluator:
             try:
@@ -352,10 +431,15 @@ class SimpleValue(FieldDefinition):
         else:
             val = self.definition
         context.unique_context_identifier = old_context_identifier
+        context.state_slot = old_state_slot
         if isinstance(val, str) and not context.interpreter.native_types:
             val = look_for_number(val)
         return val
 
+    def __getstate__(self):
+        # compiled evaluators are not picklable (e.g. for the recipe cache)
+        return {**self.__dict__, "_evaluator": None}
+
     def __repr__(self):
         return f"<{self.__class__.__name__ , self.definition}>"
 
@@ -391,8 +475,15 @@ class StructuredValue(FieldDefinition):
             self.kwargs = {}
         self.unique_context_identifier = str(id(self))
 
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        # the identifier must be unique within this process, not the one
+        # that pickled us.
+        self.unique_context_identifier = str(id(self))
+
     def render(self, context: RuntimeContext) -> FieldValue:
         context.unique_context_identifier = self.unique_context_identifier
+        context.state_slot = self.state_slot
         if "." in self.function_name:
             objname, method, *rest = self.function_name.split(".")
             if rest:
@@ -401,7 +492,7 @@ class StructuredValue(FieldDefinition):
                     self.filename,
                     self.line_num,
                 )
-            obj = context.field_vars().get(objname)
+            obj = context.lookup(objname)
             if not obj:
                 raise DataGenNameError(
                     f"Cannot find definition for: {objname}",
@@ -421,7 +512,22 @@ class StructuredValue(FieldDefinition):
                     self.filename,
                     self.line_num,
                 )
-            value = evaluate_function(func, self.args, self.kwargs, context)
+            # only plugins declare batch variants; other objects, like
+            # `fake`, make up attributes for any name
+            plugins = context.interpreter.plugin_function_libraries
+            batch_func = (
+                batch_variant(obj, method) if plugins.get(objname) is obj else None
+            )
+            if batch_func and self.constant_arguments(context):
+                value = context.interpreter.next_batched_value(
+                    self.unique_context_identifier,
+                    batch_func,
+                    self.args,
+                    self.kwargs,
+                    context,
+                )
+            else:
+                value = evaluate_function(func, self.args, self.kwargs, context)
         else:
             try:
                 func = context.executable_blocks()[self.function_name]
@@ -439,12 +545,35 @@ class StructuredValue(FieldDefinition):
 
         return value
 
+    def constant_arguments(self, context: RuntimeContext) -> bool:
+        """Do the arguments render to the same values every time?"""
+        call_sites = context.interpreter.constant_call_sites
+        constant = call_sites.get(self.unique_context_identifier)
+        if constant is None:
+            compiler_for_string = (
+                context.interpreter.template_evaluator_factory.compiler_for_string
+            )
+            constant = call_sites[self.unique_context_identifier] = all(
+                is_constant(arg, compiler_for_string)
+                for arg in (*self.args, *self.kwargs.values())
+            )
+        return constant
+
     def __repr__(self):
         return (
             f"<StructuredValue: {self.function_name} (*{self.args}, **{self.kwargs})>"
         )
 
 
+def is_constant(definition, compiler_for_string) -> bool:
+    """Is this a value, or a SimpleValue, without a formula?"""
+    if type(definition) is SimpleValue:  # not subclasses
+        definition = definition.definition
+    elif isinstance(definition, FieldDefinition):
+        return False
+    return not (isinstance(definition, str) and compiler_for_string(definition))
+
+
 class FieldFactory:
     """Represents a single data field (name, value) to be rendered
 
@@ -1,6 +1,7 @@
 import random
 import typing as T
 import datetime
+from threading import Lock
 from difflib import get_close_matches
 from itertools import product
 
@@ -153,10 +154,150 @@ def _normalize_timezone(timezone=None):
         )
 
 
+# Argument-less fakes which are cheap to serve from a pool without visibly
+# harming the realism of a dataset. Names are in canonical form
+# (lower-case, no underscores). Fakes like `email` and `username` are
+# excluded because they incorporate other fields of the same row.
+POOLABLE_FAKES = frozenset(
+    (
+        "firstname",
+        "firstnamefemale",
+        "firstnamemale",
+        "firstnamenonbinary",
+        "lastname",
+        "name",
+        "prefix",
+        "suffix",
+        "city",
+        "country",
+        "state",
+        "postalcode",
+        "postcode",
+        "streetaddress",
+        "streetname",
+        "buildingnumber",
+        "administrativeunit",
+        "company",
+        "companysuffix",
+        "catchphrase",
+        "bs",
+        "job",
+        "word",
+        "colorname",
+        "phonenumber",
+    )
+)
+
+# Every value in a pool is served roughly this many times before
+# the pool is regenerated.
+POOL_REUSE = 10
+
+
+class FakerValuePool:
+    """Serve values for an argument-less fake from a pre-generated pool.
+
+    Values are sampled randomly from the pool. After the pool has served
+    POOL_REUSE times as many values as it holds, it is regenerated in bulk.
+
+    Sampling uses the pool's own random number generator, seeded from
+    `random`, so that seeded runs are repeatable."""
+
+    def __init__(self, func: T.Callable, size: int):
+        self.func = func
+        self.size = size
+        self.draws_per_fill = size * POOL_REUSE
+        self.random = random.Random(random.getrandbits(64))
+        self.values = self._generate()
+        self.remaining = self.draws_per_fill
+
+    def _generate(self) -> list:
+        func = self.func
+        return [func() for _ in range(self.size)]
+
+    def __call__(self):
+        self.remaining -= 1
+        if self.remaining <= 0:
+            self.values = self._generate()
+            self.remaining = self.draws_per_fill
+        return self.random.choice(self.values)
+
+
 # we will use this to exclude Faker's internal book-keeping methods
 # from our faker interface
 faker_class_attrs = set(dir(Faker)).union((dir(Generator)))
 
+# public attributes of FakeNames. Looked up once rather than per FakeData
+FAKE_NAMES_ATTRS = tuple(name for name in dir(FakeNames) if not name.startswith("_"))
+
+
+def no_underscore_name(name):
+    return name.lower().replace("_", "")
+
+
+def obj_to_func_list(obj: object, names: T.Iterable[str]):
+    """Map canonical names to attributes of obj
+
+    The canonical form of names is lower-case, no underscores, but
+    names with underscores are also included in case of ab_c/a_bc clashes"""
+    return {
+        **{name.lower(): getattr(obj, name) for name in names},
+        **{no_underscore_name(name): getattr(obj, name) for name in names},
+    }
+
+
+class PreparedFaker(T.NamedTuple):
+    """A Faker instance and a table of its methods by canonical name"""
+
+    faker: Faker
+    fake_names: T.Mapping[str, T.Callable]
+
+
+# Prepared Fakers are expensive to build, so they are shared by every
+# interpreter in the process, keyed by (locale, providers).
+_prepared_fakers: T.Dict[tuple, PreparedFaker] = {}
+_prepared_fakers_lock = Lock()
+
+
+def prepared_faker(
+    locale: T.Optional[str] = None, faker_providers: T.Sequence[object] = ()
+) -> PreparedFaker:
+    """Create a Faker for locale and providers, or retrieve it from a cache"""
+    key = (locale, tuple(faker_providers))
+    prepared = _prepared_fakers.get(key)
+    if prepared is None:
+        with _prepared_fakers_lock:
+            prepared = _prepared_fakers.get(key)
+            if prepared is None:
+                prepared = _prepared_fakers[key] = _prepare_faker(
+                    locale, faker_providers
+                )
+    return prepared
+
+
+def _prepare_faker(
+    locale: T.Optional[str], faker_providers: T.Sequence[object]
+) -> PreparedFaker:
+    faker = Faker(locale, use_weighting=False)
+    for provider in faker_providers:
+        faker.add_provider(provider)
+
+    # include faker names with no underscores to emulate salesforce
+    faker_attrs = [
+        name
+        for name in dir(faker)
+        if not name.startswith("_") and name not in faker_class_attrs
+    ]
+    return PreparedFaker(faker, obj_to_func_list(faker, faker_attrs))
+
+
+def clear_faker_cache():
+    """Forget all prepared Fakers.
+
+    Providers are bound when a Faker is prepared, so this is necessary
+    after monkey-patching a provider class, e.g. in tests."""
+    with _prepared_fakers_lock:
+        _prepared_fakers.clear()
+
 
 class FakeData:
     """Wrapper for Faker which adds Salesforce names and case insensitivity."""
@@ -166,57 +307,77 @@ class FakeData:
         faker_providers: T.Sequence[object],
         locale: T.Optional[str] = None,
         faker_context: T.Optional[PluginContext] = None,
+        pool_size: int = 0,
     ):
         # access to persistent state
         self.faker_context = faker_context
 
-        faker = Faker(locale, use_weighting=False)
-        for provider in faker_providers:
-            faker.add_provider(provider)
+        # optional pools of pre-generated values
+        self.pool_size = pool_size
 
-        fake_names = FakeNames(faker, faker_context)
+        # fake functions which have already been looked up, by name
+        self.bound_fakes = {}
 
-        def no_underscore_name(name):
-            return name.lower().replace("_", "")
+        prepared = prepared_faker(locale, faker_providers)
+        self.faker = prepared.faker
 
-        def obj_to_func_list(obj: object, canonicalizer: T.Callable, ignore_list: set):
-            return {
-                canonicalizer(name): getattr(obj, name)
-                for name in dir(obj)
-                if not name.startswith("_") and name not in ignore_list
-            }
+        fake_names = FakeNames(prepared.faker, faker_context)
 
-        # canonical form of names is lower-case, no underscores
-        # include faker names with underscores in case of ab_c/a_bc clashes
-        # include faker names with no underscores to emulate salesforce
-        # include snowfakery names defined above
+        # in case of conflict, snowfakery names "win" over Faker names
         self.fake_names = {
-            **obj_to_func_list(faker, str.lower, faker_class_attrs),
-            **obj_to_func_list(faker, no_underscore_name, faker_class_attrs),
-            # in case of conflict, snowfakery names "win" over Faker names
-            **obj_to_func_list(fake_names, str.lower, set()),
-            **obj_to_func_list(fake_names, no_underscore_name, set()),
+            **prepared.fake_names,
+            **obj_to_func_list(fake_names, FAKE_NAMES_ATTRS),
         }
 
     def _get_fake_data(self, origname, *args, **kwargs):
-        local_faker_vars = self.faker_context.local_vars()
+        return self.fake_function(origname)(*args, **kwargs)
+
+    def fake_function(self, origname: str) -> T.Callable:
+        """Find the function for a fake name, binding it on first use.
 
+        Later calls with the same name skip the name normalization and lookup."""
+        func = self.bound_fakes.get(origname)
+        if func is None:
+            func = self.bound_fakes[origname] = self._bind_fake(origname)
+        return func
+
+    def _bind_fake(self, origname: str) -> T.Callable:
         # faker names are all lower-case
         name = origname.lower()
 
         meth = self.fake_names.get(name, NotImplemented)
 
-        if meth != NotImplemented:
-            ret = meth(*args, **kwargs)
-            local_faker_vars[name.replace("_", "")] = ret
+        if meth == NotImplemented:
+            msg = f"No fake data type named {origname}."
+            all_fake_names = [
+                k for k, v in self.fake_names.items() if v != NotImplemented
+            ]
+            match_list = get_close_matches(name, all_fake_names, n=1)
+            if match_list:
+                msg += f" Did you mean {match_list[0]}"
+            raise AttributeError(msg)
+
+        # FakeNames.email and friends look for previously generated values
+        # under this name
+        local_name = name.replace("_", "")
+        faker_context = self.faker_context
+        pool = self._pooled(name, meth) if self.pool_size else meth
+
+        def fake(*args, **kwargs):
+            if args or kwargs:
+                ret = meth(*args, **kwargs)
+            else:
+                ret = pool()
+            faker_context.local_vars()[local_name] = ret
             return ret
 
-        msg = f"No fake data type named {origname}."
-        all_fake_names = [k for k, v in self.fake_names.items() if v != NotImplemented]
-        match_list = get_close_matches(name, all_fake_names, n=1)
-        if match_list:
-            msg += f" Did you mean {match_list[0]}"
-        raise AttributeError(msg)
+        return fake
+
+    def _pooled(self, name: str, meth: T.Callable) -> T.Callable:
+        """Return a pool for `name` if it is poolable, else `meth`"""
+        if name.replace("_", "") in POOLABLE_FAKES:
+            return FakerValuePool(meth, self.pool_size)
+        return meth
 
 
 def translate(x):
@@ -0,0 +1,233 @@
+"""Optional timing of the hot paths of a Snowfakery run.
+
+An Instrumentation object records how often, and for how long, each
+template, field, Jinja formula, function, Faker fake, row-history access
+and output-stream operation runs. `snowfakery --profile` prints a ranked
+report; embedding applications can pass `instrumentation=` to
+`generate_data` and inspect it afterwards.
+
+Timers are installed only for the duration of an instrumented run, so
+uninstrumented runs pay nothing for this module.
+
+Each timing has a total (including everything called from inside it)
+and an "own" time which excludes other timed operations. For example the
+own time of a field excludes the Faker and Jinja time spent rendering it,
+so ranking by own time points at the real bottlenecks.
+"""
+
+import threading
+import typing as T
+from contextlib import contextmanager, ExitStack
+from os.path import basename
+from time import perf_counter
+
+# only one run per process can be instrumented at a time because the
+# timers are installed on classes
+_install_lock = threading.Lock()
+
+TimingKey = T.Tuple[str, str]
+
+
+class Timing:
+    """Accumulated statistics for one kind of operation"""
+
+    __slots__ = ("count", "total", "own")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.own = 0.0
+
+    def as_dict(self) -> dict:
+        return {"count": self.count, "total": self.total, "own": self.own}
+
+
+class Instrumentation:
+    """Collects timings for one or more runs"""
+
+    def __init__(self):
+        self.timings: T.Dict[TimingKey, Timing] = {}
+        self.elapsed = 0.0
+        self._children: T.List[float] = []  # time spent in nested timers
+        self._thread = None
+        self._jinja_names: T.Dict[int, T.Optional[str]] = {}
+
+    def timed(self, kind: str, name: str, func: T.Callable, *args, **kwargs):
+        """Call func, recording its duration under (kind, name)"""
+        if threading.get_ident() != self._thread:
+            # some other thread's run which is not being instrumented
+            return func(*args, **kwargs)
+        self._children.append(0.0)
+        start = perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            elapsed = perf_counter() - start
+            children = self._children.pop()
+            if self._children:
+                self._children[-1] += elapsed
+            timing = self.timings.get((kind, name))
+            if timing is None:
+                timing = self.timings[(kind, name)] = Timing()
+            timing.count += 1
+            timing.total += elapsed
+            timing.own += elapsed - children
+
+    @property
+    def rows(self) -> int:
+        return sum(
+            timing.count
+            for (kind, _), timing in self.timings.items()
+            if kind == "template"
+        )
+
+    def ranked(self) -> T.List[T.Tuple[TimingKey, Timing]]:
+        """Timings, most expensive (by own time) first"""
+        return sorted(self.timings.items(), key=lambda item: -item[1].own)
+
+    def report(self, limit: int = 25) -> str:
+        """A human-readable table of the most expensive operations"""
+        lines = [
+            f"Snowfakery profile: {self.elapsed:.3f}s, {self.rows} rows",
+            "",
+            f"{'own(s)':>9} {'total(s)':>9} {'count':>9} {'avg(ms)':>9}  "
+            "kind        name",
+        ]
+        for (kind, name), timing in self.ranked()[:limit]:
+            average = 1000 * timing.total / timing.count
+            lines.append(
+                f"{timing.own:9.3f} {timing.total:9.3f} {timing.count:9d} "
+                f"{average:9.3f}  {kind:<11} {name}"
+            )
+        return "\n".join(lines)
+
+    def as_dict(self) -> dict:
+        """A JSON-compatible summary"""
+        return {
+            "elapsed": self.elapsed,
+            "rows": self.rows,
+            "timings": [
+                {"kind": kind, "name": name, **timing.as_dict()}
+                for (kind, name), timing in self.ranked()
+            ],
+        }
+
+    @contextmanager
+    def installed(self, output_stream):
+        """Time the operations of the current thread while in this context"""
+        from snowfakery.data_generator_runtime_object_model import (
+            FieldFactory,
+            ObjectTemplate,
+            SimpleValue,
+            StructuredValue,
+        )
+        from snowfakery.fakedata.fake_data_generator import FakeData
+        from snowfakery.row_history import RowHistory
+
+        timed = self.timed
+
+        def template_timer(generate_row):
+            def _generate_row(template, *args):
+                return timed("template", template.name, generate_row, template, *args)
+
+            return _generate_row
+
+        def field_timer(generate_value):
+            def generate_value_timed(field, context):
+                table = getattr(context, "current_table_name", "")
+                name = f"{table}.{field.name}"
+                return timed("field", name, generate_value, field, context)
+
+            return generate_value_timed
+
+        def jinja_timer(render):
+            def render_timed(value, context):
+                name = self._jinja_name(value, context)
+                if name is None:  # a literal
+                    return render(value, context)
+                return timed("jinja", name, render, value, context)
+
+            return render_timed
+
+        def function_timer(render):
+            def render_timed(value, context):
+                return timed("function", value.function_name, render, value, context)
+
+            return render_timed
+
+        def faker_timer(bind_fake):
+            def bind_fake_timed(fake_data, origname):
+                fake = bind_fake(fake_data, origname)
+
+                def fake_timed(*args, **kwargs):
+                    return timed("faker", origname, fake, *args, **kwargs)
+
+                return fake_timed
+
+            return bind_fake_timed
+
+        def named_timer(kind, name):
+            def timer(func):
+                def timed_func(*args, **kwargs):
+                    return timed(kind, name, func, *args, **kwargs)
+
+                return timed_func
+
+            return timer
+
+        with _install_lock, ExitStack() as restore:
+            for cls, method_name, timer in (
+                (ObjectTemplate, "_generate_row", template_timer),
+                (ObjectTemplate, "_generate_blocks", named_timer("columnar", "blocks")),
+                (FieldFactory, "generate_value", field_timer),
+                (SimpleValue, "render", jinja_timer),
+                (StructuredValue, "render", function_timer),
+                (FakeData, "_bind_fake", faker_timer),
+                (RowHistory, "save_row", named_timer("row history", "save")),
+                (RowHistory, "load_row", named_timer("row history", "load")),
+            ):
+                restore.enter_context(_patched(cls, method_name, timer))
+
+            # output streams are per-run objects, so patch just this one
+            for method_name in ("write_row", "flush", "commit"):
+                timer = named_timer("output", method_name)
+                restore.enter_context(_patched(output_stream, method_name, timer))
+
+            self._thread = threading.get_ident()
+            start = perf_counter()
+            try:
+                yield self
+            finally:
+                self.elapsed += perf_counter() - start
+                self._thread = None
+
+    def _jinja_name(self, value, context) -> T.Optional[str]:
+        """Describe a SimpleValue which is a formula, or None for literals"""
+        key = id(value)
+        if key not in self._jinja_names:
+            definition = value.definition
+            factory = context.interpreter.template_evaluator_factory
+            if isinstance(definition, str) and factory.compiler_for_string(definition):
+                location = f"{basename(value.filename)}:{value.line_num}"
+                self._jinja_names[key] = f"{definition[:40]} ({location})"
+            else:
+                self._jinja_names[key] = None
+        return self._jinja_names[key]
+
+
+@contextmanager
+def _patched(obj, name: str, timer: T.Callable):
+    """Replace obj.name with timer(obj.name) and restore it afterwards"""
+    if isinstance(obj, type):
+        original = obj.__dict__[name]
+        setattr(obj, name, timer(original))
+        try:
+            yield
+        finally:
+            setattr(obj, name, original)
+    else:
+        setattr(obj, name, timer(getattr(obj, name)))
+        try:
+            yield
+        finally:
+            delattr(obj, name)
@@ -0,0 +1,172 @@
+"""Progress and throughput metrics for long-running jobs.
+
+The Interpreter reports a ProgressEvent at most once per
+`SnowfakeryApplication.progress_interval` seconds, and once more when it
+finishes, to `SnowfakeryApplication.progress` and to any other listeners
+such as a MetricsFileWriter.
+"""
+
+import json
+import os
+import sys
+import typing as T
+from pathlib import Path
+from time import monotonic
+
+from snowfakery.data_gen_exceptions import DataGenError
+
+METRICS_FORMATS = ("jsonl", "prometheus")
+
+
+class ProgressEvent(T.NamedTuple):
+    iterations: int  # recipe iterations completed so far
+    elapsed: float  # seconds since generation started
+    rows: T.Dict[str, int]  # rows generated so far, by table
+    rows_per_second: float
+    rss: T.Optional[int]  # resident memory in bytes, if known
+    finished: bool = False
+
+    @property
+    def total_rows(self) -> int:
+        return sum(self.rows.values())
+
+    def as_dict(self) -> dict:
+        return {**self._asdict(), "total_rows": self.total_rows}
+
+
+def current_rss() -> T.Optional[int]:
+    """The resident memory of this process in bytes, or None if unknown"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        import resource
+    except ImportError:  # pragma: no cover  -- Windows
+        return None
+    # not available on this OS, so settle for the peak
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+class ProgressTracker:
+    """Decides when to report progress, and builds the events"""
+
+    def __init__(
+        self,
+        listeners: T.Sequence[T.Callable[[ProgressEvent], None]],
+        interval: float,
+        id_manager,
+    ):
+        self.listeners = listeners
+        self.interval = interval
+        self.id_manager = id_manager
+        self.start = self.last_report = monotonic()
+
+    def iteration_finished(self, iterations: int, finished: bool):
+        now = monotonic()
+        if finished or now - self.last_report >= self.interval:
+            self.last_report = now
+            event = self.event(iterations, now - self.start, finished)
+            for listener in self.listeners:
+                listener(event)
+
+    def event(self, iterations: int, elapsed: float, finished: bool) -> ProgressEvent:
+        start_ids = self.id_manager.start_ids
+        rows = {
+            table: last_id - start_ids.get(table, 1) + 1
+            for table, last_id in self.id_manager.last_used_ids.items()
+            if not table.startswith("__")
+        }
+        total = sum(rows.values())
+        return ProgressEvent(
+            iterations=iterations,
+            elapsed=elapsed,
+            rows=rows,
+            rows_per_second=total / elapsed if elapsed else 0.0,
+            rss=current_rss(),
+            finished=finished,
+        )
+
+
+class MetricsFileWriter:
+    """Writes progress events to a file.
+
+    jsonl: appends one JSON object per event.
+    prometheus: keeps the file up to date in the Prometheus text format,
+                e.g. for node_exporter's textfile collector."""
+
+    def __init__(self, path: T.Union[Path, str], format: T.Optional[str] = None):
+        self.path = Path(path)
+        self.format = format or infer_metrics_format(self.path)
+        if self.format not in METRICS_FORMATS:
+            raise DataGenError(f"Unknown metrics format: {self.format}")
+        if self.format == "jsonl":
+            self.path.write_text("")
+
+    def __call__(self, event: ProgressEvent):
+        if self.format == "jsonl":
+            with self.path.open("a") as f:
+                f.write(json.dumps(event.as_dict()) + "\n")
+        else:
+            # write-then-rename so that scrapers never see partial files
+            temp = self.path.with_name(self.path.name + ".tmp")
+            temp.write_text(prometheus_text(event))
+            os.replace(temp, self.path)
+
+
+def infer_metrics_format(path: Path) -> str:
+    return "prometheus" if path.suffix == ".prom" else "jsonl"
+
+
+def prometheus_text(event: ProgressEvent) -> str:
+    lines = [
+        "# HELP snowfakery_rows_total Rows generated, by table.",
+        "# TYPE snowfakery_rows_total counter",
+        *(
+            f'snowfakery_rows_total{{table="{_escape(table)}"}} {count}'
+            for table, count in sorted(event.rows.items())
+        ),
+        "# HELP snowfakery_iterations_total Recipe iterations completed.",
+        "# TYPE snowfakery_iterations_total counter",
+        f"snowfakery_iterations_total {event.iterations}",
+        "# HELP snowfakery_rows_per_second Average rows generated per second.",
+        "# TYPE snowfakery_rows_per_second gauge",
+        f"snowfakery_rows_per_second {event.rows_per_second}",
+        "# HELP snowfakery_elapsed_seconds Time since generation started.",
+        "# TYPE snowfakery_elapsed_seconds gauge",
+        f"snowfakery_elapsed_seconds {event.elapsed}",
+        "# HELP snowfakery_finished Whether generation has finished.",
+        "# TYPE snowfakery_finished gauge",
+        f"snowfakery_finished {int(event.finished)}",
+    ]
+    if event.rss is not None:
+        lines += [
+            "# HELP snowfakery_resident_memory_bytes Resident memory size.",
+            "# TYPE snowfakery_resident_memory_bytes gauge",
+            f"snowfakery_resident_memory_bytes {event.rss}",
+        ]
+    return "\n".join(lines) + "\n"
+
+
+def memory_report(usage: T.Mapping[str, T.Any]) -> str:
+    """A human-readable version of Interpreter.memory_usage()"""
+    history = ", ".join(
+        f"{table}: {rows}" for table, rows in sorted(usage["history_rows"].items())
+    )
+    lines = ["Snowfakery memory report"]
+    if usage["rss"] is not None:
+        lines.append(f"  resident memory:   {usage['rss'] / 1e6:.1f} MB")
+    lines += [
+        f"  just_once objects: {usage['persistent_objects']} "
+        f"(referring to {usage['rows_reachable_from_persistent_objects']} rows)",
+        f"  row history:       {usage['history_bytes'] / 1e6:.1f} MB "
+        f"({history or 'no tables'})",
+        f"  template states:   {usage['template_states']}",
+    ]
+    return "\n".join(lines)
+
+
+def _escape(label: str) -> str:
+    return label.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
@@ -56,8 +56,9 @@ class ObjectRow:
     def __getstate__(self):
         """Get the state of this ObjectRow for serialization.
 
-        Do not include related ObjectRows because circular
-        references in serialization formats cause problems."""
+        Do not include related ObjectRows because circular references in
+        serialization formats cause problems. References to rows are kept:
+        they are serialized as (tablename, id)."""
         values = {k: v for k, v in self._values.items() if not isinstance(v, ObjectRow)}
         return {"_tablename": self._tablename, "_values": values}
 
@@ -66,11 +67,55 @@ class ObjectRow:
             setattr(self, slot, value)
 
 
+class CompactObjectRow(ObjectRow):
+    """A finished row, stored as a list of values plus an index of field
+    positions which is shared by all of the rows from the same template.
+
+    Used for tables whose fields no formula reads by name, so that rows which
+    are kept alive (e.g. because other rows refer to them) take less memory.
+    Fields can still be read, just a little more slowly."""
+
+    __slots__ = ["_field_index", "_row"]
+
+    def __init__(self, tablename, field_index: T.Mapping[str, int], row, index=0):
+        self._tablename = tablename
+        self._field_index = field_index
+        self._row = row
+        self._child_index = index
+
+    @property
+    def _values(self):
+        return dict(zip(self._field_index, self._row))
+
+    def __getattr__(self, name):
+        try:
+            return self._row[self._field_index[name]]
+        except KeyError:
+            raise AttributeError(name)
+
+    @property
+    def _id(self):
+        return self._row[self._field_index["id"]]
+
+
 class ObjectReference(yaml.YAMLObject):
+    yaml_loader = yaml.SafeLoader
+    yaml_dumper = SnowfakeryDumper
+    yaml_tag = "!snowfakery_objectreference"
+
     def __init__(self, tablename: str, id: int):
         self._tablename = tablename
         self.id = id
 
+    @classmethod
+    def to_yaml(cls, dumper, data):
+        """Serialize any kind of reference as (tablename, id)"""
+        return dumper.represent_sequence(cls.yaml_tag, [data._tablename, data.id])
+
+    @classmethod
+    def from_yaml(cls, loader, node):
+        return ObjectReference(*loader.construct_sequence(node))
+
 
 class LazyLoadedObjectReference(ObjectReference):
     _data = None
@@ -111,15 +156,23 @@ class NicknameSlot(ObjectReference):
     id_manager: IdManager
     allocated_id: T.Union[T.Optional[int], SlotState] = None
 
-    def __init__(self, tablename: str, id_manager: IdManager):
+    def __init__(
+        self,
+        tablename: str,
+        id_manager: IdManager,
+        on_allocate: T.Optional[T.Callable[[], None]] = None,
+    ):
         self._tablename = tablename
         self.id_manager = id_manager
+        self.on_allocate = on_allocate
 
     @property
     def id(self):
         "Get an id corresponding to this slot. Generate one if necessary."
         if self.allocated_id is None:
             self.allocated_id = self.id_manager.generate_id(self._tablename)
+            if self.on_allocate:
+                self.on_allocate()
         return self.allocated_id
 
     def consume_slot(self):
@@ -140,3 +193,7 @@ class NicknameSlot(ObjectReference):
 
     def __repr__(self):
         return f"<NicknameSlot {self._tablename} {self.status} {self.allocated_id}>"
+
+
+# subclasses too, e.g. LazyLoadedObjectReferences from random_reference
+SnowfakeryDumper.add_multi_representer(ObjectReference, ObjectReference.to_yaml)
@@ -12,20 +12,10 @@ from typing import Dict, TextIO, Union, Optional, Mapping, Callable, Sequence, c
 import typing as T
 from warnings import warn
 
-from sqlalchemy import (
-    create_engine,
-    MetaData,
-    Column,
-    Integer,
-    Table,
-    Unicode,
-    func,
-    inspect,
-)
-from sqlalchemy.ext.automap import automap_base
-from sqlalchemy.orm import create_session
-from sqlalchemy.engine import Engine
-from sqlalchemy.sql import select
+# SQLAlchemy is imported by the SQL output streams when they are used
+# because importing it dominates the start-up time of short runs.
+if T.TYPE_CHECKING:  # pragma: no cover
+    from sqlalchemy.engine import Engine
 
 from .data_gen_exceptions import DataGenError
 
@@ -117,6 +107,14 @@ class OutputStream(ABC):
 
         self.count += 1
 
+    def write_rows(self, tablename: str, rows_with_references: Sequence[Dict]) -> None:
+        """Write a batch of rows of one table, e.g. from the columnar engine.
+
+        Streams which can write batches faster than a row at a time
+        can override this."""
+        for row in rows_with_references:
+            self.write_row(tablename, row)
+
     @abstractmethod
     def write_single_row(self, tablename: str, row: Dict) -> None:
         """Write a single row to the stream"""
@@ -304,7 +302,11 @@ class SqlDbOutputStream(OutputStream):
 
     should_close_session = False
 
-    def __init__(self, engine: Engine, mappings: None = None, **kwargs):
+    def __init__(self, engine: "Engine", mappings: None = None, **kwargs):
+        from sqlalchemy import MetaData
+        from sqlalchemy.ext.automap import automap_base
+        from sqlalchemy.orm import create_session
+
         if mappings:  # pragma: no cover  -- should not be triggered.
             warn("Please do not pass mappings argument to __init__", DeprecationWarning)
         self.buffered_rows = defaultdict(list)
@@ -318,6 +320,8 @@ class SqlDbOutputStream(OutputStream):
     def from_url(cls, db_url: str, mappings: None = None):
         if mappings:  # pragma: no cover  -- should not be triggered.
             warn("Please do not pass mappings argument to from_url", DeprecationWarning)
+        from sqlalchemy import create_engine
+
         try:
             engine = create_engine(db_url)
         except ModuleNotFoundError as e:
@@ -413,6 +417,8 @@ class SqlTextOutputStream(FileOutputStream):
 
     def _init_db(self):
         "Initialize a db through an owned output stream"
+        from sqlalchemy import create_engine
+
         db_url = f"sqlite:///{self.tempdir.name}/tempdb.db"
         engine = create_engine(db_url)
         return SqlDbOutputStream(engine)
@@ -454,6 +460,9 @@ def create_tables_from_inferred_fields(
     tables: T.Dict[str, TableInfo], engine, metadata
 ):
     """Create tables based on dictionary of tables->field-list."""
+    from sqlalchemy import Column, Integer, Table, Unicode, func, inspect
+    from sqlalchemy.sql import select
+
     with engine.connect() as conn:
         inspector = inspect(engine)
         for table_name, table in tables.items():
@@ -633,6 +642,10 @@ class MultiplexOutputStream(OutputStream):
         for stream in self.outputstreams:
             stream.write_row(tablename, row_with_references)
 
+    def write_rows(self, tablename: str, rows_with_references: Sequence[Dict]) -> None:
+        for stream in self.outputstreams:
+            stream.write_rows(tablename, rows_with_references)
+
     def close(self, **kwargs) -> Optional[Sequence[str]]:
         for stream in self.outputstreams:
             stream.close()
@@ -43,6 +43,7 @@ class ParseResult:
         plugins: Sequence = (),
         random_references: Sequence = (),
         version: int = None,
+        included_files: Sequence = (),
     ):
         self.options = options
         self.tables = tables
@@ -51,6 +52,7 @@ class ParseResult:
         self.plugins = plugins
         self.version = version
         self.random_references = random_references or []
+        self.included_files = included_files
 
 
 class TableInfo:
@@ -102,6 +104,7 @@ class ParseContext:
         self.table_infos = {}
         self.parser_macros_plugins = {}
         self.random_references = []
+        self.included_files = []
 
     def line_num(self, obj=None) -> Dict:
         if not obj:
@@ -604,6 +607,7 @@ def parse_included_file(
         raise exc.DataGenError(
             f"Cannot load include file {inclusion_path}", **linenum._asdict()
         )
+    context.included_files.append(inclusion_path.absolute())
     with inclusion_path.open() as f:
         incl_objects = parse_file(f, context)
         return incl_objects
@@ -813,4 +817,5 @@ def parse_recipe(
         plugins=context.plugins,
         version=context.version,
         random_references=context.random_references,
+        included_files=context.included_files,
     )
@@ -4,8 +4,9 @@ from typing import Any, Callable, Mapping, Union, NamedTuple, List, Tuple
 from importlib import import_module
 from datetime import date, datetime
 from pathlib import Path
-from unittest.mock import patch
 from functools import wraps
+from contextlib import contextmanager
+from threading import RLock
 import typing as T
 
 import yaml
@@ -53,7 +54,9 @@ class SnowfakeryPlugin:
     context.field_vars() and context.context_vars().
 
     context.field_vars() are the same field variables that can be used in
-    templates.
+    templates. Building them is expensive, so use context.lookup(name)
+    to look up one of them, and context.option(name) to look up a
+    plugin option.
 
     context.context_vars() is a mutable mapping contaiing
     values that are available to this object template and that of
@@ -64,6 +67,18 @@ class SnowfakeryPlugin:
 
     Plugins can also keep internal state for global data, like any other
     Python object.
+
+    A function can also have a batch variant which returns many values
+    at once:
+
+            def func1__batch(self, n, /, arg1, arg2, arg3=default):
+                return [something() for i in range(n)]
+
+    `n` is positional-only so that it cannot clash with func1's arguments.
+    When a recipe calls `MyPlugin.func1` from a field whose arguments are
+    all constants, Snowfakery calls the batch variant instead and hands out
+    its values one call at a time, calling it again when they run out.
+    Values left over at the end of a run are discarded.
     """
 
     def __init__(self, interpreter):
@@ -82,6 +97,20 @@ class SnowfakeryPlugin:
         pass
 
 
+# suffix of the name of a function's batch variant
+BATCH_SUFFIX = "__batch"
+# values requested from a batch variant at a time
+BATCH_SIZE = 1000
+
+
+def batch_variant(functions: Any, name: str) -> T.Optional[Callable]:
+    """The batch variant of the function `name`, if it has one"""
+    func = getattr(functions, name + BATCH_SUFFIX, None)
+    if not callable(func) or hasattr(func, "lazy"):
+        return None
+    return func
+
+
 class ParserMacroPlugin:
     """Abstract base class for plugins that generate code.
 
@@ -101,6 +130,14 @@ class PluginContext:
     def field_vars(self):
         return self.interpreter.current_context.field_vars()
 
+    def lookup(self, name: str, default=None):
+        """The value of one of the field_vars(), without building them all"""
+        return self.interpreter.current_context.lookup(name, default)
+
+    def option(self, name: str, default=None):
+        """The value of a plugin option, e.g. from --plugin-option"""
+        return self.interpreter.options.get(name, default)
+
     ## TODO: Deprecate this in favour of get_contextual_state
     ##       which has more smarts about name=, parent= etc.
     def context_vars(self):
@@ -158,6 +195,15 @@ def memorable(func: Any) -> Callable:
     return newfunc
 
 
+class MemorableSlot(NamedTuple):
+    """The state a call site found on its last call to a memorable function"""
+
+    func: Callable
+    args: tuple
+    kwargs: dict
+    entry: list  # [parent, state], shared with Interpreter.instance_states
+
+
 def evaluate_memorable_function(context, func, self, args, kwargs):
     """Memorable functions store state.
 
@@ -171,26 +217,50 @@ def evaluate_memorable_function(context, func, self, args, kwargs):
     For-loops are the primary example where we want to re-start an iterator
     every time we evaluate.
     """
-    if context.interpreter.current_context.recalculate_every_time:
+    interpreter = context.interpreter
+    current_context = interpreter.current_context
+    if current_context.recalculate_every_time:
         return func(self, *args, **kwargs)
 
-    # otherwise, do all of the caching magic
+    # A call site which calls the same function with the same arguments
+    # as last time finds its state in its slot without building its key.
+    # Named state can be shared by call sites, so it is always looked up.
+    slot_number = current_context.state_slot
+    if slot_number is not None and not kwargs.get("name"):
+        slot = interpreter.state_slots[slot_number]
+        if not (
+            slot and slot.func is func and slot.args == args and slot.kwargs == kwargs
+        ):
+            key = memorable_key(context, func, args, kwargs)
+            slot = interpreter.state_slots[slot_number] = MemorableSlot(
+                func, args, kwargs, interpreter.contextual_state_entry(key)
+            )
+        return interpreter.refresh_contextual_state(
+            slot.entry,
+            parent=kwargs.get("parent", None),
+            make_state_func=lambda: func(self, *args, **kwargs),
+        )
+
+    return context.interpreter.get_contextual_state(
+        name=memorable_key(context, func, args, kwargs),
+        parent=kwargs.get("parent", None),
+        reset_every_iteration=False,
+        make_state_func=lambda: func(self, *args, **kwargs),
+    )
+
+
+def memorable_key(context, func, args, kwargs) -> tuple:
+    """Which state a call to a memorable function uses"""
     user_key = kwargs.get("name") or (
         context.unique_context_identifier,
         tuple(args),
         tuple(kwargs.items()),
     )
-    key = (
+    return (
         func.__module__,
         func.__name__,
         user_key,
     )
-    return context.interpreter.get_contextual_state(
-        name=key,
-        parent=kwargs.get("parent", None),
-        reset_every_iteration=False,
-        make_state_func=lambda: func(self, *args, **kwargs),
-    )
 
 
 def resolve_plugins(
@@ -204,16 +274,26 @@ def resolve_plugins(
         return plugins
 
 
+# sys.path is process-wide so threads which embed Snowfakery take turns
+_plugin_path_lock = RLock()
+
+
+@contextmanager
 def plugin_path(search_paths):
     cwd_plugins = "./plugins"
     user_plugins = Path.home() / ".snowfakery/plugins"
-    new_sys_path = [
-        *sys.path,
-        *(str(p) for p in search_paths),
-        str(cwd_plugins),
-        str(user_plugins),
-    ]
-    return patch.object(sys, "path", new_sys_path)
+    with _plugin_path_lock:
+        old_sys_path = sys.path
+        sys.path = [
+            *sys.path,
+            *(str(p) for p in search_paths),
+            str(cwd_plugins),
+            str(user_plugins),
+        ]
+        try:
+            yield
+        finally:
+            sys.path = old_sys_path
 
 
 def resolve_plugin(plugin: str, lineinfo) -> object:
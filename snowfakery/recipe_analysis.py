@@ -0,0 +1,375 @@
+"""Static analysis of parsed recipes.
+
+The runtime uses what it learns here to skip work which cannot affect the
+output. Every decision based on it must be safe to get wrong in the
+conservative direction: e.g. a table whose fields *might* be read by a
+formula is treated as if they are.
+"""
+
+import typing as T
+from collections import defaultdict
+
+from jinja2 import meta, nodes
+from jinja2.exceptions import TemplateSyntaxError
+
+from snowfakery.data_generator_runtime_object_model import (
+    ForEachVariableDefinition,
+    ObjectTemplate,
+    SimpleValue,
+    StructuredValue,
+    VariableDefinition,
+)
+
+if T.TYPE_CHECKING:  # pragma: no cover
+    from snowfakery.data_generator_runtime import JinjaTemplateEvaluatorFactory
+
+
+def walk(node) -> T.Iterator:
+    """Every template, variable and value in a recipe's statements"""
+    if isinstance(node, (list, tuple)):
+        for child in node:
+            yield from walk(child)
+        return
+
+    yield node
+    if isinstance(node, ObjectTemplate):
+        yield from walk(node.count_expr)
+        yield from walk(node.for_each_expr)
+        yield from walk([field.definition for field in node.fields])
+        yield from walk(node.friends)
+    elif isinstance(node, (VariableDefinition, ForEachVariableDefinition)):
+        yield from walk(node.expression)
+    elif isinstance(node, StructuredValue):
+        yield from walk(node.args)
+        yield from walk(list(node.kwargs.values()))
+
+
+# Names which evaluate to scalars unless a recipe defines something with
+# the same name
+SCALAR_NAMES = frozenset(
+    (
+        "id",
+        "count",
+        "child_index",
+        "today",
+        "now",
+        "fake",
+        "date",
+        "datetime",
+        "date_between",
+        "datetime_between",
+        "random_number",
+        "i18n_fake",
+        "relativedelta",
+        "unique_id",
+        "unique_alpha_code",
+        "NULL",
+        "null",
+        "Null",
+    )
+)
+
+# Functions which return scalars when their arguments are scalars
+SCALAR_FUNCTIONS = frozenset(
+    (
+        "fake",
+        "i18n_fake",
+        "date",
+        "datetime",
+        "date_between",
+        "datetime_between",
+        "random_number",
+        "random_choice",
+        "choice",
+        "if",
+        "relativedelta",
+    )
+)
+
+
+# Functions whose results depend only on their arguments
+PURE_FUNCTIONS = frozenset(("date", "relativedelta"))
+
+# Jinja filters whose results depend only on their arguments
+PURE_FILTERS = frozenset(
+    (
+        "abs",
+        "capitalize",
+        "count",
+        "d",
+        "default",
+        "first",
+        "float",
+        "format",
+        "int",
+        "join",
+        "last",
+        "length",
+        "lower",
+        "max",
+        "min",
+        "replace",
+        "round",
+        "string",
+        "sum",
+        "title",
+        "trim",
+        "truncate",
+        "upper",
+    )
+)
+
+# Jinja nodes which compute nothing but what their children compute. Calls
+# and filters are checked separately.
+PURE_NODES = (
+    nodes.Template,
+    nodes.Output,
+    nodes.TemplateData,
+    nodes.Const,
+    nodes.Name,
+    nodes.Getattr,
+    nodes.Getitem,
+    nodes.Slice,
+    nodes.BinExpr,
+    nodes.UnaryExpr,
+    nodes.Concat,
+    nodes.Compare,
+    nodes.Operand,
+    nodes.CondExpr,
+    nodes.Tuple,
+    nodes.List,
+    nodes.Dict,
+    nodes.Pair,
+    nodes.Keyword,
+    nodes.Test,
+)
+
+
+def is_pure(ast: nodes.Node) -> bool:
+    """Does this formula compute its value only from the names it uses?"""
+    for node in ast.find_all(nodes.Node):
+        if isinstance(node, nodes.Call):
+            # not methods, e.g. ${{today.today()}}
+            if not (
+                isinstance(node.node, nodes.Name) and node.node.name in PURE_FUNCTIONS
+            ):
+                return False
+        elif isinstance(node, nodes.Filter):
+            if node.name not in PURE_FILTERS:
+                return False
+        elif not isinstance(node, PURE_NODES):
+            return False
+    return isinstance(ast, PURE_NODES)
+
+
+# Functions which look up objects by name
+LOOKUPS = frozenset(("reference", "random_reference"))
+# Plugin function arguments which name objects, e.g. Counters' `parent`
+LOOKUP_KEYWORDS = frozenset(("parent",))
+
+
+class RecipeAnalysis:
+    """What the formulas in a recipe refer to"""
+
+    def __init__(
+        self,
+        statements: T.Sequence,
+        template_evaluator_factory: "JinjaTemplateEvaluatorFactory",
+    ):
+        # attributes which might be read from objects, e.g. `name` in
+        # ${{Account.name}}, ${{Account["name"]}} or `reference: Account.name`
+        self.attributes: T.Set[str] = set()
+        # True if some formula reads attributes in a way that we cannot see
+        self.dynamic_attributes = False
+        # the names of the fields of each table
+        self.table_fields: T.Dict[str, T.Set[str]] = defaultdict(set)
+        # names which might be looked up: of variables, objects, plugins etc.
+        self.names: T.Set[str] = set()
+        # True if some formula might compute a name and look it up
+        self.dynamic_names = False
+        # names defined by the recipe
+        self.variable_names: T.Set[str] = {"child_index"}
+        self.object_names: T.Set[str] = set()
+        # the names used by each formula, or None if it cannot be parsed
+        self.formula_names: T.Dict[str, T.Optional[T.Set[str]]] = {}
+        # formulas which compute their values only from the names they use
+        self._pure_formulas: T.Set[str] = set()
+        self._template_evaluator_factory = template_evaluator_factory
+        # names passed to functions which look names up, e.g. reference(x)
+        self._lookups_by_name: T.Set[str] = set()
+        # values which might call memorable functions: formulas and
+        # function calls
+        self.call_sites: T.List[T.Union[SimpleValue, StructuredValue]] = []
+
+        templates = []
+        for node in walk(statements):
+            if isinstance(node, ObjectTemplate):
+                templates.append(node)
+                self.table_fields[node.tablename].update(
+                    field.name for field in node.fields
+                )
+                self.object_names.add(node.tablename)
+                if node.nickname:
+                    self.object_names.add(node.nickname)
+            elif isinstance(node, (VariableDefinition, ForEachVariableDefinition)):
+                self.variable_names.add(node.varname)
+            elif isinstance(node, StructuredValue):
+                self.call_sites.append(node)
+                self._analyze_structured_value(node)
+            definition = getattr(node, "definition", None)  # not all SimpleValues
+            if isinstance(node, SimpleValue) and isinstance(definition, str):
+                compiler = template_evaluator_factory.compiler_for_string(definition)
+                if compiler:
+                    self.call_sites.append(node)
+                    self._analyze_formula(compiler, definition)
+                else:
+                    # e.g. dotted names for `reference: Account.parent`
+                    name, *attributes = definition.split(".")
+                    self.names.add(name)
+                    self.attributes.update(attributes)
+
+        if not self._lookups_by_name.isdisjoint(self.variable_names):
+            self.dynamic_names = True
+
+        scalar_names = SCALAR_NAMES - self.variable_names - self.object_names
+        tables_with_references = {
+            template.tablename
+            for template in templates
+            if not all(
+                self._is_scalar(field.definition, scalar_names)
+                for field in template.fields
+            )
+        }
+        # tables whose rows cannot refer to other rows
+        self.tables_without_references: T.Set[str] = (
+            set(self.table_fields) - tables_with_references
+        )
+
+    def _analyze_formula(self, compiler, formula: str):
+        try:
+            ast = compiler.parse(formula)
+        except TemplateSyntaxError:
+            # the error will be reported when the formula is evaluated
+            self.formula_names[formula] = None
+            return
+
+        for const_node in ast.find_all(nodes.Const):
+            # e.g. reference("Account")
+            if isinstance(const_node.value, str):
+                self.names.add(const_node.value)
+        for call in ast.find_all(nodes.Call):
+            if isinstance(call.node, nodes.Name) and call.node.name in LOOKUPS:
+                arguments = [*call.args, *(keyword.value for keyword in call.kwargs)]
+            else:
+                arguments = [
+                    keyword.value
+                    for keyword in call.kwargs
+                    if keyword.key in LOOKUP_KEYWORDS
+                ]
+            for argument in arguments:
+                if isinstance(argument, nodes.Name):
+                    # fine unless it is a variable holding a name
+                    self._lookups_by_name.add(argument.name)
+                elif not isinstance(argument, nodes.Const):
+                    self.dynamic_names = True
+
+        for getattr_node in ast.find_all(nodes.Getattr):
+            self.attributes.add(getattr_node.attr)
+        for getitem_node in ast.find_all(nodes.Getitem):
+            if isinstance(getitem_node.arg, nodes.Const):
+                self.attributes.add(str(getitem_node.arg.value))
+            else:
+                self.dynamic_attributes = True
+        for filter_node in ast.find_all(nodes.Filter):
+            if filter_node.name == "attr" or any(
+                keyword.key == "attribute" for keyword in filter_node.kwargs
+            ):
+                self.dynamic_attributes = True
+        if is_pure(ast):
+            self._pure_formulas.add(formula)
+
+        # last, because it optimizes the ast, e.g. folding "a" ~ "b" into "ab"
+        names = meta.find_undeclared_variables(ast)
+        self.formula_names[formula] = names
+        self.names.update(names)
+
+    def _analyze_structured_value(self, value: StructuredValue):
+        if "." in value.function_name:
+            # e.g. Counters.NumberCounter or Account.parent
+            self.names.add(value.function_name.split(".")[0])
+        if value.function_name in LOOKUPS:
+            arguments = [*value.args, *value.kwargs.values()]
+        else:
+            arguments = [
+                arg for name, arg in value.kwargs.items() if name in LOOKUP_KEYWORDS
+            ]
+        for argument in arguments:
+            definition = getattr(argument, "definition", None)
+            if isinstance(definition, str) and (
+                self._template_evaluator_factory.compiler_for_string(definition)
+            ):
+                # e.g. reference: ${{"Account" if cond else "Contact"}}
+                self.dynamic_names = True
+
+    def _is_scalar(self, definition, scalar_names: T.AbstractSet[str]) -> bool:
+        """Can this field definition only evaluate to scalars, never rows?"""
+        if type(definition) is SimpleValue:  # not subclasses
+            value = definition.definition
+            if not isinstance(value, str):
+                return True
+            compiler = self._template_evaluator_factory.compiler_for_string(value)
+            if not compiler:
+                return True
+            names = self.formula_names.get(value)
+            return names is not None and names <= scalar_names
+        elif isinstance(definition, StructuredValue):
+            return definition.function_name in SCALAR_FUNCTIONS and all(
+                self._is_scalar(arg, scalar_names)
+                for arg in [*definition.args, *definition.kwargs.values()]
+            )
+        # e.g. nested object templates
+        return False
+
+    def pure_formula_variables(
+        self, formula: str, constant_names: T.AbstractSet[str]
+    ) -> T.Optional[T.FrozenSet[str]]:
+        """The variables a formula reads, if its value depends on nothing
+        else, or None if it might not.
+
+        `constant_names` have the same value for the whole run unless the
+        recipe defines something with the same name, e.g. options and
+        `today`. A formula which reads no variables has the same value for
+        the whole run."""
+        if formula not in self._pure_formulas:
+            return None
+        field_names = set().union(*self.table_fields.values())
+        variables = set()
+        for name in self.formula_names[formula]:
+            if name in PURE_FUNCTIONS:
+                continue  # standard functions take precedence over everything
+            elif name in self.variable_names:
+                variables.add(name)
+            elif (
+                name not in constant_names
+                or name in field_names
+                or name in self.object_names
+            ):
+                return None
+        return frozenset(variables)
+
+    def might_refer_to(self, name: str) -> bool:
+        """Might any formula or reference look this name up?"""
+        return self.dynamic_names or name in self.names
+
+    def might_read_fields(self, field_names: T.Iterable[str]) -> bool:
+        """Might any formula read any of these fields by name?"""
+        return self.dynamic_attributes or not self.attributes.isdisjoint(field_names)
+
+    def tables_with_unread_fields(self) -> T.Set[str]:
+        """Tables whose rows can be CompactObjectRows because no formula reads
+        their fields (other than id)"""
+        return {
+            tablename
+            for tablename, fields in self.table_fields.items()
+            if not self.might_read_fields(fields - {"id"})
+        }
@@ -0,0 +1,137 @@
+"""A disk cache of parsed recipes.
+
+Parsing a large recipe (YAML loading with line-number tracking, macros,
+included files and plugin resolution) can take a noticeable fraction of the
+runtime of a small portion of a large job. Workflows which run the same
+recipe thousands of times can keep parsed recipes in a cache directory
+and skip parsing after the first run.
+
+Cache entries are keyed by the recipe text, its location and the
+Snowfakery/Python versions. Each entry also records a digest of every
+file that it depends upon (included recipes and plugin modules) and is
+ignored if any of those files has changed.
+
+Cache entries are pickles, so only use a cache directory that you trust,
+just as you would only run plugins that you trust.
+"""
+
+import hashlib
+import os
+import pickle
+import sys
+import typing as T
+from io import StringIO
+from os import fsdecode
+from pathlib import Path
+from tempfile import NamedTemporaryFile
+from warnings import warn
+
+from snowfakery.__about__ import __version__
+from snowfakery.parse_recipe_yaml import ParseResult, parse_recipe
+from snowfakery.plugins import plugin_path
+
+# bump this when the structure of cache entries changes
+CACHE_FORMAT = 1
+
+Dependencies = T.List[T.Tuple[str, str]]
+
+
+def parse_recipe_with_cache(
+    stream: T.IO[str],
+    cache_dir: T.Union[Path, str],
+) -> ParseResult:
+    """Like parse_recipe, but use and fill the cache in cache_dir"""
+    text = stream.read()
+    stream_name = getattr(stream, "name", None)
+    recipe_path = Path(fsdecode(stream_name)).absolute() if stream_name else None
+    cache_file = Path(cache_dir) / f"{_cache_key(text, recipe_path)}.pickle"
+
+    parse_result = _load(cache_file, recipe_path)
+    if parse_result:
+        return parse_result
+
+    parse_result = parse_recipe(_named_stream(text, stream_name))
+    _save(cache_file, parse_result)
+    return parse_result
+
+
+def _named_stream(text: str, name: T.Optional[str]) -> StringIO:
+    """A stream over text which has the same name as the original stream"""
+    new_stream = StringIO(text)
+    if name:
+        new_stream.name = name
+    return new_stream
+
+
+def _cache_key(text: str, recipe_path: T.Optional[Path]) -> str:
+    digest = hashlib.sha256()
+    for part in (
+        str(CACHE_FORMAT),
+        __version__,
+        sys.version,
+        str(recipe_path),
+        text,
+    ):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def _file_digest(path: T.Union[Path, str]) -> T.Optional[str]:
+    try:
+        return hashlib.sha256(Path(path).read_bytes()).hexdigest()
+    except OSError:
+        return None
+
+
+def _dependencies(parse_result: ParseResult) -> Dependencies:
+    """Files which, if changed, make a cached parse result stale"""
+    paths = [str(path) for path in parse_result.included_files]
+    for _, plugin in parse_result.plugins:
+        module = sys.modules.get(plugin.__module__)
+        module_file = getattr(module, "__file__", None)
+        if module_file:
+            paths.append(module_file)
+    return [(path, _file_digest(path)) for path in paths]
+
+
+def _plugin_search_paths(recipe_path: T.Optional[Path]) -> T.List[Path]:
+    # same as parse_recipe_yaml.parse_top_level_elements
+    parent = recipe_path.parent if recipe_path else Path(".")
+    return [parent / "plugins"]
+
+
+def _load(cache_file: Path, recipe_path: T.Optional[Path]) -> T.Optional[ParseResult]:
+    if not cache_file.exists():
+        return None
+    try:
+        # plugins near the recipe are only importable with the right sys.path
+        with cache_file.open("rb") as f, plugin_path(
+            _plugin_search_paths(recipe_path)
+        ):
+            dependencies, parse_result = pickle.load(f)
+    except Exception as e:
+        warn(f"Ignoring unreadable recipe cache entry {cache_file}: {e}")
+        return None
+
+    for path, digest in dependencies:
+        if _file_digest(path) != digest:
+            return None
+
+    return parse_result
+
+
+def _save(cache_file: Path, parse_result: ParseResult):
+    try:
+        data = pickle.dumps((_dependencies(parse_result), parse_result))
+    except Exception as e:
+        warn(f"Cannot cache recipe: {e}")
+        return
+
+    cache_file.parent.mkdir(parents=True, exist_ok=True)
+    # write-then-rename so that concurrent processes never see partial entries
+    with NamedTemporaryFile(
+        "wb", dir=cache_file.parent, suffix=".tmp", delete=False
+    ) as f:
+        f.write(data)
+    os.replace(f.name, cache_file)
@@ -282,6 +282,14 @@ class ValidationContext:
         """
         return self._build_validation_namespace()
 
+    def field_vars_for(self, names):
+        """The validation namespace, for evaluators which name what they use."""
+        return self.field_vars()
+
+    def lookup(self, name: str, default=None):
+        """One name from the validation namespace."""
+        return self.field_vars().get(name, default)
+
     def _build_validation_namespace(self):
         """Build namespace with mock values for all available names."""
         if not self.interpreter:
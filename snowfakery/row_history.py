@@ -2,11 +2,11 @@ import sqlite3
 import typing as T
 import warnings
 from collections import defaultdict
-from copy import deepcopy
 from random import randint
 
 from snowfakery import data_gen_exceptions as exc
 from snowfakery.object_rows import (
+    CompactObjectRow,
     LazyLoadedObjectReference,
     NicknameSlot,
     ObjectReference,
@@ -27,11 +27,18 @@ class RowHistory:
         table_counters: T.Mapping,
         tables_to_keep_history_for: T.Iterable[str],
         tablename_for_nickname: T.Mapping[str, str],
+        *,
+        database: str = "",
+        nickname_index: bool = True,
     ):
-        self.conn = sqlite3.connect("")
+        # "" is a private temporary database which SQLite can spill to disk.
+        # storage_bench.py compares it with alternatives.
+        self.conn = sqlite3.connect(database)
         self.table_counters = dict(table_counters)
         self.nickname_counters = defaultdict(int)
-        self.reset_locals()
+        self.local_counters = dict(self.table_counters)
+        # have table_counters changed since local_counters were copied?
+        self.counters_changed = False
         # the pattern is A -> A means A is a table
         #                B -> A means B is a nickname and A is a table
         #
@@ -40,13 +47,29 @@ class RowHistory:
             for nick, table in tablename_for_nickname.items()
             if table != nick
         }
-        for table in tables_to_keep_history_for:
-            _make_history_table(self.conn, table)
-        self.pickler = RestrictedPickler(_DISPATCH_TABLE, _SAFE_CLASSES)
+        self.history_tables = set(tables_to_keep_history_for)
+        for table in self.history_tables:
+            _make_history_table(self.conn, table, nickname_index)
+        # other tables, with rows which rows in the history refer to
+        self.referenced_tables = set()
+        # (tablename, id, number of values) of the last row saved to each
+        # of them, and of the rows being saved
+        self.last_referenced_rows = {}
+        self.referenced_rows_being_saved = set()
+        self.pickler = RestrictedPickler(
+            {
+                **_DISPATCH_TABLE,
+                ObjectRow: self._reduce_row,
+                CompactObjectRow: self._reduce_row,
+            },
+            _SAFE_CLASSES,
+        )
 
     def reset_locals(self):
         """Reset the minimum count that counts as "local" """
-        self.local_counters = deepcopy(self.table_counters)
+        if self.counters_changed:
+            self.local_counters = dict(self.table_counters)
+            self.counters_changed = False
 
     def save_row(self, tablename: str, nickname: T.Optional[str], row: dict):
         """Save a row to temporary storage"""
@@ -54,6 +77,7 @@ class RowHistory:
 
         # keep track of highest ID
         self.table_counters[tablename] = row_id
+        self.counters_changed = True
 
         if nickname:
             nickname_id = self._get_nickname_id(tablename, nickname)
@@ -61,11 +85,8 @@ class RowHistory:
         else:
             nickname_id = None
 
-        # note that this dumps a full object tree
-        # that will cause some duplication of data but doing a big
-        # "join" across multiple tables would have other costs (even if done lazily).
-        # For now this seems best and simplest.
-        # The data de-dupling algorithm would be slightly complex and slow.
+        # other rows that this one refers to are saved once, in their own
+        # tables, and referred to by (table, id): see _reduce_row
         data = self.pickler.dumps(row)
         self.conn.execute(
             f'INSERT INTO "{tablename}" VALUES (?, ?, ?, ?)',
@@ -149,13 +170,77 @@ class RowHistory:
 
         return first_row[0]
 
+    def table_sizes(self) -> T.Dict[str, int]:
+        """How many rows have been saved for each table"""
+        tables = self.conn.execute("SELECT name FROM sqlite_master WHERE type='table'")
+        return {
+            table: self.conn.execute(f'SELECT COUNT(*) FROM "{table}"').fetchone()[0]
+            for (table,) in tables.fetchall()
+        }
+
+    def database_size(self) -> int:
+        """Size of the history database in bytes"""
+        (page_count,) = self.conn.execute("PRAGMA page_count").fetchone()
+        (page_size,) = self.conn.execute("PRAGMA page_size").fetchone()
+        return page_count * page_size
+
+    def _reduce_row(self, row: ObjectRow):
+        """Pickle a row which another row refers to as a reference, which
+        loads the row from the database when its fields are read"""
+        tablename, row_id = row._tablename, row._id
+        if tablename not in self.history_tables:
+            self._save_referenced_row(row)
+        elif not self._is_saved(tablename, row_id):
+            # e.g. a parent which is still generating its fields. It will be
+            # saved when it is finished, so save what it has so far inline.
+            return (ObjectRow, (tablename, row._values))
+        return (LazyLoadedObjectReference, (tablename, row_id, tablename))
+
+    def _is_saved(self, tablename: str, row_id: int) -> bool:
+        """Has save_row saved this row?"""
+        # rows are usually saved in order of their ids, but a parent is
+        # saved after its nested children
+        if row_id > self.table_counters.get(tablename, 0):
+            return False
+        qr = self.conn.execute(
+            f'SELECT 1 FROM "{tablename}" WHERE id=?',
+            (row_id,),
+        )
+        return next(qr, None) is not None
+
+    def _save_referenced_row(self, row: ObjectRow):
+        """Save a row that is not otherwise kept in the history"""
+        tablename, row_id, values = row._tablename, row._id, row._values
+        # Rows are often referred to by several rows in turn, e.g. by their
+        # children. A row which is still being generated gains values, so
+        # it is saved again.
+        key = (tablename, row_id, len(values))
+        if (
+            self.last_referenced_rows.get(tablename) == key
+            or key in self.referenced_rows_being_saved  # in a cycle of rows
+        ):
+            return
+        if tablename not in self.referenced_tables:
+            _make_history_table(self.conn, tablename, nickname_index=False)
+            self.referenced_tables.add(tablename)
+        self.last_referenced_rows[tablename] = key
+        self.referenced_rows_being_saved.add(key)
+        try:
+            data = self.pickler.dumps(values)
+        finally:
+            self.referenced_rows_being_saved.discard(key)
+        self.conn.execute(
+            f'INSERT OR REPLACE INTO "{tablename}" (id, data) VALUES (?, ?)',
+            (row_id, data),
+        )
+
     def _get_nickname_id(self, tablename: str, nickname: str):
         """Get a unique auto-incrementing nickname identifier for a new row"""
         self.nickname_counters[nickname] += 1
         return self.nickname_counters[nickname]
 
 
-def _make_history_table(conn, tablename):
+def _make_history_table(conn, tablename, nickname_index: bool = True):
     """Make a history table"""
 
     c = conn.cursor()
@@ -163,10 +248,11 @@ def _make_history_table(conn, tablename):
         f'CREATE TABLE "{tablename}" (id INTEGER NOT NULL UNIQUE, nickname VARCHAR, nickname_id INTEGER, data VARCHAR NOT NULL)'
     )
     # helps with sparsely scattered nicknames. Of debatable value. Can speed up benchmarks
-    # but hard to see it in real recipes.
-    c.execute(
-        f'CREATE UNIQUE INDEX "{tablename}_nickname_id" ON "{tablename}" (nickname, nickname_id);'
-    )
+    # but hard to see it in real recipes. Measure with tools/storage_bench.py
+    if nickname_index:
+        c.execute(
+            f'CREATE UNIQUE INDEX "{tablename}_nickname_id" ON "{tablename}" (nickname, nickname_id);'
+        )
 
 
 _DISPATCH_TABLE = {
@@ -174,10 +260,12 @@ _DISPATCH_TABLE = {
         ObjectReference,
         (n._tablename, n.allocated_id),
     ),
-    ObjectRow: lambda v: (
-        ObjectRow,
-        (v._tablename, v._values),
+    # without any data it has loaded
+    LazyLoadedObjectReference: lambda r: (
+        LazyLoadedObjectReference,
+        (r._tablename, r.id, r.sql_tablename),
     ),
+    # ObjectRows are pickled by RowHistory._reduce_row
 }
 
 _SAFE_CLASSES = {
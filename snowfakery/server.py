@@ -0,0 +1,335 @@
+"""A long-running Snowfakery process which generates data on request.
+
+`snowfakery serve` keeps parsed recipes and prepared Fakers in memory
+between jobs, so pipelines which generate many small datasets do not pay
+for Python start-up, imports and recipe parsing every time.
+
+Jobs are JSON objects POSTed to /generate, over HTTP on localhost or over
+a Unix domain socket. Each job names a recipe and accepts the same
+generation settings as the command line. Text output (json, txt, sql,
+dot) is streamed back in the response unless the job names an output
+file, folder or database for the server to write to.
+
+The server trusts its clients: jobs can read and write any path that
+the server process can. Do not expose it beyond the local machine.
+"""
+
+import hashlib
+import json
+import os
+import socketserver
+import typing as T
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import StringIO
+from pathlib import Path
+from threading import BoundedSemaphore, Lock
+
+from snowfakery.__about__ import __version__
+from snowfakery.api import (
+    COUNT_REPS,
+    PreparedRecipe,
+    SnowfakeryApplication,
+    get_output_stream_class,
+    prepare_recipe,
+    stopping_criteria_from_target_number,
+)
+from snowfakery.data_gen_exceptions import DataGenError
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8642
+DEFAULT_WORKERS = 4
+
+# job properties which are passed straight through to PreparedRecipe.run
+RUN_SETTINGS = (
+    "output_format",
+    "output_file",
+    "output_folder",
+    "dburl",
+    "continuation_file",
+    "generate_continuation_file",
+    "strict_mode",
+)
+JOB_PROPERTIES = frozenset(
+    (
+        "recipe",
+        "recipe_text",
+        "plugin_options",
+        "options",
+        "target_number",
+        "reps",
+        *RUN_SETTINGS,
+    )
+)
+
+
+class JobApplication(SnowfakeryApplication):
+    """Collects the messages from a job so they can be sent to the client"""
+
+    def __init__(self, target_number=None):
+        super().__init__(stopping_criteria_from_target_number(target_number))
+        self.messages = []
+
+    def echo(self, message=None, file=None, nl=True, err=False, color=None):
+        if message is not None:
+            self.messages.append(str(message))
+
+
+class PreparedRecipeCache:
+    """Prepared recipes, keyed by recipe and plugin options.
+
+    Recipe files are re-parsed when they, or any file they include, have
+    been modified since they were prepared."""
+
+    def __init__(self, recipe_cache_dir=None, max_size: int = 64):
+        self.recipe_cache_dir = recipe_cache_dir
+        self.max_size = max_size
+        self._recipes: T.MutableMapping[tuple, tuple] = OrderedDict()
+        # guards _recipes and _preparing, but not preparation itself, so
+        # that other recipes do not wait for a slow one
+        self._lock = Lock()
+        # a lock for each recipe being prepared, so it is prepared once
+        self._preparing: T.Dict[tuple, Lock] = {}
+
+    def get(self, job: T.Mapping) -> PreparedRecipe:
+        key = self._key(job)
+        with self._lock:
+            prepared = self._fresh(key)
+            if prepared:
+                return prepared
+            key_lock = self._preparing.setdefault(key, Lock())
+
+        with key_lock:
+            with self._lock:
+                # another request may have prepared it while we waited
+                prepared = self._fresh(key)
+            if prepared:
+                return prepared
+            try:
+                prepared = self._prepare(job)
+                paths = prepared.parse_result.included_files
+                if job.get("recipe"):
+                    paths = [Path(job["recipe"]), *paths]
+                entry = (prepared, paths, _modification_times(paths))
+            except BaseException:
+                with self._lock:
+                    self._preparing.pop(key, None)
+                raise
+            with self._lock:
+                self._preparing.pop(key, None)
+                self._recipes[key] = entry
+                self._recipes.move_to_end(key)
+                if len(self._recipes) > self.max_size:
+                    self._recipes.popitem(last=False)
+            return prepared
+
+    def _fresh(self, key: tuple) -> T.Optional[PreparedRecipe]:
+        """The cached recipe for key, unless its files have changed"""
+        entry = self._recipes.get(key)
+        if entry and _modification_times(entry[1]) == entry[2]:
+            self._recipes.move_to_end(key)
+            return entry[0]
+        return None
+
+    def _key(self, job: T.Mapping) -> tuple:
+        plugin_options = json.dumps(job.get("plugin_options") or {}, sort_keys=True)
+        if job.get("recipe_text") is not None:
+            text = job["recipe_text"].encode("utf-8")
+            return ("text", hashlib.sha256(text).hexdigest(), plugin_options)
+        return ("file", str(Path(job["recipe"]).absolute()), plugin_options)
+
+    def _prepare(self, job: T.Mapping) -> PreparedRecipe:
+        if job.get("recipe_text") is not None:
+            recipe = StringIO(job["recipe_text"])
+        else:
+            recipe = job["recipe"]
+        return prepare_recipe(
+            recipe,
+            plugin_options=job.get("plugin_options"),
+            recipe_cache_dir=self.recipe_cache_dir,
+        )
+
+
+def _modification_times(paths: T.Sequence[Path]) -> T.Tuple[int, ...]:
+    return tuple(os.stat(path).st_mtime_ns for path in paths)
+
+
+def check_job(job) -> T.Dict[str, T.Any]:
+    """Validate a job and convert it to keyword arguments for PreparedRecipe.run"""
+    if not isinstance(job, dict):
+        raise DataGenError("A job must be a JSON object")
+    unknown = set(job) - JOB_PROPERTIES
+    if unknown:
+        raise DataGenError(f"Unknown job properties: {', '.join(sorted(unknown))}")
+    if (job.get("recipe") is None) == (job.get("recipe_text") is None):
+        raise DataGenError("A job needs exactly one of `recipe` or `recipe_text`")
+    if job.get("target_number") and job.get("reps"):
+        raise DataGenError("A job can have `target_number` or `reps`, not both")
+
+    settings = {name: job[name] for name in RUN_SETTINGS if job.get(name)}
+    settings["user_options"] = job.get("options") or {}
+    if job.get("target_number"):
+        settings["target_number"] = tuple(job["target_number"])
+    elif job.get("reps"):
+        settings["target_number"] = (COUNT_REPS, int(job["reps"]))
+    return settings
+
+
+def is_streamed(settings: T.Mapping) -> bool:
+    """Jobs which do not say where to put their output get it in the response"""
+    return not any(
+        settings.get(name) for name in ("output_file", "output_folder", "dburl")
+    )
+
+
+class ChunkedWriter:
+    """A text stream which sends what is written as HTTP/1.1 chunks"""
+
+    def __init__(self, wfile):
+        self.wfile = wfile
+
+    def write(self, data: str):
+        if data:
+            encoded = data.encode("utf-8")
+            self.wfile.write(b"%x\r\n%s\r\n" % (len(encoded), encoded))
+
+    def flush(self):
+        self.wfile.flush()
+
+    def finish(self):
+        self.wfile.write(b"0\r\n\r\n")
+        self.wfile.flush()
+
+
+class JobHandler(BaseHTTPRequestHandler):
+    server_version = f"snowfakery/{__version__}"
+    protocol_version = "HTTP/1.1"
+
+    server: "JobServerMixin"
+
+    def address_string(self):
+        # Unix domain socket clients have no address
+        return self.client_address[0] if self.client_address else "local"
+
+    def do_GET(self):
+        if self.path == "/health":
+            self.send_json(200, {"status": "ok"})
+        else:
+            self.send_json(404, {"error": f"Not found: {self.path}"})
+
+    def do_POST(self):
+        if self.path != "/generate":
+            self.send_json(404, {"error": f"Not found: {self.path}"})
+            return
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            job = json.loads(self.rfile.read(length) or b"null")
+            settings = check_job(job)
+            prepared = self.server.recipes.get(job)
+        except (ValueError, OSError, DataGenError) as e:
+            self.send_json(400, {"error": str(e)})
+            return
+
+        with self.server.workers:
+            if is_streamed(settings):
+                self.stream_job(prepared, settings)
+            else:
+                self.run_job(prepared, settings)
+
+    def run_job(self, prepared: PreparedRecipe, settings: T.Dict[str, T.Any]):
+        application = JobApplication(settings.get("target_number"))
+        try:
+            prepared.run(parent_application=application, **settings)
+        except DataGenError as e:
+            self.send_json(422, {"error": str(e), "messages": application.messages})
+        except Exception as e:
+            self.log_error("Job failed: %r", e)
+            self.send_json(500, {"error": str(e), "messages": application.messages})
+        else:
+            self.send_json(200, {"status": "ok", "messages": application.messages})
+
+    def stream_job(self, prepared: PreparedRecipe, settings: T.Dict[str, T.Any]):
+        output_format = settings.pop("output_format", None) or "txt"
+        try:
+            stream_class = get_output_stream_class(output_format)
+            if not stream_class.is_text:
+                raise DataGenError(
+                    f"Cannot stream {output_format} output: supply an `output_file`"
+                )
+        except DataGenError as e:
+            self.send_json(400, {"error": str(e)})
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; charset=utf-8")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        writer = ChunkedWriter(self.wfile)
+        try:
+            output_stream = stream_class(writer, format=output_format)
+            prepared.run(
+                output_stream=output_stream,
+                parent_application=JobApplication(settings.get("target_number")),
+                **settings,
+            )
+            output_stream.close()
+        except Exception as e:
+            # The status has already been sent, so end the response without
+            # its final chunk to tell the client that the output is incomplete.
+            self.log_error("Job failed: %r", e)
+            self.close_connection = True
+            return
+        writer.finish()
+
+    def send_json(self, status: int, data: T.Mapping):
+        body = json.dumps(data).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class JobServerMixin:
+    """State shared by the request handlers of a server"""
+
+    daemon_threads = True
+
+    def __init__(self, address, workers=DEFAULT_WORKERS, recipe_cache_dir=None):
+        # limits how many jobs generate data at the same time
+        self.workers = BoundedSemaphore(workers)
+        self.recipes = PreparedRecipeCache(recipe_cache_dir)
+        super().__init__(address, JobHandler)
+
+
+class TCPJobServer(JobServerMixin, ThreadingHTTPServer):
+    pass
+
+
+if hasattr(socketserver, "ThreadingUnixStreamServer"):
+
+    class UnixJobServer(JobServerMixin, socketserver.ThreadingUnixStreamServer):
+        def server_bind(self):
+            path = Path(self.server_address)
+            if path.is_socket():  # left behind by a server which was killed
+                path.unlink()
+            super().server_bind()
+
+        def server_close(self):
+            super().server_close()
+            Path(self.server_address).unlink(missing_ok=True)
+
+
+def make_server(
+    host: str = DEFAULT_HOST,
+    port: int = DEFAULT_PORT,
+    socket_path: T.Union[Path, str, None] = None,
+    workers: int = DEFAULT_WORKERS,
+    recipe_cache_dir=None,
+) -> socketserver.BaseServer:
+    """Create a server listening on socket_path if supplied, else host:port"""
+    if socket_path:
+        if not hasattr(socketserver, "ThreadingUnixStreamServer"):
+            raise DataGenError("Unix domain sockets are not available on this OS")
+        return UnixJobServer(str(socket_path), workers, recipe_cache_dir)
+    return TCPJobServer((host, port), workers, recipe_cache_dir)
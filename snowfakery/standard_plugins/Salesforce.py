@@ -161,9 +161,8 @@ class SalesforceConnectionMixin:
         return self._sf_connection
 
     def get_project_config_and_org_config(self):
-        fieldvars = self.context.field_vars()
-        project_config = fieldvars.get(plugin_option_project_config)
-        org_config = fieldvars.get(plugin_option_org_config)
+        project_config = self.context.option(plugin_option_project_config)
+        org_config = self.context.option(plugin_option_org_config)
 
         if not project_config or not org_config:
             project_config, org_config = self._get_org_info_from_cli_keychain()
@@ -190,15 +189,14 @@ class SalesforceConnectionMixin:
 
     def get_org_name(self):
         """Look up the org_name in the scope"""
-        fieldvars = self.context.field_vars()
-        try:
-            return fieldvars[plugin_option_org_name]
-        except KeyError:
+        org_name = self.context.option(plugin_option_org_name)
+        if org_name is None:
             raise DataGenNameError(
                 "Orgname is not specified. Use --plugin-option org_name <yourorgname>",
                 None,
                 None,
             )
+        return org_name
 
 
 class Salesforce(ParserMacroPlugin, SnowfakeryPlugin, SalesforceConnectionMixin):
@@ -0,0 +1,54 @@
+from snowfakery import SnowfakeryPlugin
+from snowfakery.plugins import PluginOption
+from snowfakery.standard_plugins.UniqueId import as_bool
+
+# the option names that the user specifies on the CLI or API are short,
+# e.g. "faker_pool_size", but using long names internally prevents us
+# from clashing with the user's variable names.
+plugin_option_faker_pool_size = (
+    "snowfakery.standard_plugins.Tuning.Tuning.faker_pool_size"
+)
+plugin_option_memory_bounded = (
+    "snowfakery.standard_plugins.Tuning.Tuning.memory_bounded"
+)
+plugin_option_memory_report = "snowfakery.standard_plugins.Tuning.Tuning.memory_report"
+plugin_option_freeze_now = "snowfakery.standard_plugins.Tuning.Tuning.freeze_now"
+plugin_option_columnar = "snowfakery.standard_plugins.Tuning.Tuning.columnar"
+plugin_option_iterations_per_check = (
+    "snowfakery.standard_plugins.Tuning.Tuning.iterations_per_check"
+)
+
+
+class Tuning(SnowfakeryPlugin):
+    """Performance options for large or long-running data generation jobs.
+
+    These options trade a little bit of variety or determinism for speed.
+    All of them are off by default.
+
+    faker_pool_size: sample common argument-less fakes (first_name, city, ...)
+                     from pre-generated pools of this size.
+    memory_bounded: keep only shallow snapshots of just_once objects, which
+                    refer to other rows by id, so that they do not keep
+                    whole graphs of rows alive.
+    memory_report: print a summary of the memory used when finished.
+    freeze_now: `now` is the same for every row generated in an iteration
+                of the recipe, instead of being read from the clock each time.
+    columnar: generate simple templates a block of rows at a time with
+              NumPy. See snowfakery.columnar.
+    iterations_per_check: with a --target-number, run the recipe this many
+                          times between checks of whether the target has
+                          been reached, which may overshoot it.
+    """
+
+    allowed_options = [
+        PluginOption(plugin_option_faker_pool_size, int),
+        PluginOption(plugin_option_memory_bounded, as_bool),
+        PluginOption(plugin_option_memory_report, as_bool),
+        PluginOption(plugin_option_freeze_now, as_bool),
+        PluginOption(plugin_option_columnar, as_bool),
+        PluginOption(plugin_option_iterations_per_check, int),
+    ]
+
+    def custom_functions(self, *args, **kwargs):
+        """This plugin doesn't provide custom functions, only options."""
+        return type("EmptyFunctions", (), {})()
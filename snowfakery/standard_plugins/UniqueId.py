@@ -4,8 +4,6 @@ from itertools import count
 from math import log
 import string
 
-from baseconv import BaseConverter
-
 
 from snowfakery import SnowfakeryPlugin
 from snowfakery.plugins import PluginResult, PluginOption
@@ -214,6 +212,8 @@ class AlphaUniquifier(PluginResult):
             pid=pid, parts=parts, start=1001, randomize=False
         )
         self.alphabet = alphabet or string.digits + string.ascii_uppercase
+        from baseconv import BaseConverter
+
         self.alpha_encoder = BaseConverter(self.alphabet).encode
         self.min_chars = min_chars
         self.result = {}  # implementation detail of PluginResults
@@ -254,13 +254,11 @@ class UniqueId(SnowfakeryPlugin):
 
         @property
         def _pid(self):
-            fieldvars = self.context.field_vars()
-            return fieldvars.get(plugin_option_pid)
+            return self.context.option(plugin_option_pid)
 
         @property
         def _bigids(self):
-            fieldvars = self.context.field_vars()
-            return fieldvars.get(plugin_option_big_ids)
+            return self.context.option(plugin_option_big_ids)
 
         @property
         def default_uniqifier(self):
@@ -5,9 +5,6 @@ from pathlib import Path
 from random import shuffle
 from typing import Any, Optional
 
-from sqlalchemy import MetaData, create_engine
-from sqlalchemy.sql.elements import quoted_name
-from sqlalchemy.sql.expression import func, select
 from yaml.representer import Representer
 
 from snowfakery.data_gen_exceptions import DataGenError, DataGenNameError
@@ -24,6 +21,13 @@ from snowfakery.utils.yaml_utils import SnowfakeryDumper
 
 def _open_db(db_url):
     "Internal function for opening the database up."
+    # SQLAlchemy is slow to import so only do it for SQL datasets
+    from sqlalchemy import MetaData, create_engine
+    from sqlalchemy.sql.elements import quoted_name
+
+    # table names from the database can end up in continuation files
+    SnowfakeryDumper.add_representer(quoted_name, Representer.represent_str)  # type: ignore
+
     engine = create_engine(db_url)
     metadata = MetaData()
     metadata.reflect(views=True, bind=engine)
@@ -106,6 +110,8 @@ class SQLDatasetLinearIterator(SQLDatasetIterator):
     "Iterator that reads a SQL table from top to bottom"
 
     def query(self):
+        from sqlalchemy.sql.expression import select
+
         return select(self.table)
 
 
@@ -113,6 +119,8 @@ class SQLDatasetRandomPermutationIterator(SQLDatasetIterator):
     "Iterator that reads a SQL table in random order"
 
     def query(self):
+        from sqlalchemy.sql.expression import func, select
+
         return select(self.table).order_by(func.random())
 
 
@@ -192,7 +200,7 @@ class DatasetBase:
         self.datasets = {}
 
     def _get_dataset_instance(self, plugin_context, iteration_mode, kwargs):
-        filename = plugin_context.field_vars()["template"].filename
+        filename = plugin_context.lookup("template").filename
         assert filename
         rootpath = Path(filename).parent
         dataset_instance = self._load_dataset(iteration_mode, rootpath, kwargs)
@@ -224,32 +232,55 @@ class FileDataset(DatasetBase):
         tablename = kwargs.get("table")
         repeat = kwargs.get("repeat", True)
 
-        with chdir(rootpath):
-            if "://" in dataset:
-                iterator = sql_dataset(dataset, tablename, iteration_mode, repeat)
-                self._iterators.append(iterator)
-                return iterator
+        # Paths are relative to the recipe. They are resolved without
+        # changing the working directory, which other jobs in the same
+        # process (e.g. `snowfakery serve`) may depend on.
+        if "://" in dataset:
+            iterator = sql_dataset(
+                _resolve_db_url(dataset, rootpath), tablename, iteration_mode, repeat
+            )
+            self._iterators.append(iterator)
+            return iterator
+        else:
+            filename = Path(rootpath) / dataset
+
+            if not filename.exists():
+                raise FileNotFoundError("File not found:" + str(dataset))
+
+            if filename.suffix != ".csv":
+                raise AssertionError(
+                    f"Filename extension must be .csv, not {filename.suffix}"
+                )
+
+            if iteration_mode == "linear":
+                iterator = CSVDatasetLinearIterator(filename, repeat)
+            elif iteration_mode == "shuffle":
+                iterator = CSVDatasetRandomPermutationIterator(filename, repeat)
             else:
-                filename = Path(dataset)
+                iterator = None
 
-                if not filename.exists():
-                    raise FileNotFoundError("File not found:" + str(filename))
+            if iterator:
+                self._iterators.append(iterator)
+            return iterator
 
-                if filename.suffix != ".csv":
-                    raise AssertionError(
-                        f"Filename extension must be .csv, not {filename.suffix}"
-                    )
 
-                if iteration_mode == "linear":
-                    iterator = CSVDatasetLinearIterator(filename, repeat)
-                elif iteration_mode == "shuffle":
-                    iterator = CSVDatasetRandomPermutationIterator(filename, repeat)
-                else:
-                    iterator = None
+def _resolve_db_url(db_url: str, rootpath) -> str:
+    """Make the path of a SQLite database URL relative to rootpath"""
+    from sqlalchemy.engine import make_url
 
-                if iterator:
-                    self._iterators.append(iterator)
-                return iterator
+    url = make_url(db_url)
+    database = url.database
+    if (
+        url.get_backend_name() != "sqlite"
+        or not database
+        or database == ":memory:"
+        or database.startswith("file:")
+        or Path(database).is_absolute()
+    ):
+        return db_url
+    return url.set(database=str(Path(rootpath) / database)).render_as_string(
+        hide_password=False
+    )
 
 
 class DatasetPluginBase(SnowfakeryPlugin):
@@ -470,7 +501,7 @@ class Dataset(DatasetPluginBase):
 def chdir(path):
     """Context manager that changes to another directory
 
-    Not thread-safe!!!
+    Not thread-safe!!! Datasets no longer use it: see FileDataset._load_dataset
     """
     cwd = os.getcwd()
     os.chdir(path)
@@ -478,6 +509,3 @@ def chdir(path):
         yield
     finally:
         os.chdir(cwd)
-
-
-SnowfakeryDumper.add_representer(quoted_name, Representer.represent_str)  # type: ignore
@@ -3,7 +3,7 @@ from numpy.random import seed
 import math
 
 
-from snowfakery.plugins import SnowfakeryPlugin
+from snowfakery.plugins import BATCH_SUFFIX, SnowfakeryPlugin
 from snowfakery.utils.validation_utils import resolve_value
 
 
@@ -18,6 +18,20 @@ def wrap(distribution):
     return _distribution_wrapper
 
 
+def wrap_batch(distribution):
+    "Wrap a numpy function to return n values, as the wrapper above would"
+
+    def _distribution_batch_wrapper(self, n, /, **params):
+        random_seed = params.pop("seed", None)
+        seed(random_seed)
+        if random_seed is not None:
+            # a seeded distribution returns the same value every time
+            return [float(distribution(**params, size=1).astype(float)[0])] * n
+        return distribution(**params, size=n).astype(float).tolist()
+
+    return _distribution_batch_wrapper
+
+
 class StatisticalDistributions(SnowfakeryPlugin):
     class Functions:
         pass
@@ -455,3 +469,8 @@ class StatisticalDistributions(SnowfakeryPlugin):
 for distribution in [normal, lognormal, binomial, exponential, poisson, gamma]:
     func_name = distribution.__name__
     setattr(StatisticalDistributions.Functions, func_name, wrap(distribution))
+    setattr(
+        StatisticalDistributions.Functions,
+        func_name + BATCH_SUFFIX,
+        wrap_batch(distribution),
+    )
@@ -5,7 +5,6 @@ from datetime import date, datetime
 from functools import lru_cache
 from datetime import timezone
 from typing import Any, List, Tuple, Union
-from unittest.mock import MagicMock
 
 import dateutil.parser
 from dateutil.relativedelta import relativedelta
@@ -13,7 +12,11 @@ from faker import Faker
 from faker.providers.date_time import Provider as DateProvider
 
 import snowfakery.data_generator_runtime  # noqa
-from snowfakery.fakedata.fake_data_generator import UTCAsRelDelta, _normalize_timezone
+from snowfakery.fakedata.fake_data_generator import (
+    UTCAsRelDelta,
+    _normalize_timezone,
+    prepared_faker,
+)
 from snowfakery.object_rows import ObjectReference
 from snowfakery.plugins import PluginContext, SnowfakeryPlugin, lazy, memorable
 from snowfakery.row_history import RandomReferenceContext
@@ -92,13 +95,23 @@ def render_boolean(context: PluginContext, value: FieldDefinition) -> bool:
     return bool(val)
 
 
+@lru_cache(maxsize=None)
+def _faker_for_dates() -> Faker:
+    """A Faker for random_date and friends, created on first use"""
+    return Faker(use_weighting=False)
+
+
 class StandardFuncs(SnowfakeryPlugin):
     class Functions:
         int = int
+
         # use ONLY for random_dates
         # anything else should use the Faker from the Interpreter
         # which is locale-scoped.
-        _faker_for_dates = Faker(use_weighting=False)
+        @property
+        def _faker_for_dates(self) -> Faker:
+            return _faker_for_dates()
+
         _uidgen = None
 
         def __init__(self, *args, **kwargs):
@@ -193,7 +206,7 @@ class StandardFuncs(SnowfakeryPlugin):
 
         def i18n_fake(self, locale: str, fake: str):
             # deprecated by still here for backwards compatibility
-            faker = Faker(locale, use_weighting=False)
+            faker = prepared_faker(locale).faker
             func = getattr(faker, fake)
             return func()
 
@@ -220,7 +233,7 @@ class StandardFuncs(SnowfakeryPlugin):
             elif isinstance(x, str):  # name of an object
                 # allows dotted paths
                 parts = x.split(".")
-                target = self.context.field_vars().get(parts.pop(0))
+                target = self.context.lookup(parts.pop(0))
 
                 for part in parts:
                     try:
@@ -380,7 +393,7 @@ class StandardFuncs(SnowfakeryPlugin):
             return rc
 
         def _snowfakery_filename(self):
-            template = self.context.field_vars()["template"]
+            template = self.context.lookup("template")
             return template.filename
 
         @property
@@ -1409,6 +1422,8 @@ class StandardFuncs(SnowfakeryPlugin):
 
             # Return intelligent mock: Mock RandomReferenceContext
             # Create a mock row_history (RandomReferenceContext needs it but we can use a mock)
+            from unittest.mock import MagicMock
+
             mock_row_history = MagicMock()
             to_str = str(to_val) if to_val and isinstance(to_val, str) else "MockObject"
             scope_str = (
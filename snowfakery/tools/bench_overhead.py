@@ -1,13 +1,84 @@
-from snowfakery import generate_data
+"""Measure the fixed overhead of a Snowfakery run.
+
+Reports the time to import the CLI in a fresh interpreter and the time
+to generate a one-line recipe. Pass --max-import-seconds to fail (exit
+code 1) when importing takes longer than that, e.g. in CI.
+
+    python -m snowfakery.tools.bench_overhead --max-import-seconds 0.6
+"""
+
+import subprocess
+import sys
 from io import StringIO
 from timeit import timeit
 
+import click
+
 yaml = "- object: Foo"
 
+# modules that a plain text-output run should never need to import
+HEAVY_MODULES = ("sqlalchemy", "numpy", "baseconv", "requests", "pydantic")
+
+CHECK_IMPORTS = f"""
+import sys, snowfakery.cli
+from io import StringIO
+from snowfakery import generate_data
+generate_data(StringIO({yaml!r}), output_file=StringIO(), output_format="txt")
+loaded = {{name.split(".")[0] for name in sys.modules}}
+print(" ".join(sorted(loaded.intersection({HEAVY_MODULES!r}))))
+"""
+
+
+def import_time(repeat: int) -> float:
+    "Best-of-N wall clock time to import the CLI in a fresh Python process"
+
+    def import_cli():
+        subprocess.run([sys.executable, "-c", "import snowfakery.cli"], check=True)
+
+    baseline = min(
+        timeit(lambda: subprocess.run([sys.executable, "-c", "pass"]), number=1)
+        for _ in range(repeat)
+    )
+    return min(timeit(import_cli, number=1) for _ in range(repeat)) - baseline
+
+
+def heavy_imports() -> str:
+    "Heavy modules imported by a minimal run, as a space-separated string"
+    return subprocess.run(
+        [sys.executable, "-c", CHECK_IMPORTS],
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout.strip()
+
 
 def gen():
+    from snowfakery import generate_data
+
     with StringIO(yaml) as f:
         generate_data(f, output_file="/dev/null", output_format="txt")
 
 
-print(timeit(gen, number=1))
+@click.command()
+@click.option("--repeat", default=5, help="Number of processes to time")
+@click.option(
+    "--max-import-seconds",
+    type=float,
+    help="Fail if importing the CLI takes longer than this",
+)
+def main(repeat: int, max_import_seconds: float):
+    seconds = import_time(repeat)
+    click.echo(f"import snowfakery.cli: {seconds:.3f}s")
+
+    heavy = heavy_imports()
+    click.echo(f"heavy modules imported: {heavy or 'none'}")
+
+    click.echo(f"first run: {timeit(gen, number=1):.3f}s")
+    click.echo(f"later runs: {timeit(gen, number=repeat) / repeat:.3f}s")
+
+    if heavy or (max_import_seconds and seconds > max_import_seconds):
+        sys.exit(1)
+
+
+if __name__ == "__main__":  # pragma: no cover
+    main()
@@ -0,0 +1,543 @@
+"""A suite of benchmarks for catching performance regressions.
+
+Each case times one aspect of Snowfakery: start-up, recipe parsing,
+simple fields, Faker-heavy tables, deeply nested friends, random_reference
+against a large table, datasets, unique ids and each output stream.
+
+Results are saved as JSON so that a release candidate can be compared
+against a baseline taken from an earlier commit:
+
+    python -m snowfakery.tools.benchmark_suite run --save main
+    (switch to the branch being tested)
+    python -m snowfakery.tools.benchmark_suite compare main
+
+`compare` exits with code 1 if any case got slower than the threshold.
+Baselines are only comparable when they were taken on the same machine
+with the same --scale.
+"""
+
+import json
+import platform
+import sqlite3
+import sys
+import typing as T
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from io import StringIO
+from itertools import count
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from time import perf_counter
+
+import click
+
+from snowfakery import prepare_recipe
+from snowfakery.__about__ import __version__
+from snowfakery.api import COUNT_REPS, SnowfakeryApplication, StoppingCriteria
+from snowfakery.output_streams import OutputStream
+
+DEFAULT_BASELINE_DIR = Path(".benchmarks")
+DEFAULT_THRESHOLD = 0.15
+benchmark_1 = Path(__file__).parent / "benchmark_1.yml"
+
+SIMPLE_FIELDS = """
+- object: Row
+  fields:
+    text: Some literal text
+    number: 42
+    formula: ${{id * 2}}
+    string_formula: Row number ${{id}}
+    choice:
+      random_choice:
+        - red
+        - green
+        - blue
+    random: ${{random_number(1, 1000)}}
+"""
+
+NESTED_FRIENDS = """
+- object: Level1
+  fields:
+    name: L1-${{id}}
+  friends:
+    - object: Level2
+      count: 2
+      fields:
+        parent:
+          reference: Level1
+      friends:
+        - object: Level3
+          count: 2
+          fields:
+            parent:
+              reference: Level2
+          friends:
+            - object: Level4
+              count: 2
+              fields:
+                parent:
+                  reference: Level3
+                grandparent: ${{parent.parent.name}}
+"""
+
+RANDOM_REFERENCE = """
+- option: count
+  default: 1000
+- object: Target
+  count: ${{count}}
+  fields:
+    name: Target ${{id}}
+- object: Referrer
+  count: ${{count}}
+  fields:
+    target:
+      random_reference: Target
+    target_name: ${{target.name}}
+"""
+
+DATASET = """
+- plugin: snowfakery.standard_plugins.datasets.Dataset
+- object: FromCSV
+  fields:
+    __address:
+      Dataset.iterate:
+        dataset: addresses.csv
+    street: ${{__address.Number}} ${{__address.Street}}
+- object: FromSQL
+  fields:
+    __address:
+      Dataset.shuffle:
+        dataset: sqlite:///addresses.db
+    street: ${{__address.Number}} ${{__address.Street}}
+"""
+
+UNIQUE_IDS = """
+- plugin: snowfakery.standard_plugins.UniqueId
+- object: Row
+  fields:
+    unique: ${{unique_id}}
+    alpha: ${{unique_alpha_code}}
+    email: user${{unique_id}}@example.com
+"""
+
+# formats which are written to a single file
+FILE_OUTPUT_FORMATS = ("txt", "json", "sql", "dot")
+
+
+class RowCounter(SnowfakeryApplication):
+    """Remembers how many rows the last run generated"""
+
+    progress_interval = float("inf")  # only report when finished
+
+    def __init__(self, stopping_criteria=None):
+        super().__init__(stopping_criteria)
+        self.rows = 0
+
+    def progress(self, event):
+        self.rows = event.total_rows
+
+    def echo(self, *args, **kwargs):
+        pass  # e.g. the names of the CSV files
+
+
+class DiscardingOutputStream(OutputStream):
+    """Rows are prepared for output as usual and then thrown away"""
+
+    def write_single_row(self, tablename, row):
+        pass
+
+    def close(self, **kwargs):
+        pass
+
+
+def reps(number: int):
+    return StoppingCriteria(COUNT_REPS, number)
+
+
+class Case(T.NamedTuple):
+    name: str
+    description: str
+    # a context manager which does any setup, then supplies a function
+    # which runs the benchmark once and returns the number of rows generated
+    setup: T.Callable[[float], T.ContextManager[T.Callable[[], int]]]
+
+
+CASES: T.Dict[str, Case] = {}
+
+
+def case(name: str, description: str):
+    def register(setup):
+        CASES[name] = Case(name, description, contextmanager(setup))
+        return setup
+
+    return register
+
+
+@contextmanager
+def generation(recipe, number: int, **run_kwargs):
+    """Parse recipe once, then generate `number` reps of it per run.
+
+    Output is discarded unless run_kwargs say where it should go."""
+    prepared = prepare_recipe(StringIO(recipe) if isinstance(recipe, str) else recipe)
+    user_options = run_kwargs.pop("user_options", None)
+    destinations = ("output_file", "output_folder", "dburl")
+    if not any(run_kwargs.get(name) for name in destinations):
+        run_kwargs["output_stream"] = DiscardingOutputStream(None)
+
+    def run():
+        counter = RowCounter(reps(number))
+        prepared.run(
+            parent_application=counter, user_options=user_options, **run_kwargs
+        )
+        return counter.rows
+
+    yield run
+
+
+def scaled(number: int, scale: float) -> int:
+    return max(1, int(number * scale))
+
+
+@case("startup", "Start Python and import the command line")
+def startup(scale: float):
+    import subprocess
+
+    def run():
+        subprocess.run([sys.executable, "-c", "import snowfakery.cli"], check=True)
+        return 0
+
+    yield run
+
+
+@case("parse", "Parse and prepare benchmark_1.yml")
+def parse(scale: float):
+    number = scaled(20, scale)
+
+    def run():
+        for _ in range(number):
+            prepare_recipe(benchmark_1)
+        return 0
+
+    yield run
+
+
+@case("simple_fields", "Literals, formulas and random_choice")
+def simple_fields(scale: float):
+    with generation(SIMPLE_FIELDS, scaled(20_000, scale)) as run:
+        yield run
+
+
+@case("faker_heavy", "benchmark_1.yml: Accounts and Contacts full of fakes")
+def faker_heavy(scale: float):
+    with generation(benchmark_1, scaled(1_000, scale)) as run:
+        yield run
+
+
+@case("nested_friends", "Four levels of friends with references")
+def nested_friends(scale: float):
+    with generation(NESTED_FRIENDS, scaled(2_000, scale)) as run:
+        yield run
+
+
+@case("random_reference", "random_reference into a large table")
+def random_reference(scale: float):
+    options = {"count": scaled(20_000, scale)}
+    with generation(RANDOM_REFERENCE, 1, user_options=options) as run:
+        yield run
+
+
+@case("dataset", "Iterate over a CSV and shuffle a SQL dataset")
+def dataset(scale: float):
+    with TemporaryDirectory() as tempdir:
+        addresses = [(n, f"{n} Main Street", "Springfield") for n in range(1, 1001)]
+        csv = ["Number,Street,City"] + [",".join(map(str, row)) for row in addresses]
+        (Path(tempdir) / "addresses.csv").write_text("\n".join(csv) + "\n")
+        with sqlite3.connect(Path(tempdir) / "addresses.db") as db:
+            db.execute("create table addresses (Number, Street, City)")
+            db.executemany("insert into addresses values (?, ?, ?)", addresses)
+        db.close()
+        recipe = Path(tempdir) / "dataset.recipe.yml"
+        recipe.write_text(DATASET)
+        with generation(recipe, scaled(10_000, scale)) as run:
+            yield run
+
+
+@case("unique_id", "unique_id and unique_alpha_code")
+def unique_id(scale: float):
+    with generation(UNIQUE_IDS, scaled(5_000, scale)) as run:
+        yield run
+
+
+def output_case(output_format: str):
+    @case(f"output_{output_format}", f"simple_fields written as {output_format}")
+    def output(scale: float):
+        with TemporaryDirectory() as tempdir:
+            runs = count()
+
+            def run():
+                path = Path(tempdir) / f"{next(runs)}.{output_format}"
+                with generation(
+                    SIMPLE_FIELDS,
+                    scaled(10_000, scale),
+                    output_format=output_format,
+                    output_file=path,
+                ) as generate:
+                    return generate()
+
+            yield run
+
+
+for output_format in FILE_OUTPUT_FORMATS:
+    output_case(output_format)
+
+
+@case("output_csv", "simple_fields written as a folder of CSV files")
+def output_csv(scale: float):
+    with TemporaryDirectory() as tempdir:
+        runs = count()
+
+        def run():
+            folder = Path(tempdir) / str(next(runs))
+            folder.mkdir()
+            with generation(
+                SIMPLE_FIELDS,
+                scaled(10_000, scale),
+                output_format="csv",
+                output_folder=folder,
+            ) as generate:
+                return generate()
+
+        yield run
+
+
+@case("output_sqlite", "simple_fields written to a SQLite database")
+def output_sqlite(scale: float):
+    with TemporaryDirectory() as tempdir:
+        runs = count()
+
+        def run():
+            dburl = f"sqlite:///{Path(tempdir) / str(next(runs))}.db"
+            with generation(
+                SIMPLE_FIELDS, scaled(10_000, scale), dburl=dburl
+            ) as generate:
+                return generate()
+
+        yield run
+
+
+def select_cases(patterns: T.Sequence[str]) -> T.List[Case]:
+    """Cases whose names contain any of the patterns, or all of them"""
+    return [
+        case
+        for name, case in CASES.items()
+        if not patterns or any(pattern in name for pattern in patterns)
+    ]
+
+
+def time_case(case: Case, repeat: int, scale: float) -> T.Dict[str, T.Any]:
+    """Best-of-`repeat` timing of one case"""
+    with case.setup(scale) as run:
+        timings = []
+        for _ in range(repeat):
+            start = perf_counter()
+            rows = run()
+            timings.append(perf_counter() - start)
+    best = min(timings)
+    return {
+        "seconds": best,
+        "rows": rows,
+        "rows_per_second": rows / best if best else 0.0,
+        "timings": timings,
+    }
+
+
+def run_suite(
+    cases: T.Sequence[Case],
+    repeat: int = 3,
+    scale: float = 1.0,
+    echo: T.Callable[[str], None] = lambda message: None,
+) -> T.Dict[str, T.Any]:
+    results = {}
+    for case in cases:
+        results[case.name] = result = time_case(case, repeat, scale)
+        echo(
+            f"{case.name:<20} {result['seconds']:9.3f}s "
+            f"{result['rows_per_second']:12,.0f} rows/s"
+        )
+    return {
+        "snowfakery_version": __version__,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "machine": platform.node(),
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "repeat": repeat,
+        "scale": scale,
+        "results": results,
+    }
+
+
+class Comparison(T.NamedTuple):
+    name: str
+    baseline: float
+    current: float
+
+    @property
+    def change(self) -> float:
+        "Fractional change in time: positive is slower"
+        return self.current / self.baseline - 1 if self.baseline else 0.0
+
+    def status(self, threshold: float) -> str:
+        if self.change > threshold:
+            return "SLOWER"
+        elif self.change < -threshold:
+            return "faster"
+        return ""
+
+
+def compare_results(baseline: T.Mapping, current: T.Mapping) -> T.List[Comparison]:
+    """Compare the cases which are in both sets of results"""
+    return [
+        Comparison(name, baseline["results"][name]["seconds"], result["seconds"])
+        for name, result in current["results"].items()
+        if name in baseline["results"]
+    ]
+
+
+def comparison_report(comparisons: T.Sequence[Comparison], threshold: float) -> str:
+    lines = [f"{'case':<20} {'baseline(s)':>11} {'current(s)':>11} {'change':>8}"]
+    for comparison in comparisons:
+        lines.append(
+            f"{comparison.name:<20} {comparison.baseline:11.3f} "
+            f"{comparison.current:11.3f} {comparison.change:+8.1%}  "
+            f"{comparison.status(threshold)}".rstrip()
+        )
+    return "\n".join(lines)
+
+
+def results_path(name_or_path: str, baseline_dir: Path) -> Path:
+    """Baselines can be named (stored in baseline_dir) or paths to JSON files"""
+    if name_or_path.endswith(".json"):
+        return Path(name_or_path)
+    return baseline_dir / f"{name_or_path}.json"
+
+
+def load_results(name_or_path: str, baseline_dir: Path) -> T.Dict[str, T.Any]:
+    path = results_path(name_or_path, baseline_dir)
+    if not path.exists():
+        raise click.ClickException(f"No benchmark results at {path}")
+    return json.loads(path.read_text())
+
+
+def save_results(results: T.Mapping, name_or_path: str, baseline_dir: Path) -> Path:
+    path = results_path(name_or_path, baseline_dir)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(results, indent=2) + "\n")
+    return path
+
+
+baseline_dir_option = click.option(
+    "--baseline-dir",
+    type=click.Path(file_okay=False, path_type=Path),
+    default=DEFAULT_BASELINE_DIR,
+    show_default=True,
+    help="Where named results are stored",
+)
+run_options = [
+    click.option(
+        "-k",
+        "patterns",
+        multiple=True,
+        help="Only run cases whose names contain this (repeatable)",
+    ),
+    click.option("--repeat", default=3, show_default=True, help="Best of N runs"),
+]
+
+
+def with_run_options(func):
+    for option in reversed(run_options):
+        func = option(func)
+    return func
+
+
+@click.group()
+def main():
+    "Snowfakery performance benchmarks"
+
+
+@main.command("list")
+def list_cases():
+    "List the benchmark cases"
+    for case in CASES.values():
+        click.echo(f"{case.name:<20} {case.description}")
+
+
+@main.command()
+@with_run_options
+@click.option(
+    "--scale",
+    default=1.0,
+    show_default=True,
+    help="Multiply the size of every case, e.g. 0.1 for a quick check",
+)
+@click.option("--save", help="Save the results under this name, or to a .json file")
+@baseline_dir_option
+def run(patterns, repeat, scale, save, baseline_dir):
+    "Run the benchmarks"
+    results = run_suite(select_cases(patterns), repeat, scale, echo=click.echo)
+    if save:
+        click.echo(f"Saved {save_results(results, save, baseline_dir)}")
+
+
+@main.command()
+@click.argument("baseline")
+@click.argument("current", required=False)
+@with_run_options
+@click.option(
+    "--scale",
+    type=float,
+    help="Check that the baseline was run at this scale (defaults to its scale)",
+)
+@click.option(
+    "--threshold",
+    default=DEFAULT_THRESHOLD,
+    show_default=True,
+    help="Fractional slowdown which counts as a regression",
+)
+@baseline_dir_option
+def compare(baseline, current, patterns, repeat, scale, threshold, baseline_dir):
+    """Compare results against a baseline, failing on regressions.
+
+    Runs the benchmarks in the baseline, at the baseline's scale, unless
+    CURRENT names saved results."""
+    baseline_results = load_results(baseline, baseline_dir)
+    if scale is not None and scale != baseline_results["scale"]:
+        raise click.ClickException(
+            f"--scale {scale} does not match the baseline's scale: "
+            f"{baseline_results['scale']}"
+        )
+    scale = baseline_results["scale"]
+    if current:
+        current_results = load_results(current, baseline_dir)
+    else:
+        cases = [
+            case
+            for case in select_cases(patterns)
+            if case.name in baseline_results["results"]
+        ]
+        current_results = run_suite(cases, repeat, scale)
+    if baseline_results["scale"] != current_results["scale"]:
+        raise click.ClickException(
+            f"Cannot compare results with different scales: "
+            f"{baseline_results['scale']} and {current_results['scale']}"
+        )
+
+    comparisons = compare_results(baseline_results, current_results)
+    click.echo(comparison_report(comparisons, threshold))
+    slower = [c.name for c in comparisons if c.status(threshold) == "SLOWER"]
+    if slower:
+        click.echo(f"Regressions: {', '.join(slower)}", err=True)
+        sys.exit(1)
+
+
+if __name__ == "__main__":  # pragma: no cover
+    main()
@@ -4,10 +4,10 @@ from time import time, sleep
 from tempfile import TemporaryDirectory
 from pathlib import Path
 from collections import defaultdict
+import json
 import locale
 
 import click
-from sqlalchemy import create_engine, inspect, text
 
 from snowfakery import generate_data
 
@@ -117,13 +117,24 @@ def multithreaded_test(
 
 
 def count_databases(tempdir):
-    databases = Path(tempdir).glob("*.db")
+    """Total the latest progress reported by each Snowfakery process"""
     counts = defaultdict(int)
-    for database in databases:
-        count_database(database, counts)
+    for metrics_file in Path(tempdir).glob("*.metrics.jsonl"):
+        for table, count in latest_progress(metrics_file).get("rows", {}).items():
+            counts[table] += count
     return dict(counts)
 
 
+def latest_progress(metrics_file):
+    # the last line may be half-written, so fall back to the one before it
+    for line in reversed(metrics_file.read_text().splitlines()):
+        try:
+            return json.loads(line)
+        except ValueError:
+            pass
+    return {}
+
+
 def status(tempdir, num_records, num_records_tablename, progress_bar):
     start = time()
     sleep(2)
@@ -155,22 +166,7 @@ def report_databases(tempdir, start_time, relevant_table_name):
         f"\n= {int((total / duration) * 3600 *24):n}",
         "records per day",
     )
-    return counts[relevant_table_name]
-
-
-def count_database(filename, counts):
-    dburl = f"sqlite:///{filename}?mode=ro"
-    engine = create_engine(dburl)
-    insp = inspect(engine)
-    tables = insp.get_table_names()  # type: ignore
-    for table in tables:
-        counts[table] += count_table(engine, table)
-    return counts
-
-
-def count_table(engine, tablename):
-    with engine.connect() as c:
-        return c.execute(text(f"select count(Id) from '{tablename}'")).first()[0]
+    return counts.get(relevant_table_name, 0)
 
 
 def snowfakery(recipe, num_records, tablename, outputfile):
@@ -181,6 +177,7 @@ def snowfakery(recipe, num_records, tablename, outputfile):
         recipe,
         target_number=(num_records, tablename),
         dburl=output,
+        metrics_file=f"{outputfile}.metrics.jsonl",
     )
 
 
@@ -1,4 +1,194 @@
-""" Benchmarking tool for the RowHistory backing database"""
+"""Benchmarking tool for the RowHistory backing database.
 
-# Deleted after 2f589a4a44f7ff8e9a4650e978d24839d47f61d9
-# Go back to that PR if you want that code back.
+Measures the throughput of saving rows, loading them and following
+random_references to tables and nicknames, plus the memory and database
+space used, for each combination of history size, SQLite backend and
+with or without the (nickname, nickname_id) index.
+
+    python -m snowfakery.tools.storage_bench --size 10_000 --size 1_000_000
+
+Backends:
+    temp:   a private temporary database which SQLite can spill to disk.
+            This is what Snowfakery uses.
+    memory: an in-memory database
+    file:   a database file in the temporary directory
+
+Sizes of 100M rows and more need tens of GB of disk or memory and take
+hours, so are not run by default.
+"""
+
+import json
+import typing as T
+from datetime import date
+from decimal import Decimal
+from itertools import product
+from pathlib import Path
+from random import randint, seed
+from tempfile import TemporaryDirectory
+from time import perf_counter
+
+import click
+
+from snowfakery.metrics import current_rss
+from snowfakery.object_rows import ObjectRow
+from snowfakery.row_history import RandomReferenceContext, RowHistory
+
+BACKENDS = ("temp", "memory", "file")
+DEFAULT_SIZES = (10_000, 100_000, 1_000_000)
+TABLE = "Account"
+NICKNAME = "special_account"
+NICKNAME_EVERY = 10  # one row in this many has the nickname
+
+
+def make_row(row_id: int) -> dict:
+    "A row similar to what a recipe produces, with a referenced parent row"
+    parent = ObjectRow("Parent", {"id": row_id, "name": f"Parent {row_id}"})
+    return {
+        "id": row_id,
+        "name": f"Account {row_id}",
+        "amount": Decimal(row_id) / 100,
+        "created": date(2020, 1, 1),
+        "description": "Some text which is about this long. " * 3,
+        "parent": parent,
+    }
+
+
+def make_history(backend: str, tempdir: str, nickname_index: bool) -> RowHistory:
+    database = {
+        "temp": "",
+        "memory": ":memory:",
+        "file": str(Path(tempdir) / "history.db"),
+    }[backend]
+    return RowHistory(
+        {},
+        [TABLE],
+        {NICKNAME: TABLE},
+        database=database,
+        nickname_index=nickname_index,
+    )
+
+
+def rate(operations: int, seconds: float) -> float:
+    return operations / seconds if seconds else 0.0
+
+
+def bench_history(
+    size: int, backend: str, nickname_index: bool, lookups: int
+) -> T.Dict[str, T.Any]:
+    """Fill one RowHistory with `size` rows and time operations on it"""
+    seed(size)
+    with TemporaryDirectory() as tempdir:
+        rss_before = current_rss()
+        history = make_history(backend, tempdir, nickname_index)
+
+        start = perf_counter()
+        for row_id in range(1, size + 1):
+            nickname = NICKNAME if row_id % NICKNAME_EVERY == 0 else None
+            history.save_row(TABLE, nickname, make_row(row_id))
+        save_seconds = perf_counter() - start
+
+        start = perf_counter()
+        for _ in range(lookups):
+            history.load_row(TABLE, randint(1, size))
+        load_seconds = perf_counter() - start
+
+        def follow_references(to: str) -> float:
+            context = RandomReferenceContext(history, to)
+            start = perf_counter()
+            for _ in range(lookups):
+                reference = context.next()
+                history.load_row(reference._tablename, reference.id)
+            return perf_counter() - start
+
+        table_seconds = follow_references(TABLE)
+        nickname_seconds = (
+            follow_references(NICKNAME) if size >= NICKNAME_EVERY else 0.0
+        )
+        rss_after = current_rss()
+        result = {
+            "size": size,
+            "backend": backend,
+            "nickname_index": nickname_index,
+            "saves_per_second": rate(size, save_seconds),
+            "loads_per_second": rate(lookups, load_seconds),
+            "table_references_per_second": rate(lookups, table_seconds),
+            "nickname_references_per_second": rate(lookups, nickname_seconds),
+            "database_bytes": history.database_size(),
+            "rss_growth_bytes": (
+                rss_after - rss_before if rss_before and rss_after else None
+            ),
+        }
+        history.conn.close()
+        return result
+
+
+def report_line(result: T.Mapping) -> str:
+    rss = result["rss_growth_bytes"]
+    rss_text = f"{rss / 1e6:9.1f}" if rss is not None else f"{'?':>9}"
+    return (
+        f"{result['size']:>12,} {result['backend']:<7} "
+        f"{'yes' if result['nickname_index'] else 'no':<6}"
+        f"{result['saves_per_second']:>10,.0f} "
+        f"{result['loads_per_second']:>10,.0f} "
+        f"{result['table_references_per_second']:>10,.0f} "
+        f"{result['nickname_references_per_second']:>10,.0f} "
+        f"{result['database_bytes'] / 1e6:9.1f} {rss_text}"
+    )
+
+
+HEADER = (
+    f"{'rows':>12} {'backend':<7} {'index':<6}{'saves/s':>10} {'loads/s':>10} "
+    f"{'table/s':>10} {'nick/s':>10} {'db(MB)':>9} {'rss(MB)':>9}"
+)
+
+
+@click.command()
+@click.option(
+    "--size",
+    "sizes",
+    type=int,
+    multiple=True,
+    help=f"Rows of history (repeatable). Default: {', '.join(map(str, DEFAULT_SIZES))}",
+)
+@click.option(
+    "--backend",
+    "backends",
+    type=click.Choice(BACKENDS),
+    multiple=True,
+    help="SQLite backend (repeatable). Default: all of them",
+)
+@click.option(
+    "--nickname-index",
+    type=click.Choice(["both", "yes", "no"]),
+    default="both",
+    show_default=True,
+    help="Whether to index (nickname, nickname_id)",
+)
+@click.option(
+    "--lookups",
+    type=int,
+    default=10_000,
+    show_default=True,
+    help="Number of loads and references to time",
+)
+@click.option(
+    "--json-file",
+    type=click.Path(dir_okay=False, path_type=Path),
+    help="Also write the results to this file as JSON",
+)
+def main(sizes, backends, nickname_index, lookups, json_file):
+    "Benchmark RowHistory storage"
+    indexes = {"both": (True, False), "yes": (True,), "no": (False,)}[nickname_index]
+    results = []
+    click.echo(HEADER)
+    for size, backend, index in product(
+        sizes or DEFAULT_SIZES, backends or BACKENDS, indexes
+    ):
+        results.append(bench_history(size, backend, index, lookups))
+        click.echo(report_line(results[-1]))
+    if json_file:
+        json_file.write_text(json.dumps(results, indent=2) + "\n")
+
+
+if __name__ == "__main__":  # pragma: no cover
+    main()
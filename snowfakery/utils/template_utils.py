@@ -49,19 +49,36 @@ class FakerTemplateLibrary:
         faker_providers: T.Sequence[object],
         locale: T.Optional[str] = None,
         context: T.Optional[PluginContext] = None,
+        pool_size: int = 0,
     ):
         self.locale = locale
         self.context = context
 
-        self.fake_data = FakeData(faker_providers, locale, self.context)
+        self.fake_data = FakeData(
+            faker_providers,
+            locale,
+            self.context,
+            pool_size=pool_size,
+        )
 
     def _get_fake_data(self, name):
         return self.fake_data._get_fake_data(name)
 
     def __getattr__(self, name):
-        return StringGenerator(
-            lambda *args, **kwargs: self.fake_data._get_fake_data(name, *args, **kwargs)
-        )
+        try:
+            func = self.fake_data.fake_function(name)
+        except AttributeError:
+            # report the error when the template actually uses the fake
+            return StringGenerator(
+                lambda *args, **kwargs: self.fake_data._get_fake_data(
+                    name, *args, **kwargs
+                )
+            )
+        generator = StringGenerator(func)
+        # later lookups of this name will find the attribute directly
+        # rather than calling __getattr__ again.
+        setattr(self, name, generator)
+        return generator
 
 
 number_chars = set(string.digits + ".")
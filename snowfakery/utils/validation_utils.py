@@ -30,6 +30,7 @@ class MockRuntimeContext:
         # Attributes needed by @memorable decorator
         self.recalculate_every_time = False
         self.unique_context_identifier = "validation_context"
+        self.state_slot = None
 
     def field_vars(self):
         """Return the validation namespace."""
@@ -40,6 +41,10 @@ class MockRuntimeContext:
             # Build namespace on demand (for StructuredValue execution)
             return self._validation_context.field_vars()
 
+    def lookup(self, name: str, default=None):
+        """Return one name from the validation namespace."""
+        return self.field_vars().get(name, default)
+
     def context_vars(self, plugin_namespace):
         """Return empty context vars for validation."""
         return {}
@@ -61,6 +61,16 @@ def generated_rows(request):
         yield mockobj
 
 
+@pytest.fixture(scope="function", autouse=True)
+def fresh_faker_cache():
+    # Many tests monkey-patch Faker or its providers. Patches only
+    # affect Fakers that are prepared after the patch is applied.
+    from snowfakery.fakedata.fake_data_generator import clear_faker_cache
+
+    clear_faker_cache()
+    yield
+
+
 @pytest.fixture(scope="function")
 def disable_typeguard():
     # doesn't really do anything. at some point we can remove it if
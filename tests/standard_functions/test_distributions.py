@@ -25,6 +25,26 @@ class TestStatisticalDistributions:
         assert len(generated_rows.mock_calls) == 1
         assert generated_rows.mock_calls == [mock.call("A", {"id": 1, "b": 3})]
 
+    def test_random_distribution_batches(self, generated_rows):
+        yaml = """
+        - plugin: snowfakery.standard_plugins.statistical_distributions.StatisticalDistributions
+        - object: A
+          count: 20
+          fields:
+            seeded:
+              StatisticalDistributions.normal:
+                seed: 1
+            unseeded:
+              StatisticalDistributions.normal:
+                loc: 10
+        """
+        generate(StringIO(yaml), {}, None)
+        seeded = generated_rows.table_values("A", field="seeded")
+        unseeded = generated_rows.table_values("A", field="unseeded")
+        assert len(set(seeded)) == 1
+        assert len(set(unseeded)) == 20
+        assert all(type(value) is float for value in unseeded)
+
     def test_random_distribution_param_errors(self, generated_rows):
         yaml = """
         - plugin: snowfakery.standard_plugins.statistical_distributions.StatisticalDistributions
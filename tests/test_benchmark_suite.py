@@ -0,0 +1,110 @@
+import json
+
+from click.testing import CliRunner
+
+from snowfakery.tools.benchmark_suite import (
+    CASES,
+    compare_results,
+    main,
+    run_suite,
+    select_cases,
+)
+
+
+def results(scale=0.01, **seconds):
+    return {
+        "scale": scale,
+        "results": {name: {"seconds": value} for name, value in seconds.items()},
+    }
+
+
+class TestBenchmarkSuite:
+    def test_cases_generate_rows(self):
+        cases = select_cases(["nested_friends", "random_reference", "dataset"])
+        data = run_suite(cases, repeat=1, scale=0.001)
+        rows = {name: result["rows"] for name, result in data["results"].items()}
+        assert rows == {"nested_friends": 30, "random_reference": 40, "dataset": 20}
+        assert data["scale"] == 0.001
+
+    def test_output_cases(self):
+        data = run_suite(select_cases(["output_"]), repeat=2, scale=0.001)
+        assert set(data["results"]) == {
+            "output_txt",
+            "output_json",
+            "output_sql",
+            "output_dot",
+            "output_csv",
+            "output_sqlite",
+        }
+        for result in data["results"].values():
+            assert result["rows"] == 10
+            assert len(result["timings"]) == 2
+
+    def test_select_cases(self):
+        assert select_cases([]) == list(CASES.values())
+        assert [case.name for case in select_cases(["parse"])] == ["parse"]
+
+    def test_compare_results(self):
+        comparisons = compare_results(
+            results(a=1.0, b=1.0, c=1.0), results(a=1.5, b=0.5, c=1.05, d=1)
+        )
+        assert [c.status(0.1) for c in comparisons] == ["SLOWER", "faster", ""]
+
+
+class TestBenchmarkCommands:
+    def test_run_and_compare(self, tmp_path):
+        runner = CliRunner()
+        baseline_dir = ["--baseline-dir", str(tmp_path)]
+        result = runner.invoke(
+            main,
+            ["run", "-k", "simple", "--scale", "0.001", "--save", "base"]
+            + baseline_dir,
+        )
+        assert result.exit_code == 0, result.output
+        saved = json.loads((tmp_path / "base.json").read_text())
+        assert saved["results"]["simple_fields"]["rows"] == 20
+
+        # make the baseline impossibly fast, so that this run is a regression
+        saved["results"]["simple_fields"]["seconds"] = 1e-9
+        (tmp_path / "fast.json").write_text(json.dumps(saved))
+        result = runner.invoke(main, ["compare", "fast"] + baseline_dir)
+        assert result.exit_code == 1
+        assert "SLOWER" in result.output
+        assert "Regressions: simple_fields" in result.output
+
+    def test_compare_saved_results(self, tmp_path):
+        (tmp_path / "a.json").write_text(json.dumps(results(parse=1.0)))
+        (tmp_path / "b.json").write_text(json.dumps(results(parse=1.1)))
+        result = CliRunner().invoke(
+            main, ["compare", str(tmp_path / "a.json"), str(tmp_path / "b.json")]
+        )
+        assert result.exit_code == 0, result.output
+        assert "+10.0%" in result.output
+
+    def test_compare_different_scales(self, tmp_path):
+        (tmp_path / "a.json").write_text(json.dumps(results(parse=1.0)))
+        (tmp_path / "b.json").write_text(json.dumps(results(2, parse=1.0)))
+        result = CliRunner().invoke(
+            main, ["compare", "a", "b", "--baseline-dir", str(tmp_path)]
+        )
+        assert result.exit_code == 1
+        assert "different scales" in result.output
+
+    def test_compare_scale_must_match_baseline(self, tmp_path):
+        (tmp_path / "a.json").write_text(json.dumps(results(parse=1.0)))
+        result = CliRunner().invoke(
+            main, ["compare", "a", "--scale", "1", "--baseline-dir", str(tmp_path)]
+        )
+        assert result.exit_code == 1
+        assert "does not match the baseline's scale: 0.01" in result.output
+
+    def test_missing_baseline(self, tmp_path):
+        result = CliRunner().invoke(
+            main, ["compare", "nope", "--baseline-dir", str(tmp_path)]
+        )
+        assert result.exit_code == 1
+        assert "No benchmark results" in result.output
+
+    def test_list(self):
+        result = CliRunner().invoke(main, ["list"])
+        assert "faker_heavy" in result.output
@@ -36,6 +36,16 @@ class TestGenerateFromCLI:
             )
         ]
 
+    def test_recipe_cache_dir(self, generated_rows, tmpdir):
+        cache_dir = Path(tmpdir) / "cache"
+        for _ in range(2):
+            generate_cli.main(
+                [str(sample_yaml), "--recipe-cache-dir", str(cache_dir)],
+                standalone_mode=False,
+            )
+        assert len(list(cache_dir.glob("*.pickle"))) == 1
+        assert len(generated_rows.mock_calls) == 2
+
     def test_eval_arg(self):
         assert eval_arg("5") == 5
         assert eval_arg("abc") == "abc"
@@ -0,0 +1,189 @@
+import json
+import sys
+from io import StringIO
+from unittest import mock
+
+import pytest
+
+from snowfakery import generate_data
+from snowfakery.data_gen_exceptions import DataGenError
+from snowfakery.data_generator_runtime_object_model import ObjectTemplate
+from snowfakery.output_streams import JSONOutputStream, MultiplexOutputStream
+
+pytest.importorskip("numpy")
+
+columnar = {"columnar": True}
+
+yaml = """
+- object: Account
+  count: 2500
+  fields:
+    name: Acme
+    number: ${{id}}
+    index: ${{child_index}}
+    size:
+      random_number:
+        min: 1
+        max: 10
+        step: 3
+    kind:
+      random_choice:
+        A: 60%
+        B: 40%
+    letter:
+      random_choice:
+        - x
+        - y
+    stage:
+      random_choice:
+        - choice:
+            probability: 10%
+            pick: Lost
+        - choice:
+            probability: 90%
+            pick: Won
+- object: Contact
+  fields:
+    account:
+      reference: Account
+    account_index: ${{Account.index}}
+"""
+
+
+def generate_json(recipe, plugin_options=None, **kwargs):
+    out = StringIO()
+    generate_data(
+        StringIO(recipe),
+        plugin_options=plugin_options,
+        output_file=out,
+        output_format="json",
+        **kwargs,
+    )
+    return json.loads(out.getvalue())
+
+
+class TestColumnarEngine:
+    def test_same_rows_as_row_engine(self):
+        row_engine = generate_json(yaml)
+        columnar_engine = generate_json(yaml, columnar)
+        assert len(row_engine) == len(columnar_engine) == 2501
+        for rows in (row_engine, columnar_engine):
+            accounts = rows[:-1]
+            assert [row["id"] for row in accounts] == list(range(1, 2501))
+            assert [row["number"] for row in accounts] == list(range(1, 2501))
+            assert {row["size"] for row in accounts} == {1, 4, 7, 10}
+            assert {row["kind"] for row in accounts} == {"A", "B"}
+            assert {row["letter"] for row in accounts} == {"x", "y"}
+            assert {row["stage"] for row in accounts} == {"Won", "Lost"}
+            assert rows[-1] == {
+                "_table": "Contact",
+                "id": 1,
+                "account": 2500,
+                "account_index": 2499,
+            }
+        assert list(row_engine[0]) == list(columnar_engine[0])
+
+    def test_uses_blocks(self):
+        generate_blocks = ObjectTemplate._generate_blocks
+        with mock.patch.object(
+            ObjectTemplate, "_generate_blocks", autospec=True
+        ) as blocks:
+            blocks.side_effect = generate_blocks
+            generate_json(yaml, columnar)
+        assert [call.args[0].tablename for call in blocks.mock_calls] == ["Account"]
+
+    @pytest.mark.parametrize(
+        "fields",
+        [
+            "name: ${{fake.company}}",
+            "name: ${{'Acme' ~ id}}",
+            "name:\n              fake: company",
+            "n:\n              random_number:\n                min: ${{id}}\n                max: 5",
+            "parent:\n              reference: Parent",
+        ],
+    )
+    def test_falls_back_to_row_engine(self, fields):
+        recipe = f"""
+        - object: Parent
+        - object: Account
+          count: 2
+          fields:
+            {fields}
+        """
+        with mock.patch.object(ObjectTemplate, "_generate_blocks") as blocks:
+            rows = generate_json(recipe, columnar)
+        assert not blocks.mock_calls
+        assert len(rows) == 3
+
+    def test_friends_use_row_engine(self):
+        recipe = """
+        - object: Account
+          count: 2
+          friends:
+            - object: Contact
+        - object: Opportunity
+          just_once: True
+        """
+        with mock.patch.object(ObjectTemplate, "_generate_blocks") as blocks:
+            rows = generate_json(recipe, columnar)
+        assert not blocks.mock_calls
+        assert len(rows) == 5
+
+    def test_old_style_numbers(self):
+        recipe = """
+        - snowfakery_version: 2
+        - object: Account
+          count: 2
+          fields:
+            index: ${{child_index}}
+            size: "10"
+        """
+        row_engine = generate_json(recipe)
+        columnar_engine = generate_json(recipe, columnar)
+        assert row_engine == columnar_engine
+        assert [row["index"] for row in columnar_engine] == ["0", 1]
+
+    def test_random_references(self):
+        recipe = """
+        - object: Account
+          count: 5
+          fields:
+            name: Acme
+        - object: Contact
+          count: 5
+          fields:
+            account:
+              random_reference: Account
+        """
+        rows = generate_json(recipe, columnar)
+        assert {row["account"] for row in rows[5:]} <= {1, 2, 3, 4, 5}
+
+    def test_repeatable(self):
+        with mock.patch("random.getrandbits", return_value=42):
+            first = generate_json(yaml, columnar)
+        with mock.patch("random.getrandbits", return_value=42):
+            second = generate_json(yaml, columnar)
+        assert first == second
+
+    def test_numpy_is_required(self):
+        with mock.patch.dict(sys.modules, {"numpy": None}):
+            with pytest.raises(DataGenError, match="NumPy"):
+                generate_json(yaml, columnar)
+
+
+class TestWriteRows:
+    def test_write_rows(self):
+        out = StringIO()
+        stream = JSONOutputStream(out)
+        stream.write_rows("Account", [{"id": 1}, {"id": 2}])
+        stream.close()
+        assert json.loads(out.getvalue()) == [
+            {"_table": "Account", "id": 1},
+            {"_table": "Account", "id": 2},
+        ]
+
+    def test_multiplex(self):
+        streams = [mock.Mock(), mock.Mock()]
+        MultiplexOutputStream(streams).write_rows("Account", [{"id": 1}])
+        for stream in streams:
+            stream.write_rows.assert_called_once_with("Account", [{"id": 1}])
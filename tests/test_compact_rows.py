@@ -0,0 +1,156 @@
+import pickle
+from io import StringIO
+
+import pytest
+
+from snowfakery import generate_data
+from snowfakery.data_generator_runtime import JinjaTemplateEvaluatorFactory
+from snowfakery.object_rows import (
+    CompactObjectRow,
+    LazyLoadedObjectReference,
+    ObjectRow,
+)
+from snowfakery.parse_recipe_yaml import parse_recipe
+from snowfakery.recipe_analysis import RecipeAnalysis
+from snowfakery.row_history import RowHistory
+
+
+def analyze(yaml):
+    statements = parse_recipe(StringIO(yaml)).statements
+    return RecipeAnalysis(statements, JinjaTemplateEvaluatorFactory(True))
+
+
+class TestRecipeAnalysis:
+    def test_attributes(self):
+        analysis = analyze(
+            """
+            - object: Account
+              fields:
+                name: ${{fake.company}}
+                size: ${{Parent["size"]}}
+                parent:
+                  reference: Parent.owner
+                __hidden: ${{this.industry}}
+                description: Acme.com
+            """
+        )
+        assert analysis.attributes == {"company", "size", "owner", "industry", "com"}
+        assert not analysis.dynamic_attributes
+        assert analysis.table_fields == {
+            "Account": {"name", "size", "parent", "__hidden", "description"}
+        }
+
+    @pytest.mark.parametrize(
+        "formula",
+        [
+            "${{Parent[field_name]}}",
+            "${{Parent|attr('name')}}",
+            "${{[Parent]|map(attribute='name')|first}}",
+        ],
+    )
+    def test_dynamic_attributes(self, formula):
+        analysis = analyze(
+            f"""
+            - object: Account
+              fields:
+                name: {formula}
+            """
+        )
+        assert analysis.dynamic_attributes
+        assert not analysis.tables_with_unread_fields()
+
+    def test_tables_with_unread_fields(self):
+        analysis = analyze(
+            """
+            - object: Account
+              fields:
+                name: Acme
+              friends:
+                - object: Contact
+                  fields:
+                    name: Bob
+                    account:
+                      reference: Account
+                    account_id: ${{Account.id}}
+            - object: Opportunity
+              fields:
+                contact_name: ${{Contact.name}}
+            """
+        )
+        # Contact and Account both have `name` fields
+        assert analysis.tables_with_unread_fields() == {"Opportunity"}
+
+
+class TestCompactObjectRow:
+    row = CompactObjectRow("Account", {"id": 0, "name": 1}, [5, "Acme"], 2)
+
+    def test_fields(self):
+        assert self.row.id == 5
+        assert self.row._id == 5
+        assert self.row.name == "Acme"
+        assert self.row._values == {"id": 5, "name": "Acme"}
+        assert self.row._child_index == 2
+        assert str(self.row) == "5"
+        assert isinstance(self.row, ObjectRow)
+        with pytest.raises(AttributeError):
+            self.row.industry
+
+    def test_saved_by_reference(self):
+        history = RowHistory({}, ["Contact"], {})
+        history.save_row("Contact", None, {"id": 1, "account": self.row})
+        account = history.load_row("Contact", 1)["account"]
+        assert type(account) is LazyLoadedObjectReference
+        assert (account._tablename, account.id) == ("Account", 5)
+        assert history.load_row("Account", 5) == {"id": 5, "name": "Acme"}
+
+    def test_continuation_state(self):
+        assert pickle.loads(pickle.dumps(self.row.__getstate__())) == {
+            "_tablename": "Account",
+            "_values": {"id": 5, "name": "Acme"},
+        }
+
+
+class TestCompactRowsAtRuntime:
+    def test_only_unread_tables_are_compacted(self, generated_rows):
+        yaml = """
+        - object: Account
+          fields:
+            title: Acme
+        - object: Industry
+          fields:
+            name: Widgets
+        - object: Contact
+          fields:
+            account:
+              reference: Account
+            account_type: ${{Account.__class__.__name__}}
+            industry_type: ${{Industry.__class__.__name__}}
+            industry: ${{Industry.name}}
+        """
+        generate_data(StringIO(yaml))
+        assert generated_rows.table_values("Contact", 1, "account_type") == (
+            "CompactObjectRow"
+        )
+        assert generated_rows.table_values("Contact", 1, "industry_type") == (
+            "ObjectRow"
+        )
+        assert generated_rows.table_values("Contact", 1, "account") == "Account(1)"
+
+    def test_random_references_to_compact_tables(self, generated_rows):
+        yaml = """
+        - object: Account
+          count: 3
+          fields:
+            name: Acme
+        - object: Contact
+          count: 3
+          fields:
+            account:
+              random_reference: Account
+            owner:
+              reference: Account
+        """
+        generate_data(StringIO(yaml))
+        assert generated_rows.table_values("Contact", 3, "owner") == "Account(3)"
+        account = generated_rows.table_values("Contact", 3, "account")
+        assert account in ("Account(1)", "Account(2)", "Account(3)")
@@ -123,6 +123,22 @@ class TestContinuation:
         assert generated_rows.table_values("Child", 1, "parent") == "Parent(1)"
         assert generated_rows.table_values("Child", 2, "parent") == "Parent2(1)"
 
+    def test_just_once_random_reference(self, generated_rows):
+        yaml_data = """
+                        - object: Target
+                        - object: Holder
+                          just_once: true
+                          fields:
+                            ref:
+                              random_reference: Target
+                        - object: User
+                          fields:
+                            ref_id: ${{Holder.ref.id}}
+                            """
+        generate_twice(yaml_data)
+        assert generated_rows.table_values("User", 1, "ref_id") == 1
+        assert generated_rows.table_values("User", 2, "ref_id") == 1
+
 
 def generate_twice(yaml):
     continuation_file = StringIO()
@@ -8,7 +8,8 @@ from unittest import mock
 
 import pytest
 
-from snowfakery import SnowfakeryPlugin, generate_data, lazy
+from snowfakery import SnowfakeryPlugin, generate_data, lazy, plugins
+from snowfakery.data_generator_runtime import RuntimeContext
 from snowfakery.data_gen_exceptions import (
     DataGenError,
     DataGenImportError,
@@ -46,6 +47,15 @@ class SimpleTestPlugin(SnowfakeryPlugin):
         def fib(self, value):
             return FibIterator()
 
+        def option_str(self):
+            return self.context.option(
+                "tests.test_custom_plugins_and_providers.SimpleTestPlugin.option_str",
+                "default",
+            )
+
+        def lookup(self, name):
+            return self.context.lookup(name, "missing")
+
 
 class FibIterator(PluginResultIterator):
     def __init__(self):
@@ -129,6 +139,24 @@ class DoesNotClosePlugin(SnowfakeryPlugin):
             return None
 
 
+class BatchPlugin(SnowfakeryPlugin):
+    class Functions:
+        batches = []
+
+        def thing(self, prefix="thing"):
+            return f"{prefix} single"
+
+        def thing__batch(self, n, /, prefix="thing"):
+            self.batches.append(n)
+            return [f"{prefix} {i}" for i in range(n)]
+
+        def empty(self):
+            return None
+
+        def empty__batch(self, n):
+            return []
+
+
 class TestCustomFakerProvider:
     def test_custom_faker_provider(self, generated_rows):
         yaml = """
@@ -247,6 +275,57 @@ class TestCustomPlugin:
 
         generate_data(StringIO(yaml), plugin_options={"option_str": "AAA"})
 
+    def test_option_and_lookup(self, generated_rows):
+        yaml = """
+        - plugin: tests.test_custom_plugins_and_providers.SimpleTestPlugin
+        - var: greeting
+          value: Hello
+        - object: OBJ
+          fields:
+            name: Acme
+            option: ${{SimpleTestPlugin.option_str()}}
+            greeting: ${{SimpleTestPlugin.lookup("greeting")}}
+            this_name: ${{SimpleTestPlugin.lookup("this").name}}
+            missing: ${{SimpleTestPlugin.lookup("bogus")}}
+        """
+        with mock.patch(
+            "snowfakery.data_generator_runtime.EvaluationNamespace.field_vars"
+        ) as field_vars:
+            generate_data(StringIO(yaml), plugin_options={"option_str": "AAA"})
+        assert not field_vars.mock_calls
+        assert generated_rows.table_values("OBJ", 1) == {
+            "id": 1,
+            "name": "Acme",
+            "option": "AAA",
+            "greeting": "Hello",
+            "this_name": "Acme",
+            "missing": "missing",
+        }
+
+    def test_lookup_computed_nickname(self, generated_rows):
+        yaml = """
+        - plugin: tests.test_custom_plugins_and_providers.SimpleTestPlugin
+        - object: Account
+          nickname: nick1
+          fields:
+            name: Acme
+        - object: Contact
+          fields:
+            a: ${{SimpleTestPlugin.lookup("nick" ~ id).name}}
+        """
+        generate_data(StringIO(yaml))
+        assert generated_rows.table_values("Contact", 1, "a") == "Acme"
+
+    def test_option__default(self, generated_rows):
+        yaml = """
+        - plugin: tests.test_custom_plugins_and_providers.SimpleTestPlugin
+        - object: OBJ
+          fields:
+            option: ${{SimpleTestPlugin.option_str()}}
+        """
+        generate_data(StringIO(yaml))
+        assert generated_rows.table_values("OBJ", 1, "option") == "default"
+
     def test_option__unknown(self, generated_rows):
         yaml = """-  plugin: tests.test_custom_plugins_and_providers.SimpleTestPlugin"""
 
@@ -282,6 +361,25 @@ class PluginThatNeedsState(SnowfakeryPlugin):
 
 
 class TestContextVars:
+    def test_context_vars_copy_on_write(self):
+        parent = RuntimeContext(interpreter=mock.Mock())
+        parent.context_vars("ns")["a"] = 1
+        assert parent.context_vars("ns") is parent.context_vars("ns")
+
+        child = RuntimeContext(interpreter=parent.interpreter, parent_context=parent)
+        # reading does not copy
+        assert child.context_vars_view("ns") is parent.context_vars("ns")
+        assert child.context_vars_view("other") == {}
+
+        child.context_vars("ns")["a"] = 2
+        assert child.context_vars_view("ns") == {"a": 2}
+        assert parent.context_vars("ns") == {"a": 1}
+
+        grandchild = RuntimeContext(
+            interpreter=parent.interpreter, parent_context=child
+        )
+        assert grandchild.context_vars_view("ns") == {"a": 2}
+
     def test_plugin_context_vars(self, generated_rows):
         yaml = """
         - plugin: tests.test_custom_plugins_and_providers.PluginThatNeedsState
@@ -434,6 +532,30 @@ class TestContextVars:
             "B", 1, "foo"
         ) != generated_rows.table_values("C", 1, "foo")
 
+    def test_memorable_plugin__state_slots(self, generated_rows):
+        yaml = """
+        - plugin: snowfakery.standard_plugins.Counters
+        - object: A
+          count: 4
+          fields:
+            counter:
+              Counters.NumberCounter:
+                start: 10
+            formula: ${{Counters.NumberCounter(start=20).next()}}
+            changing: ${{Counters.NumberCounter(start=child_index // 2 + 1).next()}}
+        """
+        memorable_key = plugins.memorable_key
+        with mock.patch(
+            "snowfakery.plugins.memorable_key", side_effect=memorable_key
+        ) as key:
+            generate_data(StringIO(yaml))
+        assert generated_rows.table_values("A", field="counter") == [10, 11, 12, 13]
+        assert generated_rows.table_values("A", field="formula") == [20, 21, 22, 23]
+        assert generated_rows.table_values("A", field="changing") == [1, 2, 2, 3]
+        # once for each of the first two call sites, and each time the
+        # third one's arguments change
+        assert len(key.mock_calls) == 2 + 2
+
     def test_plugin_does_not_close(self):
         yaml = """
         - plugin: tests.test_custom_plugins_and_providers.DoesNotClosePlugin
@@ -467,3 +589,78 @@ class TestPluginResultIterator:
             assert len(close.mock_calls) == 1
         finally:
             gc.enable()
+
+
+class TestBatchVariants:
+    @pytest.fixture
+    def batches(self):
+        batches = []
+        with mock.patch(
+            "tests.test_custom_plugins_and_providers.BatchPlugin.Functions.batches",
+            batches,
+        ):
+            yield batches
+
+    def test_batch_variant(self, generated_rows, batches):
+        yaml = """
+        - plugin: tests.test_custom_plugins_and_providers.BatchPlugin
+        - object: OBJ
+          count: 3
+          fields:
+            a:
+              BatchPlugin.thing:
+                prefix: a
+            b:
+              BatchPlugin.thing: b
+        """
+        generate_data(StringIO(yaml), target_number=("OBJ", 1500))
+        assert generated_rows.table_values("OBJ", 1500, "a") == "a 499"
+        assert generated_rows.table_values("OBJ", 1500, "b") == "b 499"
+        assert batches == [1000, 1000, 1000, 1000]
+
+    def test_formula_arguments(self, generated_rows, batches):
+        yaml = """
+        - plugin: tests.test_custom_plugins_and_providers.BatchPlugin
+        - object: OBJ
+          count: 2
+          fields:
+            a:
+              BatchPlugin.thing:
+                prefix: ${{id}}
+            b: ${{BatchPlugin.thing()}}
+        """
+        generate_data(StringIO(yaml))
+        assert generated_rows.table_values("OBJ", 2, "a") == "2 single"
+        assert generated_rows.table_values("OBJ", 2, "b") == "thing single"
+        assert not batches
+
+    def test_no_values(self):
+        yaml = """
+        - plugin: tests.test_custom_plugins_and_providers.BatchPlugin
+        - object: OBJ
+          fields:
+            a:
+              BatchPlugin.empty:
+        """
+        with pytest.raises(DataGenError, match="empty__batch"):
+            generate_data(StringIO(yaml))
+
+    def test_columnar(self, batches):
+        pytest.importorskip("numpy")
+        yaml = """
+        - plugin: tests.test_custom_plugins_and_providers.BatchPlugin
+        - object: OBJ
+          count: 1500
+          fields:
+            a:
+              BatchPlugin.thing: a
+        """
+        out = StringIO()
+        generate_data(
+            StringIO(yaml),
+            plugin_options={"columnar": True},
+            output_file=out,
+            output_format="json",
+        )
+        assert '"a 499"' in out.getvalue()
+        assert batches == [1000, 500]
@@ -1,4 +1,13 @@
-from snowfakery.data_generator_runtime import ObjectRow
+from unittest import mock
+
+import pytest
+
+from snowfakery.data_gen_exceptions import DataGenSyntaxError
+from snowfakery.data_generator_runtime import (
+    JinjaTemplateEvaluatorFactory,
+    ObjectRow,
+    compile_formula,
+)
 
 
 class TestObjectRow:
@@ -20,3 +29,26 @@ class TestObjectRow:
 
         obj = ObjectRow("", {})
         assert repr(obj)
+
+
+class TestJinjaTemplateEvaluatorFactory:
+    def test_compiled_formulas_are_shared(self):
+        formula = "${{shared_formula + 1}}"
+        compile_formula.cache_clear()  # in case another test compiled it
+        try:
+            with mock.patch(
+                "jinja2.Environment.from_string", autospec=True
+            ) as from_string:
+                for native_types in (True, True, False):
+                    factory = JinjaTemplateEvaluatorFactory(native_types)
+                    factory.get_evaluator(formula)
+            # once per kind of environment
+            assert len(from_string.mock_calls) == 2
+        finally:
+            compile_formula.cache_clear()  # of the mock templates
+
+    def test_syntax_errors(self):
+        factory = JinjaTemplateEvaluatorFactory(True)
+        for _ in range(2):
+            with pytest.raises(DataGenSyntaxError):
+                factory.get_evaluator("${{1 +}}")
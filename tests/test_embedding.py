@@ -1,3 +1,4 @@
+import json
 from tempfile import TemporaryDirectory
 from pathlib import Path
 import yaml
@@ -6,8 +7,9 @@ from io import StringIO
 
 import pytest
 
-from snowfakery import generate_data
+from snowfakery import generate_data, prepare_recipe
 from snowfakery.data_generator_runtime import IdManager
+from snowfakery.output_streams import JSONOutputStream
 from snowfakery.api import SnowfakeryApplication
 from snowfakery import data_gen_exceptions as exc
 
@@ -140,6 +142,79 @@ class TestEmbedding:
         assert generated_rows.table_values("Foo", 0)["id"] == 7
 
 
+class TestPreparedRecipe:
+    def test_run_many_times(self, generated_rows):
+        prepared = prepare_recipe(StringIO("- object: Foo\n  count: 2"))
+        prepared.run()
+        prepared.run(target_number=(5, "Foo"))
+        ids = generated_rows.table_values("Foo", field="id")
+        assert ids == [1, 2, 1, 2, 3, 4, 5, 6]
+
+    def test_run_with_options(self, generated_rows):
+        prepared = prepare_recipe(
+            StringIO(
+                """
+                - option: name
+                  default: Alice
+                - object: Foo
+                  fields:
+                    name: ${{name}}
+                """
+            )
+        )
+        prepared.run()
+        prepared.run(user_options={"name": "Bob"})
+        assert generated_rows.table_values("Foo", 1, "name") == "Alice"
+        assert generated_rows.table_values("Foo", 2, "name") == "Bob"
+
+    def test_run_shared_output_stream(self):
+        output = StringIO()
+        stream = JSONOutputStream(output)
+        prepared = prepare_recipe("examples/company.yml")
+        prepared.run(output_stream=stream)
+        prepared.run(output_stream=stream)
+        stream.close()
+        rows = json.loads(output.getvalue())
+        assert len([row for row in rows if row["_table"] == "Employee"]) == 4
+
+    def test_run_continuation(self, generated_rows):
+        prepared = prepare_recipe(StringIO("- object: Foo"))
+        continuation = StringIO()
+        prepared.run(generate_continuation_file=continuation)
+        continuation.seek(0)
+        prepared.run(continuation_file=continuation)
+        assert generated_rows.table_values("Foo", 2, "id") == 2
+
+    def test_run_output_file(self):
+        prepared = prepare_recipe("examples/company.yml")
+        with TemporaryDirectory() as t:
+            for i in range(2):
+                outfile = Path(t) / f"out{i}.json"
+                prepared.run(output_file=outfile)
+                assert json.loads(outfile.read_text())
+
+    def test_plugin_options(self):
+        prepared = prepare_recipe(
+            StringIO(
+                """
+                - plugin: snowfakery.standard_plugins.UniqueId
+                - object: Foo
+                  fields:
+                    unique: ${{unique_id}}
+                """
+            ),
+            plugin_options={"pid": "42"},
+        )
+        assert 42 in prepared.plugin_options.values()
+
+    def test_run_mapping_file_and_validation(self):
+        prepared = prepare_recipe("examples/company.yml")
+        mapping = StringIO()
+        prepared.run(generate_cci_mapping_file=mapping)
+        assert "Insert Employee" in yaml.safe_load(mapping.getvalue())
+        assert not prepared.run(validate_only=True).has_errors()
+
+
 class TestAPIValidation:
     """Test validation parameters in the generate_data API"""
 
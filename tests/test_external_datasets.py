@@ -305,6 +305,37 @@ class TestExternalDatasets:
             assert capsys.readouterr().err == ""
             assert caplog.text == ""
 
+    def test_for_loop_keeps_field_state(self, generated_rows):
+        abs_path = str(Path(__file__).parent)
+        yaml = (
+            """
+        - plugin: snowfakery.standard_plugins.datasets.Dataset
+        - plugin: snowfakery.standard_plugins.Counters
+        - object: XXX
+          for_each:
+            var: address
+            value:
+              Dataset.iterate:
+                dataset: %s/../examples/datasets/addresses.csv
+          fields:
+            City: ${{address.City}}
+            counter:
+              Counters.NumberCounter:
+            __other_address:
+              Dataset.iterate:
+                dataset: %s/../examples/datasets/addresses.csv
+            other_street: ${{__other_address.Street}}
+        """
+            % (abs_path, abs_path)
+        )
+        generate(StringIO(yaml), {})
+        assert generated_rows.table_values("XXX", field="counter") == [1, 2, 3]
+        assert generated_rows.table_values("XXX", field="other_street") == [
+            "Kings Ave",
+            "Granville Street",
+            "Kingsway Road",
+        ]
+
     def test_nested_for_loops(self, generated_rows):
         call = mock.call
         with open(
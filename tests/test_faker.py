@@ -1,3 +1,4 @@
+import random
 from io import StringIO
 from unittest import mock
 from datetime import date, datetime, timezone
@@ -6,6 +7,7 @@ import pytest
 from dateutil import parser as dateparser
 from snowfakery.data_generator import generate
 from snowfakery import data_gen_exceptions as exc
+from snowfakery.fakedata.fake_data_generator import FakerValuePool, POOL_REUSE
 
 
 def row_values(generated_rows, index, value):
@@ -593,3 +595,65 @@ class TestFaker:
         assert len(generated_rows.row_values(0, "UserName")) == 80, len(
             generated_rows.row_values(0, "UserName")
         )
+
+    def test_pooled_fakes(self, generated_rows):
+        yaml = """
+            - object: X
+              count: 30
+              fields:
+                FirstName:
+                    fake: FirstName
+                City: ${{fake.city}}
+                Country:
+                    fake.country_code:
+                        representation: alpha-2
+        """
+        generate(StringIO(yaml), plugin_options={"faker_pool_size": 5})
+        first_names = generated_rows.table_values("X", field="FirstName")
+        assert len(first_names) == 30
+        assert all(first_names)
+        assert len(set(first_names)) <= 5
+        assert len(set(generated_rows.table_values("X", field="City"))) <= 5
+        # faker calls with arguments are never pooled
+        assert all(
+            len(country) == 2
+            for country in generated_rows.table_values("X", field="Country")
+        )
+
+    def test_pooled_fakes_still_match_emails(self, generated_rows):
+        yaml = """
+            - object: X
+              count: 20
+              fields:
+                FirstName:
+                    fake: FirstName
+                LastName:
+                    fake: LastName
+                Email:
+                    fake: email
+        """
+        generate(StringIO(yaml), plugin_options={"faker_pool_size": 3})
+        for row in generated_rows.table_values("X"):
+            assert row["LastName"] in row["Email"]
+
+
+class TestFakerValuePool:
+    def test_pool_refills(self):
+        values = iter(range(1000))
+        pool = FakerValuePool(lambda: next(values), 4)
+        first_values = {pool() for _ in range(4 * POOL_REUSE - 1)}
+        assert first_values <= {0, 1, 2, 3}
+        later_values = {pool() for _ in range(4 * POOL_REUSE)}
+        assert later_values <= {4, 5, 6, 7}
+
+    def test_pool_is_repeatable(self):
+        samples = []
+        for other_draws in (0, 10):
+            random.seed(42)
+            values = iter(range(1000))
+            pool = FakerValuePool(lambda: next(values), 4)
+            # other users of `random` do not affect the pool
+            for _ in range(other_draws):
+                random.random()
+            samples.append([pool() for _ in range(100)])
+        assert samples[0] == samples[1]
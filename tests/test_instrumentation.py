@@ -0,0 +1,114 @@
+import json
+from io import StringIO
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from threading import Thread
+
+from snowfakery import generate_data, prepare_recipe
+from snowfakery.cli import generate_cli
+from snowfakery.data_generator_runtime_object_model import ObjectTemplate
+from snowfakery.instrumentation import Instrumentation
+from snowfakery.row_history import RowHistory
+
+yaml = """
+- object: Account
+  count: 3
+  fields:
+    name:
+      fake: company
+    size: ${{random_number(1, 10) + 1}}
+    fixed: literal
+- object: Contact
+  count: 2
+  fields:
+    account:
+      random_reference: Account
+    account_name: ${{account.name}}
+"""
+
+
+def kinds_and_names(instrumentation):
+    return {key: timing.count for key, timing in instrumentation.timings.items()}
+
+
+class TestInstrumentation:
+    def test_timings(self):
+        instrumentation = Instrumentation()
+        generate_data(StringIO(yaml), instrumentation=instrumentation)
+        counts = kinds_and_names(instrumentation)
+        assert counts[("template", "Account")] == 3
+        assert counts[("template", "Contact")] == 2
+        assert counts[("field", "Account.name")] == 3
+        assert counts[("function", "fake")] == 3
+        assert counts[("faker", "company")] == 3
+        assert counts[("function", "random_reference")] == 2
+        assert counts[("row history", "save")] == 3
+        assert counts[("row history", "load")] == 2
+        assert counts[("output", "write_row")] == 5
+        jinja = [name for kind, name in counts if kind == "jinja"]
+        assert jinja == [
+            "${{random_number(1, 10) + 1}} (<stream>:7)",
+            "${{account.name}} (<stream>:14)",
+        ]
+        assert instrumentation.rows == 5
+        assert instrumentation.elapsed > 0
+
+    def test_own_time_excludes_nested_timers(self):
+        instrumentation = Instrumentation()
+        generate_data(StringIO(yaml), instrumentation=instrumentation)
+        for timing in instrumentation.timings.values():
+            assert 0 <= timing.own <= timing.total
+        field = instrumentation.timings[("field", "Account.name")]
+        faker = instrumentation.timings[("faker", "company")]
+        assert field.total >= faker.total
+
+    def test_report_and_json(self):
+        instrumentation = Instrumentation()
+        generate_data(StringIO(yaml), instrumentation=instrumentation)
+        report = instrumentation.report(limit=3)
+        assert report.startswith("Snowfakery profile")
+        assert len(report.splitlines()) == 6
+        data = json.loads(json.dumps(instrumentation.as_dict()))
+        owns = [timing["own"] for timing in data["timings"]]
+        assert owns == sorted(owns, reverse=True)
+        assert data["rows"] == 5
+
+    def test_timers_are_removed_afterwards(self):
+        originals = (ObjectTemplate._generate_row, RowHistory.save_row)
+        generate_data(StringIO(yaml), instrumentation=Instrumentation())
+        assert (ObjectTemplate._generate_row, RowHistory.save_row) == originals
+
+    def test_accumulates_across_runs(self):
+        instrumentation = Instrumentation()
+        prepared = prepare_recipe(StringIO(yaml))
+        prepared.run(instrumentation=instrumentation)
+        prepared.run(instrumentation=instrumentation)
+        assert instrumentation.rows == 10
+
+    def test_other_threads_are_not_timed(self):
+        instrumentation = Instrumentation()
+        instrumentation._thread = -1  # as if some other thread was instrumented
+        thread = Thread(
+            target=instrumentation.timed, args=("kind", "name", lambda: None)
+        )
+        thread.start()
+        thread.join()
+        assert not instrumentation.timings
+
+
+class TestProfileCommand:
+    def test_profile(self, capsys):
+        generate_cli.main(["examples/company.yml", "--profile"], standalone_mode=False)
+        err = capsys.readouterr().err
+        assert "Snowfakery profile" in err
+        assert "Employee.Name" in err
+
+    def test_profile_file(self):
+        with TemporaryDirectory() as t:
+            profile = Path(t) / "profile.json"
+            generate_cli.main(
+                ["examples/company.yml", "--profile-file", str(profile)],
+                standalone_mode=False,
+            )
+            data = json.loads(profile.read_text())
+            assert data["rows"] == 5
@@ -0,0 +1,7 @@
+from snowfakery.tools.bench_overhead import heavy_imports
+
+
+class TestLazyImports:
+    def test_minimal_run_avoids_heavy_imports(self):
+        # SQLAlchemy, numpy etc. are only imported by the features that use them
+        assert heavy_imports() == ""
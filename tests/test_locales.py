@@ -32,3 +32,19 @@ class TestLocales:
             locale_changes = [c[1][0] for c in f.mock_calls if not c[0]]
 
             assert locale_changes == [None, "no_NO", "fr_FR"]
+
+    def test_fakers_are_shared_across_runs(self):
+        yaml = """
+        - object: first
+          fields:
+            name:
+              fake: name
+            other_name: ${{i18n_fake("fr_FR", "name")}}
+        """
+        with mock.patch(
+            "snowfakery.fakedata.fake_data_generator.Faker", wraps=Faker
+        ) as f:
+            generate(StringIO(yaml))
+            generate(StringIO(yaml))
+            locales = [c[1][0] for c in f.mock_calls if not c[0]]
+            assert locales == [None, "fr_FR"]
@@ -0,0 +1,119 @@
+from io import StringIO
+from unittest import mock
+
+from snowfakery import generate_data
+from snowfakery.data_generator_runtime import Globals, Interpreter
+from snowfakery.metrics import memory_report
+from snowfakery.object_rows import (
+    LazyLoadedObjectReference,
+    ObjectReference,
+    ObjectRow,
+)
+
+yaml = """
+- object: Company
+  just_once: True
+  nickname: TheCompany
+  fields:
+    name: Big Co
+- object: Account
+  just_once: True
+  fields:
+    name: Acme
+    company:
+      reference: TheCompany
+    owner:
+      - object: User
+        fields:
+          name: Owner
+- object: Contact
+  count: 2
+  fields:
+    account:
+      reference: Account
+    company_name: ${{Account.company.name}}
+    owner_id: ${{Account.owner.id}}
+    other:
+      random_reference: Company
+"""
+
+memory_bounded = {"memory_bounded": True}
+
+
+def usage_after(recipe, plugin_options=None):
+    """Run a recipe and return the Interpreter's memory usage at the end"""
+    usages = []
+    memory_usage = Interpreter.memory_usage
+
+    def record_usage(interpreter):
+        usages.append(memory_usage(interpreter))
+        return usages[-1]
+
+    options = {**(plugin_options or {}), "memory_report": True}
+    with mock.patch.object(Interpreter, "memory_usage", record_usage):
+        generate_data(StringIO(recipe), plugin_options=options)
+    return usages[0]
+
+
+class TestMemoryBounded:
+    def test_same_output(self, generated_rows):
+        generate_data(StringIO(yaml), plugin_options=memory_bounded)
+        assert generated_rows.table_values("Contact", 2, "company_name") == "Big Co"
+        assert generated_rows.table_values("Contact", 2, "owner_id") == 1
+
+    def test_snapshots(self):
+        globals = Globals()
+        company = ObjectRow("Company", {"id": 1, "name": "Big Co"})
+        owner = ObjectRow("User", {"id": 1, "name": "Owner"})
+        account = ObjectRow("Account", {"id": 1, "company": company, "owner": owner})
+        globals.register_object(account, "TheAccount", True)
+        globals.snapshot_persistent_object(account, "TheAccount", {"Company"})
+        snapshot = globals.persistent_objects_by_table["Account"]
+        assert globals.persistent_nicknames["TheAccount"] is snapshot
+        # Company rows are in the row history so their fields can be loaded
+        assert isinstance(snapshot.company, LazyLoadedObjectReference)
+        assert type(snapshot.owner) is ObjectReference
+        assert (snapshot.owner._tablename, snapshot.owner.id) == ("User", 1)
+        # the original is unchanged, for the rest of this iteration
+        assert globals.transients.last_seen_obj_by_table["Account"] is account
+        assert account.owner is owner
+
+    def test_snapshots_keep_fewer_rows_alive(self):
+        unbounded = usage_after(yaml)
+        bounded = usage_after(yaml, memory_bounded)
+        # Company, Account and User, or just the just_once Company and Account
+        assert unbounded["rows_reachable_from_persistent_objects"] == 3
+        assert bounded["rows_reachable_from_persistent_objects"] == 2
+        assert bounded["persistent_objects"] == 2
+        assert bounded["history_rows"] == {"Company": 1}
+
+    def test_continuation(self):
+        continuation = StringIO()
+        generate_data(
+            StringIO(yaml),
+            plugin_options=memory_bounded,
+            generate_continuation_file=continuation,
+        )
+        assert "LazyLoaded" not in continuation.getvalue()
+
+
+class TestMemoryReport:
+    def test_report(self, capsys):
+        generate_data(StringIO(yaml), plugin_options={"memory_report": True})
+        err = capsys.readouterr().err
+        assert "Snowfakery memory report" in err
+        assert "just_once objects: 2 (referring to 3 rows)" in err
+        assert "(Company: 1)" in err
+
+    def test_report_text(self):
+        usage = {
+            "rss": None,
+            "persistent_objects": 0,
+            "rows_reachable_from_persistent_objects": 0,
+            "history_rows": {},
+            "history_bytes": 0,
+            "template_states": 0,
+        }
+        report = memory_report(usage)
+        assert "resident" not in report
+        assert "(no tables)" in report
@@ -0,0 +1,156 @@
+import json
+from io import StringIO
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import mock
+
+import pytest
+
+from snowfakery import generate_data, prepare_recipe
+from snowfakery.api import SnowfakeryApplication, StoppingCriteria
+from snowfakery.cli import generate_cli
+from snowfakery.data_gen_exceptions import DataGenError
+from snowfakery.data_generator_runtime import IdManager
+from snowfakery.metrics import (
+    MetricsFileWriter,
+    ProgressEvent,
+    ProgressTracker,
+    current_rss,
+    prometheus_text,
+)
+
+yaml = """
+- object: Account
+  fields:
+    name: Acme
+  friends:
+    - object: Contact
+      count: 2
+- object: __hidden
+"""
+
+
+class RecordingApplication(SnowfakeryApplication):
+    progress_interval = 0  # report every iteration
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.events = []
+
+    def progress(self, event):
+        self.events.append(event)
+
+
+def event(**kwargs):
+    values = dict(
+        iterations=3,
+        elapsed=2.0,
+        rows={"Account": 3, "Contact": 6},
+        rows_per_second=4.5,
+        rss=1000,
+        finished=True,
+    )
+    return ProgressEvent(**{**values, **kwargs})
+
+
+class TestProgress:
+    def test_application_progress(self):
+        app = RecordingApplication(StoppingCriteria("Account", 3))
+        generate_data(StringIO(yaml), parent_application=app)
+        assert [e.iterations for e in app.events] == [1, 2, 3]
+        assert [e.finished for e in app.events] == [False, False, True]
+        last = app.events[-1]
+        assert last.rows == {"Account": 3, "Contact": 6}
+        assert last.total_rows == 9
+        assert last.rows_per_second > 0
+        assert last.elapsed > 0
+
+    def test_default_interval_reports_at_the_end(self):
+        app = RecordingApplication(StoppingCriteria("Account", 3))
+        app.progress_interval = 3600
+        generate_data(StringIO(yaml), parent_application=app)
+        assert len(app.events) == 1
+        assert app.events[0].finished
+
+    def test_continuations_count_rows_from_this_run(self):
+        continuation = StringIO()
+        generate_data(StringIO(yaml), generate_continuation_file=continuation)
+        continuation.seek(0)
+        app = RecordingApplication()
+        generate_data(
+            StringIO(yaml), parent_application=app, continuation_file=continuation
+        )
+        assert app.events[-1].rows == {"Account": 1, "Contact": 2}
+
+    def test_tracker_throttles(self):
+        listener = mock.Mock()
+        tracker = ProgressTracker([listener], 3600, IdManager())
+        tracker.iteration_finished(1, False)
+        tracker.iteration_finished(2, False)
+        assert not listener.mock_calls
+        tracker.iteration_finished(3, True)
+        assert listener.call_args[0][0].iterations == 3
+
+    def test_current_rss(self):
+        rss = current_rss()
+        assert rss is None or rss > 1_000_000
+
+
+class TestMetricsFiles:
+    def test_jsonl(self):
+        with TemporaryDirectory() as t:
+            metrics = Path(t) / "metrics.jsonl"
+            metrics.write_text("stale\n")
+            prepare_recipe(StringIO(yaml)).run(
+                target_number=(2, "Account"), metrics_file=metrics
+            )
+            lines = [json.loads(line) for line in metrics.read_text().splitlines()]
+            assert lines[-1]["rows"] == {"Account": 2, "Contact": 4}
+            assert lines[-1]["total_rows"] == 6
+            assert lines[-1]["finished"]
+
+    def test_prometheus(self):
+        with TemporaryDirectory() as t:
+            metrics = Path(t) / "snowfakery.prom"
+            generate_data(StringIO(yaml), metrics_file=metrics)
+            text = metrics.read_text()
+            assert 'snowfakery_rows_total{table="Contact"} 2' in text
+            assert "snowfakery_finished 1" in text
+            assert list(Path(t).iterdir()) == [metrics]
+
+    def test_txt_defaults_to_jsonl(self):
+        with TemporaryDirectory() as t:
+            metrics = Path(t) / "metrics.txt"
+            generate_data(StringIO(yaml), metrics_file=metrics)
+            lines = [json.loads(line) for line in metrics.read_text().splitlines()]
+            assert lines[-1]["finished"]
+
+    def test_prometheus_text(self):
+        text = prometheus_text(event(rows={'Odd"Name': 1}, rss=None))
+        assert 'snowfakery_rows_total{table="Odd\\"Name"} 1' in text
+        assert "resident_memory" not in text
+
+    def test_explicit_format(self):
+        with TemporaryDirectory() as t:
+            metrics = Path(t) / "metrics.out"
+            MetricsFileWriter(metrics, "prometheus")(event())
+            assert "snowfakery_iterations_total 3" in metrics.read_text()
+
+    def test_unknown_format(self):
+        with pytest.raises(DataGenError, match="xml"):
+            MetricsFileWriter("foo.xml", "xml")
+
+    def test_cli(self):
+        with TemporaryDirectory() as t:
+            metrics = Path(t) / "metrics.txt"
+            generate_cli.main(
+                [
+                    "examples/company.yml",
+                    "--metrics-file",
+                    str(metrics),
+                    "--metrics-format",
+                    "jsonl",
+                ],
+                standalone_mode=False,
+            )
+            assert json.loads(metrics.read_text())["rows"]["Employee"] == 2
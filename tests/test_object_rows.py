@@ -7,3 +7,9 @@ class TestNicknameSlot:
     def test_repr(self):
         nns = NicknameSlot("Account", Mock())
         assert "Account" in repr(nns)
+
+    def test_on_allocate(self):
+        allocations = []
+        nns = NicknameSlot("Account", Mock(), lambda: allocations.append(1))
+        assert nns.id == nns.id
+        assert allocations == [1]
@@ -0,0 +1,296 @@
+from datetime import date
+from io import StringIO
+
+import pytest
+from dateutil.relativedelta import relativedelta
+
+from snowfakery import generate_data
+from snowfakery.api import SnowfakeryApplication
+from snowfakery.data_generator_runtime import (
+    Globals,
+    Interpreter,
+    JinjaTemplateEvaluatorFactory,
+    NamespaceLayers,
+)
+from snowfakery.data_generator_runtime_object_model import SimpleValue
+from snowfakery.output_streams import DebugOutputStream
+from snowfakery.parse_recipe_yaml import parse_recipe
+from snowfakery.recipe_analysis import RecipeAnalysis
+
+
+def analyze(yaml):
+    statements = parse_recipe(StringIO(yaml)).statements
+    return RecipeAnalysis(statements, JinjaTemplateEvaluatorFactory(True))
+
+
+class TestNames:
+    def test_names(self):
+        analysis = analyze(
+            """
+            - plugin: snowfakery.standard_plugins.Counters
+            - var: greeting
+              value: Hello
+            - object: Account
+              nickname: acme
+              fields:
+                name: ${{greeting}} ${{fake.company}}
+                counter: ${{Counters.NumberCounter(parent="Contact")}}
+                parent:
+                  reference: TheParent.owner
+                other: ${{reference("other")}}
+            """
+        )
+        assert {"greeting", "fake", "Counters", "Contact", "TheParent", "other"} <= (
+            analysis.names
+        )
+        assert "acme" not in analysis.names
+        assert not analysis.dynamic_names
+        assert analysis.variable_names == {"greeting", "child_index"}
+        assert analysis.object_names == {"Account", "acme"}
+        assert analysis.might_refer_to("TheParent")
+        assert not analysis.might_refer_to("acme")
+
+    @pytest.mark.parametrize(
+        "field",
+        [
+            "${{reference('Acc' ~ 'ount')}}",
+            "${{random_reference(to=this.target)}}",
+            "${{reference(name_var)}}",
+            "${{Counters.NumberCounter(parent=this.parent_name)}}",
+            "\n                  reference: ${{name_var}}",
+        ],
+    )
+    def test_dynamic_names(self, field):
+        analysis = analyze(
+            f"""
+            - var: name_var
+              value: Account
+            - object: Account
+              fields:
+                target: {field}
+            """
+        )
+        assert analysis.dynamic_names
+        assert analysis.might_refer_to("anything")
+
+    def test_tables_without_references(self):
+        analysis = analyze(
+            """
+            - object: Account
+              fields:
+                name: ${{fake.company}}
+                number: ${{id + random_number(1, 10)}}
+                when:
+                  date_between:
+                    start_date: -1y
+                    end_date: today
+                kind:
+                  random_choice:
+                    - a
+                    - b
+                    - ${{today}}
+            - object: Contact
+              fields:
+                account: ${{Account}}
+            - object: Opportunity
+              fields:
+                contact:
+                  random_choice:
+                    - object: Contact
+            - object: Task
+              fields:
+                count: ${{Counters.NumberCounter()}}
+            - object: Event
+              fields:
+                account:
+                  reference: Account
+            """
+        )
+        assert analysis.tables_without_references == {"Account"}
+
+    def test_shadowed_scalar_names(self):
+        analysis = analyze(
+            """
+            - object: now
+            - object: Account
+              fields:
+                created: ${{now}}
+            """
+        )
+        assert analysis.tables_without_references == {"now"}
+
+
+class TestRuntimeUsesAnalysis:
+    yaml = """
+    - var: greeting
+      value: Hello
+    - object: Account
+      nickname: unused_nickname
+      fields:
+        name: Acme
+    - object: Account
+      nickname: used_nickname
+      fields:
+        name: ${{greeting}}
+    - object: Contact
+      fields:
+        account:
+          reference: used_nickname
+        greeting: ${{greeting}} ${{Account.name}}
+    """
+
+    def test_same_output(self, generated_rows):
+        generate_data(StringIO(self.yaml))
+        assert generated_rows.table_values("Contact", 1, "account") == "Account(2)"
+        assert generated_rows.table_values("Contact", 1, "greeting") == "Hello Hello"
+
+    def test_nicknames_and_dependencies(self):
+        nicknames = []
+        register_object = Globals.register_object
+
+        def record(self, obj, nickname, persistent_object):
+            nicknames.append(nickname)
+            register_object(self, obj, nickname, persistent_object)
+
+        with pytest.MonkeyPatch.context() as patch:
+            patch.setattr(Globals, "register_object", record)
+            summary = generate_data(StringIO(self.yaml))
+
+        assert "used_nickname" in nicknames
+        assert "unused_nickname" not in nicknames
+        assert [
+            (dep.table_name_from, dep.table_name_to, dep.field_name)
+            for dep in summary.intertable_dependencies
+        ] == [("Contact", "Account", "account")]
+
+    def test_namespace_layers(self):
+        layers = {}
+        namespace_layers = Interpreter.namespace_layers
+
+        def record(self, names):
+            layers[names] = namespace_layers(self, names)
+            return layers[names]
+
+        with pytest.MonkeyPatch.context() as patch:
+            patch.setattr(Interpreter, "namespace_layers", record)
+            generate_data(StringIO(self.yaml))
+
+        assert layers == {
+            frozenset(["greeting"]): NamespaceLayers(
+                variables=True, plugins=False, objects=False
+            ),
+            frozenset(["greeting", "Account"]): NamespaceLayers(
+                variables=True, plugins=False, objects=True
+            ),
+            # reference: used_nickname
+            frozenset(["used_nickname"]): NamespaceLayers(
+                variables=False, plugins=False, objects=True
+            ),
+        }
+
+
+class TestPureFormulas:
+    yaml = """
+    - var: years
+      value: ${{random_number(1, 5)}}
+    - var: code
+      value: ${{fake.uuid4}}
+    - object: Account
+      count: 3
+      fields:
+        name: Acme
+        years: ${{years}}
+        since: ${{date(today) - relativedelta(years=years)}}
+        last_year: ${{date(today) - relativedelta(years=1)}}
+        label: ${{"Y" ~ code | upper}}
+        number: ${{id}}
+        owner: ${{name | upper}}
+        random: ${{random_number(1, 5)}}
+        later: ${{today.today()}}
+        shuffled: ${{[1, 2] | random}}
+    """
+
+    def test_pure_formula_variables(self):
+        analysis = analyze(self.yaml)
+        pure = {
+            formula: analysis.pure_formula_variables(formula, {"today"})
+            for formula in analysis.formula_names
+        }
+        assert pure == {
+            "${{random_number(1, 5)}}": None,
+            "${{fake.uuid4}}": None,
+            "${{years}}": frozenset(["years"]),
+            "${{date(today) - relativedelta(years=years)}}": frozenset(["years"]),
+            "${{date(today) - relativedelta(years=1)}}": frozenset(),
+            '${{"Y" ~ code | upper}}': frozenset(["code"]),
+            "${{id}}": None,
+            "${{name | upper}}": None,  # a field of the row
+            "${{today.today()}}": None,
+            "${{[1, 2] | random}}": None,
+        }
+
+    def test_shadowed_constants(self):
+        analysis = analyze(
+            """
+            - object: Account
+              fields:
+                today: 2020-01-01
+                when: ${{today}}
+            """
+        )
+        assert analysis.pure_formula_variables("${{today}}", {"today"}) is None
+
+    def test_pure_formulas_rendered_when_variables_change(self):
+        rendered = []
+        render_uncached = SimpleValue.render_uncached
+
+        def record(self, context):
+            rendered.append(self.definition)
+            return render_uncached(self, context)
+
+        with pytest.MonkeyPatch.context() as patch:
+            patch.setattr(SimpleValue, "render_uncached", record)
+            generate_data(StringIO(self.yaml), target_number=("Account", 6))
+
+        assert rendered.count("${{date(today) - relativedelta(years=1)}}") == 1
+        # once per iteration, when `code` is assigned again
+        assert rendered.count('${{"Y" ~ code | upper}}') == 2
+        assert rendered.count("${{random_number(1, 5)}}") == 2 + 6
+        assert rendered.count("${{id}}") == 6
+
+    def test_pure_formulas_per_interpreter(self):
+        parse_result = parse_recipe(
+            StringIO(
+                """
+                - object: Account
+                  fields:
+                    message: ${{greeting}}
+                """
+            )
+        )
+
+        def interpreter(options):
+            return Interpreter(
+                output_stream=DebugOutputStream(),
+                parent_application=SnowfakeryApplication(),
+                parse_result=parse_result,
+                globals=Globals(),
+                options=options,
+            )
+
+        # e.g. concurrent runs of a prepared recipe
+        with interpreter({"greeting": "Hi"}) as with_option:
+            with interpreter({}) as without_option:
+                assert with_option.pure_formula_variables == [frozenset()]
+                assert without_option.pure_formula_variables == [None]
+
+    def test_same_values(self, generated_rows):
+        generate_data(StringIO(self.yaml))
+        years = generated_rows.table_values("Account", 1, "years")
+        label = generated_rows.table_values("Account", 1, "label")
+        for index in (1, 2, 3):
+            assert generated_rows.table_values("Account", index, "years") == years
+            assert generated_rows.table_values("Account", index, "label") == label
+            assert generated_rows.table_values("Account", index, "since") == str(
+                date.today() - relativedelta(years=int(years))
+            )
@@ -0,0 +1,92 @@
+from io import StringIO
+from pathlib import Path
+from unittest import mock
+
+import pytest
+
+from snowfakery import generate_data
+from snowfakery.recipe_cache import parse_recipe_with_cache
+
+parse_recipe = "snowfakery.recipe_cache.parse_recipe"
+
+
+def write_recipe(tmp_path: Path, text: str, name="recipe.yml") -> Path:
+    recipe = tmp_path / name
+    recipe.write_text(text)
+    return recipe
+
+
+class TestRecipeCache:
+    def test_second_run_skips_parsing(self, tmp_path, generated_rows):
+        recipe = write_recipe(
+            tmp_path,
+            """
+            - object: Account
+              count: 2
+              fields:
+                name: Company ${{id}}
+            """,
+        )
+        cache_dir = tmp_path / "cache"
+        generate_data(recipe, recipe_cache_dir=cache_dir)
+        assert len(list(cache_dir.glob("*.pickle"))) == 1
+
+        with mock.patch(parse_recipe) as parse:
+            generate_data(recipe, recipe_cache_dir=cache_dir)
+            assert not parse.mock_calls
+        assert generated_rows.table_values("Account", 4, "name") == "Company 2"
+
+    def test_changed_recipe_is_reparsed(self, tmp_path):
+        cache_dir = tmp_path / "cache"
+        recipe = write_recipe(tmp_path, "- object: A")
+        generate_data(recipe, recipe_cache_dir=cache_dir)
+        recipe = write_recipe(tmp_path, "- object: B")
+        generate_data(recipe, recipe_cache_dir=cache_dir)
+        assert len(list(cache_dir.glob("*.pickle"))) == 2
+
+    def test_changed_include_file_is_reparsed(self, tmp_path, generated_rows):
+        cache_dir = tmp_path / "cache"
+        write_recipe(tmp_path, "- object: A", "included.yml")
+        recipe = write_recipe(tmp_path, "- include_file: included.yml")
+        generate_data(recipe, recipe_cache_dir=cache_dir)
+        write_recipe(tmp_path, "- object: B", "included.yml")
+        generate_data(recipe, recipe_cache_dir=cache_dir)
+        assert generated_rows.mock_calls[-1][1][0] == "B"
+
+    def test_streams_are_cached(self, tmp_path):
+        cache_dir = tmp_path / "cache"
+        with open(write_recipe(tmp_path, "- object: A")) as f:
+            parse_recipe_with_cache(f, cache_dir)
+        with mock.patch(parse_recipe) as parse, open(tmp_path / "recipe.yml") as f:
+            assert parse_recipe_with_cache(f, cache_dir).templates[0].tablename == "A"
+            assert not parse.mock_calls
+        parse_recipe_with_cache(StringIO("- object: A"), cache_dir)
+        assert len(list(cache_dir.glob("*.pickle"))) == 2
+
+    def test_corrupt_cache_entries_are_ignored(self, tmp_path, generated_rows):
+        cache_dir = tmp_path / "cache"
+        recipe = write_recipe(tmp_path, "- object: A")
+        generate_data(recipe, recipe_cache_dir=cache_dir)
+        (entry,) = cache_dir.glob("*.pickle")
+        entry.write_bytes(b"garbage")
+        with pytest.warns(UserWarning, match="unreadable"):
+            generate_data(recipe, recipe_cache_dir=cache_dir)
+        assert generated_rows.mock_calls[-1][1][0] == "A"
+
+    def test_memorable_state_survives_caching(self, tmp_path, generated_rows):
+        cache_dir = tmp_path / "cache"
+        recipe = write_recipe(
+            tmp_path,
+            """
+            - plugin: snowfakery.standard_plugins.Counters
+            - object: A
+              count: 3
+              fields:
+                num:
+                  Counters.NumberCounter:
+                    start: 10
+            """,
+        )
+        generate_data(recipe, recipe_cache_dir=cache_dir)
+        generate_data(recipe, recipe_cache_dir=cache_dir)
+        assert generated_rows.table_values("A", field="num") == [10, 11, 12] * 2
@@ -9,6 +9,8 @@ from test_parse_samples import find_row
 from snowfakery.api import StoppingCriteria
 from snowfakery.data_gen_exceptions import DataGenError, DataGenSyntaxError
 from snowfakery.data_generator import generate
+from snowfakery.object_rows import LazyLoadedObjectReference, ObjectRow
+from snowfakery.row_history import RowHistory
 
 simple_parent = """                     #1
 - object: A                             #2
@@ -286,6 +288,58 @@ class TestReferences:
             mock.call("B", {"id": 3, "A_ref": "A(3)"}),
         ]
 
+    def test_forward_reference__iterations_per_check(self, generated_rows):
+        yaml = """
+            - object: A
+              fields:
+                B_ref:
+                  reference:
+                    B
+            - object: B
+              fields:
+                A_ref:
+                  reference:
+                    A
+              """
+        generate(
+            StringIO(yaml),
+            {},
+            stopping_criteria=StoppingCriteria("A", 3),
+            plugin_options={"iterations_per_check": 2},
+        )
+        # checked after the second and fourth iterations
+        assert generated_rows.table_values("A", field="B_ref") == [
+            "B(1)",
+            "B(2)",
+            "B(3)",
+            "B(4)",
+        ]
+
+    def test_forward_reference_not_fulfilled__iterations_per_check(self):
+        yaml = """
+            - object: A
+              fields:
+                B_ref:
+                  reference:
+                    B
+            - object: B
+              count: 0
+              """
+        with pytest.raises(DataGenError, match="not fulfilled: B"):
+            generate(
+                StringIO(yaml),
+                {},
+                stopping_criteria=StoppingCriteria("A", 3),
+                plugin_options={"iterations_per_check": 5},
+            )
+
+    def test_iterations_per_check__without_target(self, generated_rows):
+        yaml = """
+            - object: A
+              """
+        generate(StringIO(yaml), {}, plugin_options={"iterations_per_check": 5})
+        assert len(generated_rows.mock_calls) == 1
+
     def _generate_loop(self, yaml, iterations, num_per_iteration):
         old_continuation_data = None
         for i in range(0, iterations):
@@ -1066,3 +1120,89 @@ class TestRandomReferencesNew:
             key = row["ContactId"], row["CampaignId"]
             assert key not in combinations
             combinations.add(key)
+
+
+class TestRowHistoryReferences:
+    def test_rows_saved_once(self):
+        account = ObjectRow("Account", {"id": 1, "name": "Acme"})
+        contact = ObjectRow("Contact", {"id": 1, "account": account})
+        history = RowHistory({}, ["Case"], {})
+        with mock.patch.object(
+            history.pickler, "dumps", side_effect=history.pickler.dumps
+        ) as dumps:
+            for case_id in (1, 2, 3):
+                history.save_row("Case", None, {"id": case_id, "contact": contact})
+            saved = [call.args[0] for call in dumps.mock_calls]
+        # each case, and the contact and account once
+        assert len(saved) == 5
+        assert history.table_sizes() == {"Case": 3, "Contact": 1, "Account": 1}
+        case = history.load_row("Case", 3)
+        assert type(case["contact"]) is LazyLoadedObjectReference
+        assert history.load_row("Contact", 1)["account"].id == 1
+
+    def test_rows_saved_again_when_they_grow(self):
+        values = {"id": 1}
+        parent = ObjectRow("Parent", values)
+        history = RowHistory({}, ["Child"], {})
+        history.save_row("Child", None, {"id": 1, "parent": parent})
+        values["name"] = "Late"
+        history.save_row("Child", None, {"id": 2, "parent": parent})
+        assert history.load_row("Parent", 1) == {"id": 1, "name": "Late"}
+
+    def test_cycles(self):
+        first = ObjectRow("Node", {"id": 1})
+        second = ObjectRow("Node", {"id": 2, "next": first})
+        first._values["next"] = second
+        history = RowHistory({}, ["Leaf"], {})
+        history.save_row("Leaf", None, {"id": 1, "node": first})
+        assert history.load_row("Node", 1)["next"].id == 2
+        assert history.load_row("Node", 2)["next"].id == 1
+
+    def test_references_resolved_lazily(self, generated_rows):
+        yaml = """
+        - object: Account
+          fields:
+            name: Acme
+          friends:
+            - object: Contact
+              count: 2
+              fields:
+                account:
+                  reference: Account
+              friends:
+                - object: Case
+                  fields:
+                    contact:
+                      reference: Contact
+        - object: Task
+          fields:
+            case:
+              random_reference: Case
+            account_name: ${{case.contact.account.name}}
+        """
+        generate(StringIO(yaml))
+        assert generated_rows.table_values("Task", 1, "account_name") == "Acme"
+
+    def test_references_to_unfinished_history_rows(self, generated_rows):
+        yaml = """
+        - object: Account
+          fields:
+            name: Acme
+            contact:
+              - object: Contact
+                fields:
+                  acct:
+                    reference: Account
+            opp:
+              - object: Opp
+                fields:
+                  c:
+                    random_reference: Contact
+                  n: ${{c.acct.name}}
+        - object: Opp2
+          fields:
+            a:
+              random_reference: Account
+        """
+        generate(StringIO(yaml))
+        assert generated_rows.table_values("Opp", 1, "n") == "Acme"
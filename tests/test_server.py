@@ -0,0 +1,268 @@
+import json
+import socket
+from http.client import HTTPConnection
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from threading import Event, Thread
+from unittest import mock
+
+import pytest
+
+from snowfakery import api
+from snowfakery.cli import main
+from snowfakery.server import PreparedRecipeCache, make_server
+
+unix_sockets = pytest.mark.skipif(
+    not hasattr(socket, "AF_UNIX"), reason="Unix domain sockets not available"
+)
+
+
+class UnixHTTPConnection(HTTPConnection):
+    def __init__(self, path):
+        super().__init__("localhost")
+        self.path = path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.connect(self.path)
+
+
+@pytest.fixture
+def server():
+    server = make_server(port=0, workers=2)
+    thread = Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def request(server, method, path, job=None, connection=None):
+    connection = connection or HTTPConnection(*server.server_address)
+    body = json.dumps(job) if job is not None else None
+    connection.request(method, path, body=body)
+    response = connection.getresponse()
+    return response.status, response.read().decode("utf-8")
+
+
+class TestServer:
+    def test_health(self, server):
+        assert request(server, "GET", "/health") == (200, '{"status": "ok"}')
+
+    def test_not_found(self, server):
+        assert request(server, "GET", "/nowhere")[0] == 404
+        assert request(server, "POST", "/nowhere", {})[0] == 404
+
+    def test_stream_json(self, server):
+        job = {"recipe_text": "- object: Foo\n  count: 2", "output_format": "json"}
+        status, body = request(server, "POST", "/generate", job)
+        assert status == 200
+        assert json.loads(body) == [
+            {"_table": "Foo", "id": 1},
+            {"_table": "Foo", "id": 2},
+        ]
+
+    def test_stream_txt_with_options(self, server):
+        job = {
+            "recipe": "examples/parameters.recipe.yml",
+            "reps": 2,
+        }
+        status, body = request(server, "POST", "/generate", job)
+        assert status == 200
+        assert body.count("Example(") == 2
+
+    def test_output_file(self, server):
+        with TemporaryDirectory() as t:
+            outfile = Path(t) / "out.json"
+            job = {
+                "recipe": "examples/company.yml",
+                "target_number": [4, "Employee"],
+                "output_file": str(outfile),
+            }
+            status, body = request(server, "POST", "/generate", job)
+            assert status == 200, body
+            assert json.loads(body)["status"] == "ok"
+            rows = json.loads(outfile.read_text())
+            assert len([row for row in rows if row["_table"] == "Employee"]) == 4
+
+    def test_recipes_are_prepared_once(self, server):
+        job = {"recipe_text": "- object: Foo"}
+        with mock.patch(
+            "snowfakery.server.prepare_recipe", wraps=api.prepare_recipe
+        ) as prepare:
+            for i in range(3):
+                assert request(server, "POST", "/generate", job)[0] == 200
+        assert prepare.call_count == 1
+
+    def test_cache_hits_do_not_wait_for_other_recipes(self):
+        cache = PreparedRecipeCache()
+        fast = {"recipe_text": "- object: Fast"}
+        slow = {"recipe_text": "- object: Slow"}
+        cache.get(fast)
+        started, finish = Event(), Event()
+
+        def prepare(recipe, **kwargs):
+            if "Slow" in recipe.getvalue():
+                started.set()
+                assert finish.wait(10)
+            return api.prepare_recipe(recipe, **kwargs)
+
+        with mock.patch("snowfakery.server.prepare_recipe", prepare):
+            thread = Thread(target=cache.get, args=(slow,))
+            thread.start()
+            try:
+                assert started.wait(10)
+                # while Slow is being prepared
+                hit = Thread(target=cache.get, args=(fast,))
+                hit.start()
+                hit.join(10)
+                assert not hit.is_alive()
+            finally:
+                finish.set()
+                thread.join()
+        assert len(cache._recipes) == 2
+
+    def test_recipes_prepared_once_when_requested_together(self):
+        cache = PreparedRecipeCache()
+        job = {"recipe_text": "- object: Foo"}
+        with mock.patch(
+            "snowfakery.server.prepare_recipe", wraps=api.prepare_recipe
+        ) as prepare:
+            threads = [Thread(target=cache.get, args=(job,)) for _ in range(4)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        assert prepare.call_count == 1
+
+    def test_modified_recipes_are_prepared_again(self, server):
+        with TemporaryDirectory() as t:
+            recipe = Path(t) / "recipe.yml"
+            recipe.write_text("- object: Foo")
+            job = {"recipe": str(recipe)}
+            assert "Foo(id=1)" in request(server, "POST", "/generate", job)[1]
+            recipe.write_text("- object: Bar")
+            assert "Bar(id=1)" in request(server, "POST", "/generate", job)[1]
+
+    def test_concurrent_dataset_jobs(self, server):
+        with TemporaryDirectory() as t:
+            jobs = []
+            for name in ("east", "west"):
+                folder = Path(t) / name
+                folder.mkdir()
+                rows = "\n".join(f"{name}{i}" for i in range(50))
+                (folder / "cities.csv").write_text(f"city\n{rows}\n")
+                recipe = folder / "recipe.yml"
+                recipe.write_text(
+                    """
+                    - plugin: snowfakery.standard_plugins.datasets.Dataset
+                    - object: City
+                      for_each:
+                        var: row
+                        value:
+                          Dataset.iterate:
+                            dataset: cities.csv
+                      fields:
+                        name: ${{row.city}}
+                    """
+                )
+                jobs.append((name, {"recipe": str(recipe), "output_format": "json"}))
+
+            results = {}
+
+            def run(name, job):
+                results[name] = request(server, "POST", "/generate", job)
+
+            threads = [Thread(target=run, args=job) for job in jobs]
+            # datasets are found relative to their recipes without os.chdir,
+            # which would affect the other job
+            with mock.patch("os.chdir", side_effect=AssertionError("chdir")):
+                for thread in threads:
+                    thread.start()
+                for thread in threads:
+                    thread.join()
+
+        for name, (status, body) in results.items():
+            assert status == 200, body
+            names = [row["name"] for row in json.loads(body)]
+            assert names == [f"{name}{i}" for i in range(50)]
+
+    @pytest.mark.parametrize(
+        "job,error",
+        [
+            ([], "must be a JSON object"),
+            ({"recipe_text": "- object: Foo", "colour": "red"}, "colour"),
+            ({}, "exactly one"),
+            ({"recipe_text": "- object: Foo", "output_format": "png"}, "Cannot stream"),
+            (
+                {
+                    "recipe_text": "- object: Foo",
+                    "reps": 1,
+                    "target_number": [1, "Foo"],
+                },
+                "not both",
+            ),
+            ({"recipe_text": "- objectt: Foo"}, "objectt"),
+            ({"recipe": "no/such/recipe.yml"}, "No such file"),
+        ],
+    )
+    def test_bad_jobs(self, server, job, error):
+        status, body = request(server, "POST", "/generate", job)
+        assert status == 400
+        assert error in json.loads(body)["error"]
+
+    def test_generation_errors(self, server):
+        with TemporaryDirectory() as t:
+            job = {
+                "recipe_text": "- object: Foo\n  fields:\n    x: ${{1/0}}",
+                "output_file": str(Path(t) / "out.json"),
+            }
+            status, body = request(server, "POST", "/generate", job)
+            assert status == 422
+            assert "division by zero" in json.loads(body)["error"]
+
+    def test_streaming_errors_truncate_the_response(self, server):
+        job = {"recipe_text": "- object: Foo\n  fields:\n    x: ${{1/0}}"}
+        connection = HTTPConnection(*server.server_address)
+        connection.request("POST", "/generate", body=json.dumps(job))
+        response = connection.getresponse()
+        assert response.status == 200
+        with pytest.raises(Exception):
+            response.read()
+
+    @unix_sockets
+    def test_unix_socket(self):
+        with TemporaryDirectory() as t:
+            path = str(Path(t) / "snowfakery.sock")
+            server = make_server(socket_path=path)
+            Thread(target=server.serve_forever, daemon=True).start()
+            try:
+                status, body = request(
+                    server,
+                    "POST",
+                    "/generate",
+                    {"recipe_text": "- object: Foo"},
+                    connection=UnixHTTPConnection(path),
+                )
+                assert (status, body) == (200, "Foo(id=1)\n")
+            finally:
+                server.shutdown()
+                server.server_close()
+            assert not Path(path).exists()
+
+
+class TestServeCommand:
+    def test_serve_command(self):
+        argv = ["snowfakery", "serve", "--port", "9999", "--workers", "3"]
+        with mock.patch("snowfakery.server.make_server") as make:
+            with mock.patch("sys.argv", argv), pytest.raises(SystemExit):
+                main()
+        make.assert_called_once_with("127.0.0.1", 9999, None, 3, None)
+        make.return_value.serve_forever.assert_called_once()
+
+    def test_generate_command(self, capsys):
+        with mock.patch("sys.argv", ["snowfakery", "examples/company.yml"]):
+            with pytest.raises(SystemExit) as e:
+                main()
+        assert e.value.code == 0
+        assert "Employee(id=1" in capsys.readouterr().out
@@ -0,0 +1,49 @@
+import json
+
+from click.testing import CliRunner
+
+from snowfakery.row_history import RowHistory
+from snowfakery.tools.storage_bench import bench_history, main
+
+
+def indexes(history, table):
+    rows = history.conn.execute(f"PRAGMA index_list('{table}')")
+    return sorted(row[1] for row in rows)
+
+
+class TestStorageBench:
+    def test_bench_history(self):
+        result = bench_history(50, "memory", False, 20)
+        assert result["size"] == 50
+        assert result["saves_per_second"] > 0
+        assert result["nickname_references_per_second"] > 0
+        assert result["database_bytes"] > 0
+
+    def test_command(self, tmp_path):
+        json_file = tmp_path / "results.json"
+        result = CliRunner().invoke(
+            main,
+            [
+                "--size",
+                "20",
+                "--backend",
+                "file",
+                "--lookups",
+                "5",
+                "--json-file",
+                str(json_file),
+            ],
+        )
+        assert result.exit_code == 0, result.output
+        assert len(result.output.splitlines()) == 3
+        results = json.loads(json_file.read_text())
+        assert [r["nickname_index"] for r in results] == [True, False]
+
+    def test_nickname_index_is_optional(self):
+        with_index = RowHistory({}, ["Account"], {})
+        assert indexes(with_index, "Account") == [
+            "Account_nickname_id",
+            "sqlite_autoindex_Account_1",
+        ]
+        without_index = RowHistory({}, ["Account"], {}, nickname_index=False)
+        assert indexes(without_index, "Account") == ["sqlite_autoindex_Account_1"]
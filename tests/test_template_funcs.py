@@ -4,6 +4,7 @@ import pydantic
 
 from datetime import datetime, date
 
+from snowfakery import generate_data
 from snowfakery.data_generator import generate
 from snowfakery.data_gen_exceptions import DataGenError
 
@@ -253,6 +254,57 @@ class TestTemplateFuncs:
         generate(StringIO(yaml))
         assert len(now.mock_calls) == 3
 
+    @mock.patch("snowfakery.data_generator_runtime.datetime")
+    def test_now_is_only_computed_when_used(self, datetime):
+        now = datetime.now = mock.Mock()
+        yaml = """
+        - object : A
+          count: 3
+          fields:
+            a: ${{today}}
+            b: ${{id}}
+        """
+        generate(StringIO(yaml))
+        assert not now.mock_calls
+
+    @mock.patch("snowfakery.data_generator_runtime.datetime")
+    def test_freeze_now(self, datetime):
+        now = datetime.now = mock.Mock(side_effect=[1, 2, 3])
+        yaml = """
+        - object : A
+          fields:
+            a: ${{now}}
+            b: ${{now}}
+        """
+        generate_data(
+            StringIO(yaml), plugin_options={"freeze_now": True}, target_number=("A", 2)
+        )
+        # once per iteration
+        assert len(now.mock_calls) == 2
+
+    def test_names_in_formulas(self, generated_rows):
+        yaml = """
+        - var: A
+          value: variable
+        - object: A
+          fields:
+            date: a field
+        - object: B
+          fields:
+            a: ${{A}}
+            id_plus_one: ${{id + 1}}
+            date: ${{date(year=2020, month=1, day=1)}}
+            range: ${{range(2) | list}}
+        """
+        generate(StringIO(yaml))
+        assert generated_rows.table_values("B", 0) == {
+            "id": 1,
+            "a": "variable",
+            "id_plus_one": 2,
+            "date": "2020-01-01",
+            "range": "[0, 1]",
+        }
+
     def test_old_syntax(self, generated_rows):
         yaml = """
         - object : A
@@ -1,4 +1,12 @@
-from snowfakery.utils.template_utils import look_for_number, StringGenerator
+from unittest import mock
+
+import pytest
+
+from snowfakery.utils.template_utils import (
+    look_for_number,
+    StringGenerator,
+    FakerTemplateLibrary,
+)
 
 
 class TestParseNumbers:
@@ -24,3 +32,21 @@ class TestTemplateUtils:
 
     def test_self_add(self):
         assert str(StringGenerator(lambda: "a") + StringGenerator(lambda: "b")) == "ab"
+
+
+class TestFakerTemplateLibrary:
+    def test_fakes_are_bound_once(self):
+        context = mock.Mock()
+        context.local_vars.return_value = {}
+        library = FakerTemplateLibrary([], context=context)
+        first_name = library.first_name
+        assert library.first_name is first_name
+        assert library.fake_data.fake_function("first_name") is first_name.func
+        assert str(first_name)
+        assert context.local_vars()["firstname"]
+
+    def test_unknown_fakes_fail_when_used(self):
+        library = FakerTemplateLibrary([], context=mock.Mock())
+        bad_fake = library.xyzzy
+        with pytest.raises(AttributeError, match="xyzzy"):
+            str(bad_fake)
@@ -535,6 +535,15 @@ class TestResolveValueWithInterpreter:
         assert "id" in result
         assert "today" in result
 
+    def test_mock_runtime_context_lookup(self):
+        context = self.setup_context_with_interpreter()
+
+        from snowfakery.utils.validation_utils import MockRuntimeContext
+
+        mock_context = MockRuntimeContext(context, namespace={"test_var": 123})
+        assert mock_context.lookup("test_var") == 123
+        assert mock_context.lookup("bogus", "default") == "default"
+
     def test_nested_structured_value_resolution(self):
         """Test that nested StructuredValues are resolved before validator sees them."""
         context = self.setup_context_with_interpreter()